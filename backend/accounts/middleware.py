@@ -0,0 +1,171 @@
+"""
+Autenticación JWT para WebSockets
+
+Sustituye a AuthMiddlewareStack (sesión + cookies, una consulta por
+conexión). El access token se verifica sin estado: firma, caducidad y tipo
+se comprueban en memoria, y el id y el rol del usuario salen de sus claims
+(ver accounts.tokens.UserRefreshToken), así que abrir una conexión no toca
+la base de datos ni ocupa el pool de hilos de database_sync_to_async, también
+en una avalancha de reconexiones. El rol del access token es el vigente al
+emitirlo o renovarlo (como mucho ACCESS_TOKEN_LIFETIME de antigüedad) y las
+suscripciones a proyectos lo vuelven a comprobar en la base de datos.
+
+Solo se consulta al usuario cuando el token no lleva el claim `role`
+(tokens emitidos antes de añadirlo) o cuando WEBSOCKET_AUTH['USER_CACHE_TTL']
+es mayor que 0 (opcional), en cuyo caso se comprueban también `is_active` y
+el rol actual y el resultado se guarda en una caché en memoria del proceso
+durante ese número de segundos.
+"""
+import logging
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import User
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'QUERY_PARAM': 'token',
+    'USER_CACHE_TTL': 0,
+    'USER_CACHE_SIZE': 10000,
+}
+
+
+def websocket_auth_settings():
+    return {**DEFAULTS, **getattr(settings, 'WEBSOCKET_AUTH', {})}
+
+
+def token_from_scope(scope, param='token'):
+    """
+    Token de la query string (`?token=...`), decodificado y sin tocar el
+    resto de parámetros. Como alternativa acepta la cabecera
+    `Authorization: Bearer <token>`.
+    """
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    values = query.get(param)
+    if values and values[0]:
+        return values[0]
+
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            scheme, _, credentials = value.decode('latin-1').partition(' ')
+            if scheme.lower() == 'bearer' and credentials:
+                return credentials.strip()
+    return None
+
+
+class ClaimsUser(TokenUser):
+    """Usuario construido solo con los claims del token, con los helpers de rol de User"""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', '')
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def is_collaborator(self):
+        return self.role == 'collaborator'
+
+    def is_viewer(self):
+        return self.role == 'viewer'
+
+    def can_edit_projects(self):
+        return self.role in ['admin', 'collaborator']
+
+    def can_delete_projects(self):
+        return self.role == 'admin'
+
+
+class UserCache:
+    """Caché LRU con caducidad de usuarios por id, local al proceso"""
+
+    def __init__(self, ttl, size):
+        self.ttl = ttl
+        self.size = size
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, user = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return user
+
+    def set(self, user_id, user):
+        self._entries[user_id] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Pone en scope['user'] el usuario del access token, o AnonymousUser si
+    falta o no es válido. Los consumers deciden si aceptan la conexión.
+    """
+
+    def __init__(self, inner):
+        super().__init__(inner)
+        options = websocket_auth_settings()
+        self.query_param = options['QUERY_PARAM']
+        self.user_cache = UserCache(options['USER_CACHE_TTL'], options['USER_CACHE_SIZE'])
+        self.user_loads = 0
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        scope['user'] = await self.authenticate(scope)
+        return await super().__call__(scope, receive, send)
+
+    async def authenticate(self, scope):
+        raw_token = token_from_scope(scope, self.query_param)
+        if not raw_token:
+            return AnonymousUser()
+
+        try:
+            token = AccessToken(raw_token)
+            user_id = token[jwt_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            logger.info("Token de WebSocket inválido o caducado")
+            return AnonymousUser()
+
+        if 'role' in token and self.user_cache.ttl <= 0:
+            return ClaimsUser(token)
+
+        user = self.user_cache.get(user_id)
+        if user is None:
+            user = await self.load_user(user_id)
+            if user is None:
+                return AnonymousUser()
+            if self.user_cache.ttl > 0:
+                self.user_cache.set(user_id, user)
+        return user
+
+    @database_sync_to_async
+    def load_user(self, user_id):
+        self.user_loads += 1
+        user = User.objects.filter(
+            **{jwt_settings.USER_ID_FIELD: user_id}, is_active=True
+        ).first()
+        if user is None:
+            logger.info("Token de WebSocket de un usuario inexistente o inactivo: %s", user_id)
+        return user
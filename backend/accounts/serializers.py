@@ -1,9 +1,14 @@
+import logging
+
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User
 
 
+logger = logging.getLogger(__name__)
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializer para registro de usuarios
@@ -62,9 +67,6 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         validated_data.pop('password_confirm')
         password = validated_data.pop('password')
         
-        # Log para debugging
-        print(f"Creando usuario con datos: {validated_data}")
-        
         # Crear usuario usando el método estándar
         user = User(
             username=validated_data['username'],
@@ -77,7 +79,7 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         user.set_password(password)
         user.save()
         
-        print(f"Usuario creado exitosamente: {user.username}, rol: {user.role}")
+        logger.info("Usuario creado: %s (rol %s)", user.username, user.role)
         return user
 
 
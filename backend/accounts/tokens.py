@@ -0,0 +1,44 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class UserRefreshToken(RefreshToken):
+    """
+    RefreshToken cuyos access tokens incluyen el rol del usuario
+    El rol no va en el refresh token: se lee de la base de datos cada vez que
+    se emite un access token, así que al renovar se aplica el rol vigente y un
+    usuario desactivado ya no obtiene tokens nuevos.
+    """
+    # Refresh tokens emitidos cuando el rol aún viajaba en ellos
+    no_copy_claims = RefreshToken.no_copy_claims + ('role',)
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.role = user.role
+        return token
+
+    def current_role(self):
+        role = getattr(self, 'role', None)
+        if role is not None:
+            return role
+        from .models import User
+        role = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: self.payload.get(api_settings.USER_ID_CLAIM)}, is_active=True
+        ).values_list('role', flat=True).first()
+        if role is None:
+            raise TokenError('El usuario no existe o está inactivo')
+        return role
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        access['role'] = self.current_role()
+        return access
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """Renovación que emite el access token con el rol actual del usuario"""
+    token_class = UserRefreshToken
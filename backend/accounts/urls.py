@@ -1,6 +1,7 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
+from .tokens import UserTokenRefreshSerializer
 
 app_name = 'accounts'
 
@@ -9,7 +10,8 @@ urlpatterns = [
     path('login/', views.CustomTokenObtainPairView.as_view(), name='login'),
     path('register/', views.register_user, name='register'),
     path('logout/', views.logout_user, name='logout'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', TokenRefreshView.as_view(serializer_class=UserTokenRefreshSerializer),
+         name='token_refresh'),
     
     # Perfil de usuario
     path('profile/', views.UserProfileView.as_view(), name='profile'),
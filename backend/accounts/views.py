@@ -1,9 +1,12 @@
+import logging
+
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import UserRefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth import login
+from projects.dashboard import get_dashboard
 from .models import User
 from .serializers import (
     UserRegistrationSerializer,
@@ -14,6 +17,9 @@ from .serializers import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+
 class CustomTokenObtainPairView(TokenObtainPairView):
     """
     Vista personalizada para obtener tokens JWT
@@ -28,7 +34,7 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = UserRefreshToken.for_user(user)
             
             return Response({
                 'refresh': str(refresh),
@@ -46,12 +52,13 @@ def register_user(request):
     Vista para registro de usuarios
     Implementa el principio de Responsabilidad Única (SRP)
     """
-    print(f"Datos recibidos: {request.data}")
+    # No se registra request.data: contiene la contraseña
+    logger.debug("Registro solicitado para el usuario %s", request.data.get('username'))
     serializer = UserRegistrationSerializer(data=request.data)
     
     if serializer.is_valid():
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = UserRefreshToken.for_user(user)
         
         return Response({
             'refresh': str(refresh),
@@ -59,7 +66,7 @@ def register_user(request):
             'user': UserProfileSerializer(user).data
         }, status=status.HTTP_201_CREATED)
     
-    print(f"Errores del serializer: {serializer.errors}")
+    logger.info("Registro rechazado: %s", serializer.errors)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
@@ -154,45 +161,9 @@ def user_dashboard(request):
     """
     user = request.user
     
-    # Estadísticas del usuario
-    stats = {
-        'owned_projects': user.owned_projects.count(),
-        'assigned_tasks': user.assigned_tasks.count(),
-        'completed_tasks': user.assigned_tasks.filter(status='completed').count(),
-        'pending_tasks': user.assigned_tasks.exclude(status='completed').count(),
-    }
-    
-    # Proyectos recientes
-    recent_projects = user.owned_projects.order_by('-created_at')[:5]
-    
-    # Tareas pendientes
-    pending_tasks = user.assigned_tasks.exclude(
-        status__in=['completed', 'cancelled']
-    ).order_by('-created_at')[:10]
-    
     return Response({
         'user': UserProfileSerializer(user).data,
-        'stats': stats,
-        'recent_projects': [
-            {
-                'id': project.id,
-                'name': project.name,
-                'status': project.status,
-                'progress': project.progress_percentage
-            }
-            for project in recent_projects
-        ],
-        'pending_tasks': [
-            {
-                'id': task.id,
-                'title': task.title,
-                'project_name': task.project.name,
-                'status': task.status,
-                'due_date': task.due_date,
-                'is_overdue': task.is_overdue
-            }
-            for task in pending_tasks
-        ]
+        **get_dashboard(user),
     })
 
 
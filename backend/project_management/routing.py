@@ -3,4 +3,5 @@ from projects import consumers
 
 websocket_urlpatterns = [
     re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
+    re_path(r'ws/projects/(?P<project_id>\d+)/$', consumers.ProjectConsumer.as_asgi()),
 ]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -148,6 +149,16 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # JSON con orjson si está instalado (misma salida que JSONRenderer)
+    'DEFAULT_RENDERER_CLASSES': [
+        'projects.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'projects.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 # JWT Settings
@@ -171,6 +182,48 @@ CORS_ALLOW_CREDENTIALS = True
 LANGUAGE_CODE = 'es-es'
 TIME_ZONE = 'America/Mexico_City'
 
+# Logging
+# Niveles por módulo configurables con variables de entorno, p. ej.
+# LOG_LEVEL_PROJECTS=DEBUG. Los mensajes usan formato perezoso (%s), así que
+# con el nivel deshabilitado no se evalúa nada.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {
+            'format': '{asctime} {levelname} {name}: {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'simple',
+        },
+    },
+    'loggers': {
+        'accounts': {
+            'handlers': ['console'],
+            'level': os.getenv('LOG_LEVEL_ACCOUNTS', 'INFO'),
+            'propagate': False,
+        },
+        'projects': {
+            'handlers': ['console'],
+            'level': os.getenv('LOG_LEVEL_PROJECTS', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+# Caché (ver projects/caching.py): memoria local en desarrollo y tests;
+# settings_production usa Redis cuando hay REDIS_URL
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'project-management',
+    }
+}
+
 # Django Channels
 ASGI_APPLICATION = 'project_management.asgi.application'
 
@@ -180,6 +233,58 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Autenticación de WebSockets (ver accounts/middleware.py)
+# Con USER_CACHE_TTL = 0 bastan los claims del access token (sin consultas al
+# conectar); con un valor mayor se comprueba también el usuario en la base de
+# datos (activo y rol actual) y se guarda en memoria ese número de segundos
+WEBSOCKET_AUTH = {
+    'QUERY_PARAM': 'token',
+    'USER_CACHE_TTL': int(os.getenv('WEBSOCKET_USER_CACHE_TTL', '0')),
+    'USER_CACHE_SIZE': 10000,
+}
+
+# Entrega por WebSocket (ver projects/consumers.py): los eventos de una
+# conexión se agrupan en ventanas de BATCH_WINDOW segundos, no se envían más
+# de MAX_UNACKED frames sin confirmar por el cliente y el buffer de un
+# cliente lento no pasa de MAX_PENDING eventos
+WEBSOCKET_DELIVERY = {
+    'BATCH_WINDOW': 0.05,
+    'MAX_BATCH': 100,
+    'MAX_PENDING': 1000,
+    'MAX_UNACKED': 8,
+    'ACK_TIMEOUT': 30.0,
+}
+
+# Despachador de notificaciones (ver projects/notifications.py)
+# InlineNotificationBackend entrega en el mismo hilo (tests y depuración)
+NOTIFICATIONS = {
+    'BACKEND': os.getenv(
+        'NOTIFICATIONS_BACKEND', 'projects.notifications.ThreadedNotificationBackend'
+    ),
+    'OPTIONS': {
+        'BATCH_SIZE': 100,
+        'FLUSH_INTERVAL': 0.05,
+    },
+}
+
+# Actualizaciones en vivo por proyecto (ver projects/live.py)
+LIVE_UPDATES = {
+    'BACKEND': os.getenv('LIVE_UPDATES_BACKEND', 'projects.live.ThreadedBroadcastBackend'),
+    'OPTIONS': {
+        'BATCH_SIZE': 500,
+        'FLUSH_INTERVAL': 0.05,
+    },
+}
+
+# Recordatorios de vencimiento, en segundos (ver projects/reminders.py)
+REMINDERS = {
+    'DUE_SOON': 24 * 3600,
+    'HORIZON': 3600,
+    'CATCH_UP': 24 * 3600,
+    'RESYNC_INTERVAL': 15 * 60,
+    'BATCH_SIZE': 500,
+}
+
 # Configuración adicional para WebSocket
 CHANNEL_LAYERS['default']['CONFIG'] = {
     'capacity': 1000,
@@ -53,15 +53,27 @@ CORS_ALLOW_ALL_ORIGINS = False
 # Configuración de canales para producción
 # Intentar usar Redis si está disponible, sino usar memoria
 REDIS_URL = os.getenv('REDIS_URL')
+# REDIS_CHANNEL_URLS (separadas por comas) reparte grupos y canales entre
+# varios servidores Redis; por defecto se usa solo REDIS_URL
+REDIS_CHANNEL_URLS = [url for url in os.getenv('REDIS_CHANNEL_URLS', '').split(',') if url]
 if REDIS_URL:
     CHANNEL_LAYERS = {
         'default': {
             'BACKEND': 'channels_redis.core.RedisChannelLayer',
             'CONFIG': {
-                "hosts": [REDIS_URL],
+                "hosts": REDIS_CHANNEL_URLS or [REDIS_URL],
             },
         },
     }
+    # Caché compartida entre procesos (el cliente redis lo instala channels-redis)
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'project-management',
+            'TIMEOUT': 300,
+        }
+    }
 else:
     # Fallback a memoria cuando Redis no esté disponible
     CHANNEL_LAYERS = {
@@ -70,22 +82,13 @@ else:
         },
     }
 
-# Configuración de logging
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-        },
-    },
-    'loggers': {
-        'django': {
-            'handlers': ['console'],
-            'level': 'INFO',
-        },
-    },
+# Configuración de logging: en producción las apps solo registran avisos
+LOGGING['loggers']['django'] = {
+    'handlers': ['console'],
+    'level': os.getenv('LOG_LEVEL_DJANGO', 'INFO'),
 }
+LOGGING['loggers']['accounts']['level'] = os.getenv('LOG_LEVEL_ACCOUNTS', 'WARNING')
+LOGGING['loggers']['projects']['level'] = os.getenv('LOG_LEVEL_PROJECTS', 'WARNING')
 
 # Configuración de email (opcional)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
@@ -0,0 +1,78 @@
+"""
+Control de acceso a proyectos y tareas
+
+Las membresías del usuario se cargan una sola vez por petición y se guardan
+en caché durante unos segundos; las señales de ProjectMember invalidan la
+entrada del usuario afectado.
+"""
+from django.core.cache import cache
+
+from .models import ProjectMember
+
+
+MEMBERSHIP_CACHE_TTL = 60
+
+
+def membership_cache_key(user_id):
+    return f'projects:memberships:{user_id}'
+
+
+def invalidate_memberships(user_id):
+    """Descarta las membresías en caché de un usuario"""
+    cache.delete(membership_cache_key(user_id))
+
+
+class ProjectAccess:
+    """
+    Reglas de visibilidad de proyectos y tareas para un usuario.
+    Cuesta como mucho una consulta (las membresías) por instancia.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self._project_ids = None
+
+    @property
+    def member_project_ids(self):
+        """Ids de los proyectos de los que el usuario es miembro"""
+        if self._project_ids is None:
+            key = membership_cache_key(self.user.id)
+            project_ids = cache.get(key)
+            if project_ids is None:
+                project_ids = frozenset(
+                    ProjectMember.objects.filter(user=self.user).values_list('project_id', flat=True)
+                )
+                cache.set(key, project_ids, MEMBERSHIP_CACHE_TTL)
+            self._project_ids = project_ids
+        return self._project_ids
+
+    def is_member(self, project_id):
+        return project_id in self.member_project_ids
+
+    def can_view_project(self, project):
+        """Propietario, miembro o administrador"""
+        return (
+            project.owner_id == self.user.id or
+            self.user.is_admin() or
+            self.is_member(project.id)
+        )
+
+    def can_view_task(self, task):
+        """
+        Asignado, creador o quien pueda ver el proyecto.
+        `task.project` debería venir con select_related para no costar una consulta.
+        """
+        return (
+            task.assigned_to_id == self.user.id or
+            task.created_by_id == self.user.id or
+            self.can_view_project(task.project)
+        )
+
+
+def get_access(request):
+    """Devuelve el ProjectAccess de la petición, creándolo la primera vez"""
+    access = getattr(request, '_project_access', None)
+    if access is None or access.user != request.user:
+        access = ProjectAccess(request.user)
+        request._project_access = access
+    return access
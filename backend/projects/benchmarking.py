@@ -0,0 +1,474 @@
+"""
+Utilidades para benchmarks: base de datos desechable, generación de datos
+sintéticos y medición de tiempos. Las usan los comandos `benchmark_*`.
+"""
+import math
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import User
+from .models import Notification, Project, ProjectMember, Task, TaskComment
+
+
+@contextmanager
+def scratch_database(verbosity=0):
+    """
+    Crea una base de datos de pruebas (como el test runner de Django) y la
+    destruye al salir, para no tocar nunca los datos reales. También prepara
+    el entorno de pruebas (ALLOWED_HOSTS, email en memoria) para APIClient.
+    """
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    old_name = connection.settings_dict['NAME']
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def analyze_database():
+    """Actualiza las estadísticas del planificador tras cargar datos"""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def seed_dataset(users=100, projects=50, members_per_project=5, tasks_per_project=100,
+                 comments_per_task=1, notifications_per_user=50, batch_size=5000, seed=42,
+                 description_words=0):
+    """
+    Genera un conjunto de datos realista con bulk_create y devuelve el número
+    de filas creadas por modelo. Con `description_words` las descripciones de
+    las tareas son texto variado (ver benchmark_words) en lugar de una frase fija.
+    """
+    rng = random.Random(seed)
+    words = benchmark_words()
+    word_weights = [1 / rank for rank in range(1, len(words) + 1)]
+
+    def task_description():
+        if not description_words:
+            return 'Tarea generada para benchmarks'
+        return ' '.join(rng.choices(words, word_weights, k=description_words))
+
+    now = timezone.now()
+    password = make_password('benchmark')
+    statuses = [value for value, _ in Task.STATUS_CHOICES]
+    priorities = [value for value, _ in Task.PRIORITY_CHOICES]
+    roles = ['admin'] + ['collaborator'] * 3 + ['viewer'] * 6
+
+    created_users = User.objects.bulk_create([
+        User(
+            username=f'bench_{index}',
+            email=f'bench_{index}@example.com',
+            first_name='Bench',
+            last_name=str(index),
+            role=roles[index % len(roles)],
+            password=password,
+        )
+        for index in range(users)
+    ], batch_size=batch_size)
+    user_ids = [user.pk for user in created_users]
+
+    created_projects = Project.objects.bulk_create([
+        Project(
+            name=f'Proyecto {index}',
+            description='Proyecto generado para benchmarks',
+            status=rng.choice(statuses),
+            priority=rng.choice(priorities),
+            start_date=date(2024, 1, 1) + timedelta(days=index % 365),
+            owner_id=rng.choice(user_ids),
+        )
+        for index in range(projects)
+    ], batch_size=batch_size)
+    project_ids = [project.pk for project in created_projects]
+
+    memberships = {}
+    for project_id in project_ids:
+        for user_id in rng.sample(user_ids, min(members_per_project, len(user_ids))):
+            memberships.setdefault(project_id, []).append(user_id)
+    ProjectMember.objects.bulk_create([
+        ProjectMember(project_id=project_id, user_id=user_id)
+        for project_id, member_ids in memberships.items()
+        for user_id in member_ids
+    ], batch_size=batch_size)
+
+    def build_tasks():
+        for project_id in project_ids:
+            assignees = memberships.get(project_id) or user_ids
+            for index in range(tasks_per_project):
+                status = rng.choice(statuses)
+                due_date = now + timedelta(days=rng.randint(-60, 60)) if rng.random() < 0.8 else None
+                yield Task(
+                    title=f'Tarea {index}',
+                    description=task_description(),
+                    status=status,
+                    priority=rng.choice(priorities),
+                    due_date=due_date,
+                    completed_at=now if status == 'completed' else None,
+                    project_id=project_id,
+                    assigned_to_id=rng.choice(assignees),
+                    created_by_id=rng.choice(user_ids),
+                )
+
+    task_count = 0
+    for batch in _batches(build_tasks(), batch_size):
+        Task.objects.bulk_create(batch)
+        task_count += len(batch)
+
+    task_ids = list(Task.objects.values_list('pk', flat=True))
+
+    def build_comments():
+        for task_id in task_ids:
+            for index in range(comments_per_task):
+                yield TaskComment(
+                    task_id=task_id,
+                    author_id=rng.choice(user_ids),
+                    content=f'Comentario {index}',
+                )
+
+    comment_count = 0
+    for batch in _batches(build_comments(), batch_size):
+        TaskComment.objects.bulk_create(batch)
+        comment_count += len(batch)
+
+    def build_notifications():
+        for user_id in user_ids:
+            for index in range(notifications_per_user):
+                yield Notification(
+                    user_id=user_id,
+                    type='task_assigned',
+                    title=f'Notificación {index}',
+                    message='Notificación generada para benchmarks',
+                    is_read=rng.random() < 0.7,
+                )
+
+    notification_count = 0
+    for batch in _batches(build_notifications(), batch_size):
+        Notification.objects.bulk_create(batch)
+        notification_count += len(batch)
+
+    analyze_database()
+    return {
+        'users': len(user_ids),
+        'projects': len(project_ids),
+        'members': sum(len(member_ids) for member_ids in memberships.values()),
+        'tasks': task_count,
+        'comments': comment_count,
+        'notifications': notification_count,
+    }
+
+
+def benchmark_words(count=5000):
+    """
+    Vocabulario sintético para los textos de benchmark; con pesos 1/rango
+    (ley de Zipf) las primeras palabras son muy frecuentes y las últimas raras
+    """
+    syllables = ['ca', 'pro', 'ta', 're', 'mi', 'so', 'lu', 'ven', 'dor', 'es', 'par', 'ti']
+    words = []
+    for index in range(count):
+        word, value = '', index
+        for _ in range(4):
+            word += syllables[value % len(syllables)]
+            value //= len(syllables)
+        words.append(word)
+    return words
+
+
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def measure(func, repeat=20):
+    """Ejecuta `func` varias veces y devuelve p50/p95/máximo en milisegundos"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def reset_peak_rss():
+    """
+    Reinicia el pico de memoria residente del proceso (VmHWM) en Linux, para
+    medir el de una fase sin arrastrar el de las anteriores. Devuelve False
+    si el sistema no lo permite.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def rss_mb(peak=True):
+    """Memoria residente del proceso en MB: el pico (VmHWM) o la actual (VmRSS)"""
+    field = 'VmHWM:' if peak else 'VmRSS:'
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith(field):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    import resource
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def percentiles(samples):
+    """p50/p95/máximo de una lista de tiempos en milisegundos"""
+    samples = sorted(samples)
+    return {
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(samples[math.ceil(len(samples) * 0.95) - 1], 3),
+        'max_ms': round(samples[-1], 3),
+    }
+
+
+def benchmark_actors():
+    """
+    Elige usuarios y objetos representativos del conjunto de datos para
+    ejercitar cada endpoint: el proyecto más grande de un colaborador, una de
+    sus tareas, un comentario, una notificación y un miembro removible
+    """
+    project = (
+        Project.objects.filter(owner__role='collaborator', tasks_total__gt=0)
+        .order_by('-tasks_total').select_related('owner').first()
+    )
+    collaborator = project.owner
+    admin = User.objects.filter(role='admin').first()
+    task = project.tasks.order_by('pk').first()
+    comment = TaskComment.objects.filter(task=task, author=collaborator).first()
+    if comment is None:
+        comment = TaskComment.objects.create(task=task, author=collaborator, content='Benchmark')
+    notification = Notification.objects.filter(user=collaborator).first()
+    if notification is None:
+        notification = Notification.objects.create(
+            user=collaborator, type='task_assigned', title='Benchmark', message='Benchmark'
+        )
+    member = (
+        ProjectMember.objects.filter(project=project)
+        .exclude(user__in=[collaborator, admin]).first()
+    )
+    if member is None:
+        member = ProjectMember.objects.create(
+            project=project,
+            user=User.objects.exclude(pk__in=[collaborator.pk, admin.pk]).filter(role='viewer').first()
+        )
+    outsider = (
+        User.objects.filter(role='viewer')
+        .exclude(project_memberships__project=project).first()
+    )
+    return {
+        'admin': admin,
+        'collaborator': collaborator,
+        'project': project,
+        'task': task,
+        'comment': comment,
+        'notification': notification,
+        'member': member,
+        'outsider': outsider,
+    }
+
+
+def api_scenarios(actors):
+    """
+    Peticiones representativas por ruta con nombre de `accounts` y `projects`.
+    Cada escenario: (ruta, método, kwargs de la URL, datos, usuario autenticado)
+    """
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from accounts.tokens import UserRefreshToken
+
+    admin = actors['admin']
+    collaborator = actors['collaborator']
+    project = actors['project']
+    task = actors['task']
+    comment = actors['comment']
+    notification = actors['notification']
+    member = actors['member']
+    outsider = actors['outsider']
+    task_payload = {
+        'title': 'Benchmark', 'project': project.pk, 'assigned_to': collaborator.pk,
+    }
+
+    return [
+        # Autenticación y perfil
+        ('accounts:login', 'post', {}, {'username': collaborator.username, 'password': 'benchmark'}, None),
+        ('accounts:register', 'post', {}, {
+            'username': 'benchmark_new', 'email': 'benchmark_new@example.com',
+            'first_name': 'Bench', 'last_name': 'New', 'role': 'viewer',
+            'password': 'benchmark', 'password_confirm': 'benchmark',
+        }, None),
+        ('accounts:logout', 'post', {}, {}, collaborator),
+        ('accounts:token_refresh', 'post', {}, {'refresh': str(UserRefreshToken.for_user(collaborator))}, None),
+        ('accounts:profile', 'get', {}, None, collaborator),
+        ('accounts:profile_update', 'patch', {}, {'first_name': 'Bench'}, collaborator),
+        ('accounts:change_password', 'post', {}, {
+            'old_password': 'benchmark', 'new_password': 'benchmark',
+            'new_password_confirm': 'benchmark',
+        }, collaborator),
+        ('accounts:dashboard', 'get', {}, None, collaborator),
+        ('accounts:user_list', 'get', {}, None, admin),
+
+        # Proyectos
+        ('projects:project_list', 'get', {}, None, collaborator),
+        ('projects:project_list', 'post', {}, {
+            'name': 'Benchmark', 'start_date': '2024-01-01',
+        }, collaborator),
+        ('projects:portfolio_stats', 'get', {}, {
+            'ids': ','.join(str(pk) for pk in Project.objects.values_list('pk', flat=True)[:200]),
+        }, admin),
+        ('projects:project_detail', 'get', {'pk': project.pk}, None, collaborator),
+        ('projects:project_detail', 'patch', {'pk': project.pk}, {'name': 'Benchmark'}, collaborator),
+        ('projects:project_detail', 'delete', {'pk': project.pk}, None, admin),
+        ('projects:project_stats', 'get', {'project_id': project.pk}, None, collaborator),
+
+        # Tareas
+        ('projects:task_list', 'get', {}, None, collaborator),
+        ('projects:task_list', 'post', {}, task_payload, admin),
+        ('projects:task_detail', 'get', {'pk': task.pk}, None, collaborator),
+        ('projects:task_detail', 'patch', {'pk': task.pk}, {'priority': 'high'}, collaborator),
+        ('projects:task_detail', 'delete', {'pk': task.pk}, None, collaborator),
+        ('projects:bulk_tasks', 'post', {}, {
+            'action': 'update_status', 'status': 'completed',
+            'ids': list(project.tasks.values_list('pk', flat=True)[:100]),
+        }, collaborator),
+        ('projects:import_tasks', 'post', {}, {'file': SimpleUploadedFile(
+            'tareas.csv', b'title,project_id,priority\n' + b''.join(
+                f'Importada {index},{project.pk},high\n'.encode() for index in range(50)
+            ), content_type='text/csv',
+        )}, collaborator),
+        ('projects:update_task_status', 'patch', {'task_id': task.pk}, {'status': 'in_progress'}, collaborator),
+        ('projects:project_tasks', 'get', {'project_id': project.pk}, None, admin),
+        ('projects:project_tasks', 'post', {'project_id': project.pk}, task_payload, admin),
+        ('projects:user_tasks', 'get', {}, None, collaborator),
+
+        # Miembros
+        ('projects:project_members', 'get', {'project_id': project.pk}, None, collaborator),
+        ('projects:add_project_member', 'post', {'project_id': project.pk}, {'user': outsider.pk}, admin),
+        ('projects:remove_project_member', 'delete', {
+            'project_id': project.pk, 'member_id': member.pk,
+        }, None, admin),
+        ('projects:remove_user_from_project', 'delete', {
+            'project_id': project.pk, 'user_id': member.user_id,
+        }, None, admin),
+
+        # Comentarios
+        ('projects:task_comments', 'get', {'task_id': task.pk}, None, collaborator),
+        ('projects:create_task_comment', 'post', {'task_id': task.pk}, {'content': 'Benchmark'}, collaborator),
+        ('projects:update_task_comment', 'patch', {'comment_id': comment.pk}, {'content': 'Editado'}, collaborator),
+        ('projects:delete_task_comment', 'delete', {'comment_id': comment.pk}, None, collaborator),
+
+        # Búsqueda
+        ('projects:search', 'get', {}, {'q': 'Tarea'}, collaborator),
+
+        # Exportación
+        ('projects:export_project', 'get', {'project_id': project.pk}, {'output': 'csv'}, collaborator),
+        ('projects:export', 'get', {}, {'output': 'ndjson'}, collaborator),
+
+        # Notificaciones
+        ('projects:notification_list', 'get', {}, None, collaborator),
+        ('projects:unread_notifications_count', 'get', {}, None, collaborator),
+        ('projects:mark_notification_as_read', 'post', {
+            'notification_id': notification.pk,
+        }, None, collaborator),
+        ('projects:mark_all_as_read', 'post', {}, None, collaborator),
+    ]
+
+
+def named_routes(*namespaces):
+    """Nombres `namespace:nombre` de todas las rutas de los namespaces indicados"""
+    from django.urls import get_resolver
+
+    names = set()
+    for resolver in get_resolver().url_patterns:
+        if getattr(resolver, 'namespace', None) in namespaces:
+            for pattern in resolver.url_patterns:
+                if pattern.name:
+                    names.add(f'{resolver.namespace}:{pattern.name}')
+    return names
+
+
+def run_scenario(client, route, method, url_kwargs, data, user, repeat=10):
+    """
+    Ejecuta un escenario `repeat` veces dentro de transacciones que se
+    revierten, y devuelve consultas, latencias y tamaño de la respuesta
+    """
+    from django.core.cache import cache
+    from django.db import transaction
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    url = reverse(route, kwargs=url_kwargs)
+    client.force_authenticate(user)
+    cache.clear()
+    query_counts = []
+    responses = []
+    # Ficheros adjuntos: se envían como multipart y se rebobinan en cada repetición
+    files = [value for value in (data or {}).values() if hasattr(value, 'seek')]
+
+    def call():
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                if method == 'get':
+                    response = client.get(url, data)
+                elif files:
+                    for upload in files:
+                        upload.seek(0)
+                    response = getattr(client, method)(url, data, format='multipart')
+                else:
+                    response = getattr(client, method)(url, data, format='json')
+                # Las respuestas transmitidas consultan al consumirse
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+            query_counts.append(len(queries))
+            responses.append((response.status_code, body))
+            transaction.set_rollback(True)
+
+    timings = measure(call, repeat=repeat)
+    status_code, body = responses[-1]
+    return {
+        'route': route,
+        'method': method.upper(),
+        'status': status_code,
+        # Primera ejecución con caché vacía (peor caso) y la última (caché caliente)
+        'queries': query_counts[0],
+        'queries_warm': query_counts[-1],
+        'payload_bytes': len(body),
+        **timings,
+    }
+
+
+def compare_query_counts(results, baseline, tolerance=0):
+    """
+    Compara con una ejecución previa y devuelve los escenarios cuyo número
+    de consultas creció más allá de `tolerance`
+    """
+    previous = {(row['route'], row['method']): row for row in baseline.get('endpoints', [])}
+    regressions = []
+    for row in results:
+        before = previous.get((row['route'], row['method']))
+        if before is not None and row['queries'] > before['queries'] + tolerance:
+            regressions.append({
+                'route': row['route'],
+                'method': row['method'],
+                'before': before['queries'],
+                'after': row['queries'],
+            })
+    return regressions
@@ -0,0 +1,128 @@
+"""
+Caché de lectura (read-through) con claves versionadas
+
+Cada entrada depende de uno o varios espacios de nombres ('projects',
+'project:<id>', 'dashboard:<user>'...). Invalidar un espacio de nombres
+incrementa su versión, de modo que todas las claves que lo incluían dejan de
+usarse sin tener que borrarlas una a una. Mientras una petición recalcula una
+entrada, las demás esperan su resultado en lugar de repetir la consulta.
+"""
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 2.0
+LOCK_POLL_INTERVAL = 0.02
+
+_MISSING = object()
+
+
+def _version_key(namespace):
+    return f'ns:{namespace}'
+
+
+def _new_version():
+    # Basada en el reloj: si la versión se pierde (desalojo, reinicio) la
+    # nueva no coincide con ninguna anterior y no revive entradas obsoletas
+    return time.time_ns()
+
+
+def namespace_versions(namespaces):
+    """Versión actual de cada espacio de nombres, con una sola lectura a la caché"""
+    keys = {namespace: _version_key(namespace) for namespace in namespaces}
+    found = cache.get_many(keys.values())
+    versions = {}
+    missing = {}
+    for namespace, key in keys.items():
+        if key in found:
+            versions[namespace] = found[key]
+        else:
+            missing[key] = versions[namespace] = _new_version()
+    if missing:
+        cache.set_many(missing, None)
+    return versions
+
+
+def _bump(namespaces):
+    cache.set_many({_version_key(namespace): _new_version() for namespace in namespaces}, None)
+
+
+def invalidate(*namespaces):
+    """
+    Invalida los espacios de nombres ahora y de nuevo tras el commit, por si
+    otra petición recalculó una entrada con datos aún sin confirmar
+    """
+    namespaces = {namespace for namespace in namespaces if namespace}
+    if namespaces:
+        _bump(namespaces)
+        transaction.on_commit(lambda: _bump(namespaces))
+
+
+def make_key(namespaces, parts):
+    """Clave que cambia cuando cambia la versión de cualquiera de sus espacios de nombres"""
+    versions = namespace_versions(namespaces)
+    fingerprint = repr((sorted(versions.items()), parts)).encode()
+    return f'rt:{namespaces[0]}:{hashlib.md5(fingerprint).hexdigest()}'
+
+
+def cached(namespaces, parts, compute, ttl=DEFAULT_TTL):
+    """
+    Devuelve el valor en caché para (namespaces, parts) o lo calcula con
+    `compute()`. Solo una petición a la vez calcula cada clave; el resto
+    espera hasta LOCK_WAIT segundos y, si no llega, lo calcula por su cuenta.
+    """
+    if isinstance(namespaces, str):
+        namespaces = [namespaces]
+    key = make_key(namespaces, parts)
+    value = cache.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            cache.set(key, value, ttl)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+    logger.warning("Espera agotada para %s; se recalcula sin el candado", key)
+    return compute()
+
+
+# Espacios de nombres de la aplicación
+
+PROJECT_LISTS_NAMESPACE = 'projects'
+
+
+def project_namespace(project_id):
+    return f'project:{project_id}'
+
+
+def invalidate_projects(project_ids, lists=True):
+    """
+    Invalida los datos de estos proyectos y, con `lists`, también las listas
+    de proyectos (visibilidad, contadores)
+    """
+    namespaces = {project_namespace(project_id) for project_id in project_ids if project_id is not None}
+    if namespaces:
+        invalidate(*namespaces, *([PROJECT_LISTS_NAMESPACE] if lists else []))
+
+
+def dashboard_namespace(user_id):
+    return f'dashboard:{user_id}'
@@ -0,0 +1,148 @@
+"""
+Peticiones condicionales (ETag / Last-Modified)
+
+Los validadores salen de una consulta pequeña (marcas de tiempo y contadores)
+que se ejecuta antes de cargar y serializar el recurso. Si el cliente ya
+tiene esa versión se responde 304 sin cuerpo.
+
+El ETag incluye al usuario (la representación lleva permisos por usuario) y
+es el validador fiable: cubre también los borrados, que no dejan marca de
+tiempo. Last-Modified es la marca de tiempo más reciente y solo se usa
+cuando el cliente no envía If-None-Match.
+
+Las representaciones anidan datos de usuarios (nombre y email del
+propietario, los miembros y los asignados) y el rol de cada miembro, así que
+sus updated_at forman parte de los validadores.
+"""
+import hashlib
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .models import ProjectMember, Task, TaskComment
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def _latest(*timestamps):
+    timestamps = [timestamp for timestamp in timestamps if timestamp is not None]
+    return max(timestamps) if timestamps else None
+
+
+def _project_subqueries(project_ref):
+    """
+    Miembros y última modificación de miembros (alta o rol), de sus usuarios y
+    de las tareas del proyecto `project_ref`
+    """
+    members = ProjectMember.objects.filter(project=OuterRef(project_ref)).order_by()
+    tasks = Task.objects.filter(project=OuterRef(project_ref)).order_by()
+    return {
+        'members_total': Coalesce(Subquery(
+            members.values('project').annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ), 0),
+        'members_latest': Subquery(members.order_by('-updated_at').values('updated_at')[:1]),
+        'member_users_latest': Subquery(members.order_by('-user__updated_at').values('user__updated_at')[:1]),
+        'tasks_latest': Subquery(tasks.order_by('-updated_at').values('updated_at')[:1]),
+    }
+
+
+def project_validators(queryset, pk, user):
+    """(etag, last_modified) de un proyecto, o None si no existe o no es visible"""
+    row = (
+        queryset.filter(pk=pk).order_by()
+        .annotate(**_project_subqueries('pk'))
+        .values(
+            'updated_at', 'owner_id', 'owner__updated_at', 'tasks_total', 'tasks_completed',
+            'members_total', 'members_latest', 'member_users_latest', 'tasks_latest',
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    etag = make_etag('project', pk, user.id, user.role, *row.values())
+    return etag, _latest(
+        row['updated_at'], row['owner__updated_at'], row['members_latest'],
+        row['member_users_latest'], row['tasks_latest'],
+    )
+
+
+def task_validators(queryset, pk, user):
+    """(etag, last_modified) de una tarea con su proyecto anidado, o None"""
+    row = (
+        queryset.filter(pk=pk).order_by()
+        .annotate(members_total=_project_subqueries('project_id')['members_total'])
+        .values(
+            'updated_at', 'status', 'due_date', 'assigned_to_id', 'assigned_to__updated_at',
+            'created_by__updated_at', 'project__updated_at', 'project__tasks_total',
+            'project__tasks_completed', 'members_total',
+        )
+        .first()
+    )
+    if row is None:
+        return None
+    # is_overdue depende de la hora
+    is_overdue = (
+        row['due_date'] is not None and row['status'] != 'completed' and timezone.now() > row['due_date']
+    )
+    etag = make_etag('task', pk, user.id, user.role, is_overdue, *row.values())
+    return etag, _latest(
+        row['updated_at'], row['assigned_to__updated_at'], row['created_by__updated_at'],
+        row['project__updated_at'],
+    )
+
+
+def comment_versions():
+    """
+    Anotaciones de Task con el número de comentarios y su última
+    modificación, para obtener los validadores en la misma consulta que la tarea
+    """
+    comments = TaskComment.objects.filter(task=OuterRef('pk')).order_by()
+    return {
+        'comments_total': Coalesce(Subquery(
+            comments.values('task').annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ), 0),
+        'comments_latest': Subquery(comments.order_by('-updated_at').values('updated_at')[:1]),
+    }
+
+
+def comments_validators(task, user):
+    """(etag, last_modified) de los comentarios de una tarea anotada con comment_versions()"""
+    etag = make_etag('comments', task.pk, user.id, user.role, task.comments_total, task.comments_latest)
+    return etag, task.comments_latest
+
+
+def not_modified(request, validators):
+    """
+    Respuesta 304 (o 412) si las precondiciones de la petición se cumplen
+    con estos validadores; None si hay que generar la respuesta completa
+    """
+    if validators is None:
+        return None
+    etag, last_modified = validators
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        set_validators(response, validators)
+    return response
+
+
+def set_validators(response, validators):
+    """Añade ETag, Last-Modified y obliga a revalidar (la respuesta es por usuario)"""
+    if validators is None or response.status_code not in (200, 304):
+        return response
+    etag, last_modified = validators
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,48 +1,180 @@
+import asyncio
 import json
+import logging
+from collections import deque
+
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
-from django.contrib.auth.models import AnonymousUser
-from rest_framework_simplejwt.tokens import AccessToken
-from accounts.models import User
+from django.conf import settings
+
+from .live import project_group
+
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_DEFAULTS = {
+    'BATCH_WINDOW': 0.05,
+    'MAX_BATCH': 100,
+    'MAX_PENDING': 1000,
+    'MAX_UNACKED': 8,
+    'ACK_TIMEOUT': 30.0,
+}
+
+# Código de cierre para clientes que no consumen a tiempo (rango privado 4000-4999)
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+
+def delivery_settings():
+    return {**DELIVERY_DEFAULTS, **getattr(settings, 'WEBSOCKET_DELIVERY', {})}
+
+
+class BufferedWebsocketConsumer(AsyncWebsocketConsumer):
+    """
+    Consumer con buffer de salida por conexión
+
+    Los eventos que llegan en una ventana de BATCH_WINDOW segundos se envían
+    en un solo frame (`batch_type`, hasta MAX_BATCH elementos); uno solo se
+    envía como antes (`item_type`). El envío corre en una tarea aparte, así
+    que un cliente lento no frena la lectura del channel layer.
+
+    Control de flujo: cada frame lleva un número `seq` y el cliente confirma
+    los que ha procesado con {"type": "ack", "seq": n}. Bajo ASGI send() no
+    espera a que el cliente lea (daphne encola los bytes en el transporte sin
+    límite), así que lo que frena el envío es la confirmación: con MAX_UNACKED
+    frames sin confirmar se deja de enviar y los eventos se acumulan en el
+    buffer. Como mucho se guardan MAX_PENDING eventos: los más antiguos se
+    descartan y el siguiente frame indica cuántos (`dropped`) para que el
+    cliente resincronice por la API. Si pasan ACK_TIMEOUT segundos con la
+    ventana llena sin confirmaciones, se cierra la conexión.
+
+    Los valores de estado (p. ej. un contador) no se acumulan: solo se envía
+    el último, como campo del siguiente frame.
+    """
+    item_type = 'item'
+    batch_type = 'items'
+
+    async def websocket_connect(self, message):
+        options = delivery_settings()
+        self.batch_window = options['BATCH_WINDOW']
+        self.max_batch = options['MAX_BATCH']
+        self.max_unacked = options['MAX_UNACKED']
+        self.ack_timeout = options['ACK_TIMEOUT']
+        self.pending = deque()
+        self.max_pending = options['MAX_PENDING']
+        self.dropped = 0
+        self.pending_state = {}
+        self.sent_seq = 0
+        self.acked_seq = 0
+        self.acked = asyncio.Event()
+        self.flush_task = None
+        await super().websocket_connect(message)
 
+    async def websocket_disconnect(self, message):
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        await super().websocket_disconnect(message)
+
+    async def websocket_receive(self, message):
+        text_data = message.get('text')
+        if text_data and '"ack"' in text_data:
+            try:
+                data = json.loads(text_data)
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and data.get('type') == 'ack':
+                self.acknowledge(data.get('seq'))
+                return
+        await super().websocket_receive(message)
+
+    def acknowledge(self, seq):
+        """Confirmación del cliente: abre la ventana hasta el frame `seq`"""
+        if isinstance(seq, int) and self.acked_seq < seq <= self.sent_seq:
+            self.acked_seq = seq
+            self.acked.set()
+
+    def buffer(self, item):
+        """Encola un elemento para el próximo frame"""
+        if len(self.pending) >= self.max_pending:
+            self.pending.popleft()
+            self.dropped += 1
+        self.pending.append(item)
+        self.schedule_flush()
+
+    def buffer_state(self, key, value):
+        """Guarda el último valor de `key` para el próximo frame"""
+        self.pending_state[key] = value
+        self.schedule_flush()
+
+    def schedule_flush(self):
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.ensure_future(self.flush_pending())
+
+    def build_frame(self, items, dropped, state):
+        if not items:
+            frame = {'type': next(iter(state))}
+        elif len(items) == 1 and not dropped:
+            frame = {'type': self.item_type, self.item_type: items[0]}
+        else:
+            frame = {'type': self.batch_type, self.batch_type: items}
+        if dropped:
+            frame['dropped'] = dropped
+        frame.update(state)
+        frame['seq'] = self.sent_seq
+        return frame
+
+    async def wait_for_window(self):
+        """Espera a que haya hueco en la ventana; False si el cliente no confirma a tiempo"""
+        while self.sent_seq - self.acked_seq >= self.max_unacked:
+            self.acked.clear()
+            try:
+                await asyncio.wait_for(self.acked.wait(), self.ack_timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def flush_pending(self):
+        await asyncio.sleep(self.batch_window)
+        while self.pending or self.pending_state:
+            if not await self.wait_for_window():
+                logger.warning("Cliente lento: se cierra %s", self.channel_name)
+                self.pending.clear()
+                self.pending_state = {}
+                await self.close(code=SLOW_CONSUMER_CLOSE_CODE)
+                return
+            items = [self.pending.popleft() for _ in range(min(self.max_batch, len(self.pending)))]
+            dropped, self.dropped = self.dropped, 0
+            state, self.pending_state = self.pending_state, {}
+            if dropped:
+                logger.warning("Cliente lento: %s eventos descartados en %s", dropped, self.channel_name)
+            self.sent_seq += 1
+            try:
+                await self.send(text_data=json.dumps(self.build_frame(items, dropped, state)))
+            except Exception:
+                logger.exception("Error enviando %s eventos por WebSocket", len(items))
+
+
+class NotificationConsumer(BufferedWebsocketConsumer):
+    item_type = 'notification'
+    batch_type = 'notifications'
 
-class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        print(f"🔌 WebSocket connection attempt")
-        
-        # Obtener el token de la query string
-        token = self.scope['query_string'].decode().split('token=')[1] if 'token=' in self.scope['query_string'].decode() else None
-        
-        print(f"🔑 Token received: {token[:20]}..." if token else "❌ No token provided")
-        
-        if not token:
-            print("❌ No token provided, closing connection")
+        # JWTAuthMiddleware ya verificó el token de la query string
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            logger.info("Conexión WebSocket rechazada: token ausente o inválido")
             await self.close()
             return
         
-        # Verificar el token y obtener el usuario
-        user = await self.get_user_from_token(token)
-        if not user or isinstance(user, AnonymousUser):
-            print(f"❌ Invalid token or user not found")
-            await self.close()
-            return
-        
-        print(f"✅ User authenticated: {user.id} ({user.username})")
-        
-        # Agregar el usuario al scope
-        self.scope['user'] = user
         self.user = user
         
         # Unirse al grupo de notificaciones del usuario
         self.group_name = f'notifications_{user.id}'
-        print(f"👥 Joining group: {self.group_name}")
-        
         await self.channel_layer.group_add(
             self.group_name,
             self.channel_name
         )
         
-        print(f"✅ WebSocket connection accepted for user {user.id}")
+        logger.debug("Conexión WebSocket aceptada para el usuario %s", user.id)
         await self.accept()
     
     async def disconnect(self, close_code):
@@ -62,33 +194,71 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.mark_notification_as_read(notification_id)
     
     async def notification_message(self, event):
-        print(f"📨 Sending notification to WebSocket: {event['notification']['title']}")
-        try:
-            # Enviar notificación al WebSocket
-            await self.send(text_data=json.dumps({
-                'type': 'notification',
-                'notification': event['notification']
-            }))
-            print(f"✅ Notification sent to WebSocket successfully")
-        except Exception as e:
-            print(f"❌ Error sending notification to WebSocket: {str(e)}")
+        self.buffer(event['notification'])
     
-    @database_sync_to_async
-    def get_user_from_token(self, token):
-        """Obtiene el usuario desde el token JWT"""
-        try:
-            access_token = AccessToken(token)
-            user_id = access_token['user_id']
-            return User.objects.get(id=user_id)
-        except:
-            return None
+    async def unread_count(self, event):
+        self.buffer_state('unread_count', event['count'])
     
     @database_sync_to_async
     def mark_notification_as_read(self, notification_id):
         """Marca una notificación como leída"""
         from .models import Notification
         try:
-            notification = Notification.objects.get(id=notification_id, user=self.user)
+            notification = Notification.objects.get(id=notification_id, user_id=self.user.id)
             notification.mark_as_read()
         except Notification.DoesNotExist:
             pass
+
+
+class ProjectConsumer(BufferedWebsocketConsumer):
+    """
+    Cambios de tareas y comentarios de un proyecto (ws/projects/<id>/).
+    Solo pueden suscribirse quienes ven el proyecto en la API (visible_to),
+    con el rol y la pertenencia que tengan en la base de datos.
+    """
+    item_type = 'delta'
+    batch_type = 'deltas'
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            logger.info("Suscripción a proyecto rechazada: token ausente o inválido")
+            await self.close()
+            return
+
+        self.user = user
+        self.project_id = int(self.scope['url_route']['kwargs']['project_id'])
+        if not await self.can_subscribe():
+            logger.info("Suscripción al proyecto %s rechazada para el usuario %s", self.project_id, user.id)
+            await self.close()
+            return
+
+        self.group_name = project_group(self.project_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def project_deltas(self, event):
+        for delta in event['deltas']:
+            self.buffer(delta)
+
+    async def project_member_removed(self, event):
+        if event['user_id'] == self.user.id and not await self.can_subscribe():
+            await self.close()
+
+    @database_sync_to_async
+    def can_subscribe(self):
+        """
+        Misma visibilidad que la API, consultada sin caché en cada comprobación.
+        El usuario se recarga: el de scope puede salir solo de los claims del
+        token (ClaimsUser), con un rol desfasado.
+        """
+        from accounts.models import User
+        from .models import Project
+        user = User.objects.filter(pk=self.user.id, is_active=True).first()
+        if user is None:
+            return False
+        return Project.objects.visible_to(user).filter(pk=self.project_id).exists()
@@ -0,0 +1,118 @@
+"""
+Dashboard de usuario
+
+El payload se calcula con consultas agregadas y se guarda por usuario en la
+caché (espacio de nombres `dashboard:<usuario>`); las señales de tareas,
+proyectos y membresías invalidan el de los usuarios afectados.
+"""
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Window
+from django.utils import timezone
+
+from .caching import cached, dashboard_namespace, invalidate
+from .models import Project, Task
+
+
+DASHBOARD_CACHE_TTL = 300
+RECENT_PROJECTS_LIMIT = 5
+PENDING_TASKS_LIMIT = 10
+
+
+def project_owner_cache_key(project_id):
+    return f'projects:owner:{project_id}'
+
+
+def project_owner_id(project_id):
+    """Propietario de un proyecto, en caché para no consultarlo en cada señal"""
+    return cache.get_or_set(
+        project_owner_cache_key(project_id),
+        lambda: Project.objects.filter(pk=project_id).values_list('owner_id', flat=True).first(),
+        DASHBOARD_CACHE_TTL,
+    )
+
+
+def invalidate_dashboards(user_ids):
+    """Descarta el dashboard en caché de estos usuarios"""
+    invalidate(*(dashboard_namespace(user_id) for user_id in user_ids if user_id is not None))
+
+
+def task_dashboard_users(tasks):
+    """Usuarios cuyo dashboard depende de estas tareas: asignados (actual y anterior) y propietarios"""
+    user_ids = set()
+    for task in tasks:
+        user_ids.add(task.assigned_to_id)
+        user_ids.add(getattr(task, '_loaded_assigned_to_id', None))
+        if Task.project.is_cached(task):
+            user_ids.add(task.project.owner_id)
+        else:
+            user_ids.add(project_owner_id(task.project_id))
+    return user_ids
+
+
+def build_dashboard(user):
+    """Estadísticas, proyectos recientes y tareas pendientes en tres consultas"""
+    stats = Task.objects.filter(assigned_to=user).aggregate(
+        assigned_tasks=Count('pk'),
+        completed_tasks=Count('pk', filter=Q(status='completed')),
+        pending_tasks=Count('pk', filter=~Q(status='completed')),
+    )
+
+    # El total de proyectos propios sale de la misma consulta (ventana sobre todas las filas)
+    recent_projects = list(
+        Project.objects.filter(owner=user)
+        .only('id', 'name', 'status', 'tasks_total', 'tasks_completed')
+        .annotate(owned_total=Window(Count('pk')))
+        .order_by('-created_at')[:RECENT_PROJECTS_LIMIT]
+    )
+
+    pending_tasks = (
+        Task.objects.filter(assigned_to=user)
+        .exclude(status__in=['completed', 'cancelled'])
+        .order_by('-created_at')
+        .values('id', 'title', 'status', 'due_date', project_name=F('project__name'))
+        [:PENDING_TASKS_LIMIT]
+    )
+
+    return {
+        'stats': {
+            'owned_projects': recent_projects[0].owned_total if recent_projects else 0,
+            **stats,
+        },
+        'recent_projects': [
+            {
+                'id': project.id,
+                'name': project.name,
+                'status': project.status,
+                'progress': project.progress_percentage
+            }
+            for project in recent_projects
+        ],
+        'pending_tasks': list(pending_tasks),
+    }
+
+
+def get_dashboard(user):
+    """
+    Devuelve el dashboard del usuario desde la caché (o lo calcula).
+    `is_overdue` depende de la hora, así que se evalúa en cada lectura.
+    """
+    snapshot = cached(
+        dashboard_namespace(user.id), (), lambda: build_dashboard(user), DASHBOARD_CACHE_TTL
+    )
+
+    now = timezone.now()
+    return {
+        'stats': snapshot['stats'],
+        'recent_projects': snapshot['recent_projects'],
+        'pending_tasks': [
+            {
+                'id': task['id'],
+                'title': task['title'],
+                'project_name': task['project_name'],
+                'status': task['status'],
+                'due_date': task['due_date'],
+                'is_overdue': task['due_date'] is not None and now > task['due_date'],
+            }
+            for task in snapshot['pending_tasks']
+        ],
+    }
@@ -0,0 +1,117 @@
+"""
+Exportación de tareas y proyectos en CSV o NDJSON
+
+Las filas salen de `.values_list()` con las claves foráneas resueltas en la
+misma consulta (los JOIN de select_related, sin instanciar modelos) y se
+recorren con iterator(chunk_size=...), así que la memoria no crece con el
+número de filas: como mucho un bloque de filas de la base de datos y un
+búfer de salida de STREAM_BUFFER_SIZE bytes (streaming.py). Bajo ASGI la
+respuesta recibe un iterador asíncrono para que el servidor no la materialice.
+"""
+import csv
+from datetime import date
+
+from .renderers import default_renderer
+from .streaming import buffered, streaming_response
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+# (columna exportada, campo de values_list)
+TASK_COLUMNS = [
+    ('id', 'id'),
+    ('project_id', 'project_id'),
+    ('project', 'project__name'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('status', 'status'),
+    ('priority', 'priority'),
+    ('due_date', 'due_date'),
+    ('completed_at', 'completed_at'),
+    ('assigned_to_id', 'assigned_to_id'),
+    ('assigned_to', 'assigned_to__username'),
+    ('created_by_id', 'created_by_id'),
+    ('created_by', 'created_by__username'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+PROJECT_COLUMNS = [
+    ('id', 'id'),
+    ('name', 'name'),
+    ('description', 'description'),
+    ('status', 'status'),
+    ('priority', 'priority'),
+    ('start_date', 'start_date'),
+    ('end_date', 'end_date'),
+    ('owner_id', 'owner_id'),
+    ('owner', 'owner__username'),
+    ('tasks_total', 'tasks_total'),
+    ('tasks_completed', 'tasks_completed'),
+    ('tasks_in_progress', 'tasks_in_progress'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+
+def export_rows(queryset, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Tuplas de valores en el orden de `columns`, por bloques de `chunk_size`"""
+    fields = [field for _, field in columns]
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """Destino de csv.writer que devuelve la línea en lugar de guardarla"""
+
+    def write(self, value):
+        return value
+
+
+# Una celda que empieza así es una fórmula para Excel, LibreOffice o Sheets
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+
+def _csv_value(value):
+    # datetime es subclase de date
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str) and value.lstrip("'").startswith(CSV_FORMULA_PREFIXES):
+        # Inyección de fórmulas: con el apóstrofo la hoja de cálculo lo muestra como
+        # texto. También si ya empieza por apóstrofos, para que la importación
+        # pueda quitar siempre exactamente uno
+        return "'" + value
+    return value
+
+
+def csv_lines(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([name for name, _ in columns]).encode()
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row]).encode()
+
+
+def ndjson_lines(rows, columns):
+    """Un objeto JSON por línea, con el mismo formato de fechas que la API"""
+    render = default_renderer().render
+    names = [name for name, _ in columns]
+    for row in rows:
+        yield render(dict(zip(names, row))) + b'\n'
+
+
+FORMATS = {
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+}
+
+
+def export_stream(queryset, columns, output):
+    """Bytes del fichero exportado, generados bajo demanda"""
+    lines, _ = FORMATS[output]
+    return buffered(lines(export_rows(queryset, columns), columns))
+
+
+def export_response(request, queryset, columns, output, filename):
+    _, content_type = FORMATS[output]
+    response = streaming_response(request, export_stream(queryset, columns, output), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
@@ -0,0 +1,273 @@
+"""
+Filtros y orden declarativos para los listados de tareas y proyectos
+
+Cada FilterSet declara los parámetros que acepta (`?status=`, `?ordering=`,
+...) y los planes de índice con los que puede resolverlos. Un plan nombra un
+índice de Meta.indexes y dice qué columnas lo acotan (`leading`, todas con
+igualdad), qué columna recorre en orden tras ellas (`range`: rangos de
+fechas y orden sin ordenar en memoria) y qué filtros y órdenes se aplican
+después sobre las filas ya acotadas.
+
+El ámbito de la vista cuenta como columnas acotadas: un usuario sin rol de
+administrador solo ve sus tareas (assigned_to) o los proyectos de los que es
+miembro, así que cualquier combinación le sirve. Una combinación sin plan
+(p. ej. todas las tareas con prioridad alta) se rechaza con InvalidFilter en
+lugar de recorrer la tabla entera.
+"""
+from datetime import datetime, time
+
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import OPEN_TASK_STATUSES, Project, Task
+
+
+class InvalidFilter(ValueError):
+    """Parámetro de filtro u orden no válido, o combinación sin índice"""
+
+
+# Conversión de valores
+
+def choices(values):
+    """Uno o varios valores separados por comas, todos de `values`"""
+    allowed = {value for value, _ in values}
+
+    def parse(raw):
+        selected = [value.strip() for value in raw.split(',') if value.strip()]
+        invalid = [value for value in selected if value not in allowed]
+        if not selected or invalid:
+            raise InvalidFilter(f"Valores no válidos: {', '.join(invalid) or raw!r}.")
+        return selected
+    return parse
+
+
+def integer(raw):
+    try:
+        return int(raw)
+    except ValueError:
+        raise InvalidFilter(f'{raw!r} no es un identificador válido.')
+
+
+def moment(raw):
+    """Fecha (`2024-05-01`, desde las 00:00) o fecha y hora ISO 8601"""
+    try:
+        value = parse_datetime(raw)
+        if value is None and (day := parse_date(raw)) is not None:
+            value = datetime.combine(day, time.min)
+    except ValueError:
+        value = None
+    if value is None:
+        raise InvalidFilter(f'{raw!r} no es una fecha válida.')
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def flag(raw):
+    """Solo `true`: los filtros booleanos no tienen forma negativa indexada"""
+    if raw.lower() not in ('true', '1'):
+        raise InvalidFilter(f'{raw!r} no es válido; usa true.')
+    return True
+
+
+# Declaraciones
+
+class Filter:
+    """
+    Parámetro de la query string que acota `column`: `build` convierte el
+    valor ya validado en lookups de filter()
+    """
+
+    def __init__(self, param, column, parse, build):
+        self.param = param
+        self.column = column
+        self.parse = parse
+        self.build = build
+
+    def lookups(self, raw):
+        return self.build(self.parse(raw))
+
+
+def field_filter(param, field, parse, lookup='exact', column=None):
+    def build(value):
+        if isinstance(value, list):
+            return {f'{field}__in': value} if len(value) > 1 else {field: value[0]}
+        return {f'{field}__{lookup}': value}
+    return Filter(param, column or field, parse, build)
+
+
+class Ordering:
+    """Valor de `?ordering=`: columna que ordena y expresiones de order_by()"""
+
+    def __init__(self, column, *expressions):
+        self.column = column
+        self.expressions = expressions
+
+
+class IndexPlan:
+    """Forma de consulta que un índice resuelve sin recorrer la tabla"""
+
+    def __init__(self, index, leading=(), range=None, filters=(), orderings=()):
+        self.index = index
+        self.leading = frozenset(leading)
+        self.range = range
+        self.filters = frozenset(filters)
+        self.orderings = frozenset(orderings)
+
+    def covers(self, columns, ordering_column):
+        if not self.leading <= columns:
+            return False
+        if not columns - self.leading <= self.filters | {self.range}:
+            return False
+        return ordering_column in {None, self.range} | self.orderings
+
+
+class FilterSet:
+    ordering_param = 'ordering'
+
+    def __init__(self, filters, orderings, plans, hint):
+        self.filters = filters
+        self.orderings = orderings
+        self.plans = plans
+        self.hint = hint
+
+    def plan(self, columns, ordering_column=None):
+        """Primer plan que cubre las columnas acotadas y el orden, o None"""
+        for plan in self.plans:
+            if plan.covers(frozenset(columns), ordering_column):
+                return plan
+        return None
+
+    def apply(self, queryset, params, bound=(), defaults=()):
+        """
+        Filtra y ordena `queryset` según `params` (query_params). `bound` son
+        las columnas que ya acota el ámbito de la vista. Sin `?ordering=` se
+        usa el primer orden de `defaults` que resuelva un plan.
+        """
+        columns = set(bound)
+        lookups = []
+        for item in self.filters:
+            raw = params.get(item.param)
+            if raw is None:
+                continue
+            columns.add(item.column)
+            lookups.append(item.lookups(raw))
+
+        ordering = None
+        raw_ordering = params.get(self.ordering_param)
+        if raw_ordering is not None:
+            ordering = self.orderings.get(raw_ordering)
+            if ordering is None:
+                raise InvalidFilter(
+                    f"Orden no válido: {raw_ordering!r}. Opciones: {', '.join(sorted(self.orderings))}."
+                )
+        else:
+            ordering = next(
+                (self.orderings[name] for name in defaults if self.plan(columns, self.orderings[name].column)),
+                None,
+            )
+
+        if self.plan(columns, ordering and ordering.column) is None:
+            described = ', '.join(sorted(columns - set(bound))) or 'sin filtros'
+            sort = f' ordenado por {ordering.column}' if ordering else ''
+            raise InvalidFilter(f'Combinación no soportada ({described}{sort}): {self.hint}.')
+
+        for item_lookups in lookups:
+            queryset = queryset.filter(**item_lookups)
+        if ordering is not None:
+            queryset = queryset.order_by(*ordering.expressions)
+        return queryset
+
+
+def priority_rank(priorities):
+    """Prioridad como número (de menor a mayor) para ordenar por ella"""
+    return Case(
+        *(When(priority=value, then=Value(rank)) for rank, (value, _) in enumerate(priorities)),
+        output_field=IntegerField(),
+    )
+
+
+def overdue_lookups(value):
+    # Las mismas condiciones que task_open_due_date_idx, para que el índice parcial sirva
+    return {'status__in': OPEN_TASK_STATUSES, 'due_date__isnull': False, 'due_date__lt': timezone.now()}
+
+
+def orderings(definitions):
+    """Cada orden en ascendente y descendente (`-campo`), con id para desempatar"""
+    result = {}
+    for name, (column, expression) in definitions.items():
+        result[name] = Ordering(column, expression.asc(), 'id')
+        result[f'-{name}'] = Ordering(column, expression.desc(), '-id')
+    return result
+
+
+TASK_FILTERS = FilterSet(
+    filters=[
+        field_filter('status', 'status', choices(Task.STATUS_CHOICES)),
+        field_filter('priority', 'priority', choices(Task.PRIORITY_CHOICES)),
+        field_filter('assignee', 'assigned_to_id', integer, column='assigned_to'),
+        field_filter('created_by', 'created_by_id', integer, column='created_by'),
+        field_filter('project', 'project_id', integer, column='project'),
+        field_filter('due_after', 'due_date', moment, lookup='gte'),
+        field_filter('due_before', 'due_date', moment, lookup='lt'),
+        Filter('overdue', 'overdue', flag, overdue_lookups),
+    ],
+    orderings=orderings({
+        'due_date': ('due_date', F('due_date')),
+        'created_at': ('created_at', F('created_at')),
+        'priority': ('priority', priority_rank(Task.PRIORITY_CHOICES)),
+    }),
+    plans=[
+        # Las tareas de un usuario: pocas filas, cualquier filtro y orden
+        IndexPlan(
+            'task_assignee_status_due_idx', leading=['assigned_to'], range='due_date',
+            filters=['status', 'priority', 'project', 'created_by', 'overdue'],
+            orderings=['created_at', 'priority'],
+        ),
+        IndexPlan(
+            'task_project_due_idx', leading=['project'], range='due_date',
+            filters=['status', 'priority', 'created_by', 'overdue'], orderings=['created_at', 'priority'],
+        ),
+        IndexPlan(
+            'task_project_created_idx', leading=['project'], range='created_at',
+            filters=['status', 'priority', 'created_by'], orderings=['priority'],
+        ),
+        IndexPlan(
+            'task_creator_created_idx', leading=['created_by'], range='created_at',
+            filters=['status', 'priority'], orderings=['due_date', 'priority'],
+        ),
+        IndexPlan('task_open_due_date_idx', leading=['overdue'], range='due_date', filters=['status', 'priority']),
+        IndexPlan('task_status_due_idx', leading=['status'], range='due_date'),
+        IndexPlan('task_created_idx', range='created_at'),
+    ],
+    hint='filtra también por proyecto, asignado (assignee), creador (created_by), estado u overdue=true',
+)
+
+
+PROJECT_FILTERS = FilterSet(
+    filters=[
+        field_filter('status', 'status', choices(Project.STATUS_CHOICES)),
+        field_filter('priority', 'priority', choices(Project.PRIORITY_CHOICES)),
+        field_filter('owner', 'owner_id', integer, column='owner'),
+    ],
+    orderings=orderings({
+        'created_at': ('created_at', F('created_at')),
+        'end_date': ('end_date', F('end_date')),
+        'priority': ('priority', priority_rank(Project.PRIORITY_CHOICES)),
+    }),
+    plans=[
+        # Los proyectos de los que el usuario es miembro (o propietario)
+        IndexPlan(
+            'member_user_project_idx', leading=['membership'],
+            filters=['status', 'priority', 'owner'], orderings=['created_at', 'end_date', 'priority'],
+        ),
+        IndexPlan(
+            'project_owner_created_idx', leading=['owner'], range='created_at',
+            filters=['status', 'priority'], orderings=['end_date', 'priority'],
+        ),
+        IndexPlan('project_status_created_idx', leading=['status'], range='created_at', filters=['priority']),
+        IndexPlan('project_created_idx', range='created_at'),
+    ],
+    hint='filtra también por propietario (owner) o estado',
+)
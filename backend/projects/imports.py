@@ -0,0 +1,288 @@
+"""
+Creación e importación masiva de tareas
+
+validate_task_items/create_tasks son el núcleo de la creación en bloque
+(también de la acción `create` de /tasks/bulk/): proyectos y usuarios se
+validan con una consulta cada uno para todo el lote y las tareas se insertan
+con un solo bulk_create.
+
+TaskImport lee un fichero CSV, NDJSON o JSON (el formato de la exportación:
+project_id, assigned_to_id o assigned_to, que es siempre un nombre de
+usuario, title...) fila a fila y lo procesa por lotes. Las filas con errores
+se informan y se saltan sin abortar el resto, y cada usuario asignado recibe
+al final una sola notificación con el total de tareas importadas para él.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from accounts.models import User
+from .dashboard import invalidate_dashboards, task_dashboard_users
+from .exports import CSV_FORMULA_PREFIXES
+from .live import publish_tasks
+from .models import Project, Task
+from .search import add_documents, task_document
+from .serializers import TaskBulkCreateItemSerializer
+
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_REPORTED_ERRORS = 100
+IMPORT_FORMATS = ['csv', 'ndjson', 'json']
+IMPORT_EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'json'}
+
+
+class InvalidImport(ValueError):
+    """El fichero no se puede leer en el formato indicado"""
+
+
+# Creación en bloque
+
+def validate_task_items(user, items):
+    """
+    Comprueba proyectos, usuarios asignados y permisos de un lote ya validado
+    por TaskBulkCreateItemSerializer. Devuelve (proyectos, usuarios, errores
+    por índice del lote).
+    """
+    projects = Project.objects.in_bulk({item['project'] for item in items})
+    assignee_ids = {item['assigned_to'] for item in items if 'assigned_to' in item}
+    assignees = User.objects.in_bulk(assignee_ids)
+
+    errors = {}
+    for index, item in enumerate(items):
+        project = projects.get(item['project'])
+        if project is None:
+            errors[index] = 'Proyecto no encontrado.'
+        elif not project.can_user_edit(user):
+            errors[index] = 'No tienes permisos para crear tareas en este proyecto.'
+        elif 'assigned_to' in item and item['assigned_to'] not in assignees:
+            errors[index] = 'No existe un usuario con este ID.'
+        elif item.get('assigned_to', user.id) != user.id and not user.is_admin():
+            # Solo administradores pueden asignar usuarios
+            errors[index] = 'Solo los administradores pueden asignar tareas a otros usuarios.'
+    return projects, assignees, errors
+
+
+def create_tasks(user, items, projects, assignees):
+    """Inserta las tareas de un lote validado y propaga la escritura (sin notificar)"""
+    now = timezone.now()
+    tasks = []
+    for item in items:
+        task = Task(
+            title=item['title'],
+            description=item['description'],
+            status=item['status'],
+            priority=item['priority'],
+            due_date=item['due_date'],
+            project=projects[item['project']],
+            assigned_to=assignees.get(item.get('assigned_to'), user),
+            created_by=user,
+        )
+        task.sync_completed_at(now)
+        tasks.append(task)
+
+    created = Task.objects.bulk_create(tasks)
+    invalidate_dashboards(task_dashboard_users(created))
+    publish_tasks(created, 'created')
+    add_documents(task_document(task) for task in created)
+    return created
+
+
+# Lectura de ficheros
+
+def _csv_unescaped(value):
+    """Deshace el apóstrofo que la exportación CSV antepone a las fórmulas"""
+    if isinstance(value, str) and value.startswith("'") and value.lstrip("'").startswith(CSV_FORMULA_PREFIXES):
+        return value[1:]
+    return value
+
+
+def read_rows(stream, input_format):
+    """
+    Filas (número, dict) de un fichero binario. CSV y NDJSON se leen línea a
+    línea; JSON (una lista de objetos) se carga entero. Una línea de NDJSON
+    ilegible se devuelve como (número, mensaje de error).
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        if input_format == 'csv':
+            reader = csv.DictReader(text)
+            if not reader.fieldnames:
+                raise InvalidImport('El CSV no tiene cabecera.')
+            for number, row in enumerate(reader, start=1):
+                yield number, {key: _csv_unescaped(value) for key, value in row.items()}
+        elif input_format == 'ndjson':
+            number = 0
+            for line in text:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    yield number, 'JSON no válido.'
+        else:
+            try:
+                rows = json.load(text)
+            except ValueError:
+                raise InvalidImport('El fichero no es JSON válido.')
+            if not isinstance(rows, list):
+                raise InvalidImport('El JSON debe ser una lista de tareas.')
+            yield from enumerate(rows, start=1)
+    except UnicodeDecodeError:
+        raise InvalidImport('El fichero debe estar en UTF-8.')
+    except csv.Error as exc:
+        raise InvalidImport(f'CSV no válido: {exc}.')
+    finally:
+        text.detach()
+
+
+def input_format_for(filename, requested=None):
+    """Formato pedido explícitamente o deducido de la extensión del fichero"""
+    if requested:
+        if requested not in IMPORT_FORMATS:
+            raise InvalidImport(f"Formato no válido. Opciones: {', '.join(IMPORT_FORMATS)}.")
+        return requested
+    for extension, input_format in IMPORT_EXTENSIONS.items():
+        if filename.lower().endswith(extension):
+            return input_format
+    raise InvalidImport('No se puede deducir el formato: usa la extensión .csv, .ndjson o .json.')
+
+
+def _cleaned(row, default_project):
+    """Fila del fichero con los nombres de TaskBulkCreateItemSerializer; sin las celdas vacías"""
+    data = {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in row.items()
+        if key and value not in ('', None)
+    }
+    item = {key: data[key] for key in ('title', 'description', 'status', 'priority', 'due_date') if key in data}
+    project = data.get('project_id', data.get('project', default_project))
+    if project is not None:
+        item['project'] = project
+    # Como en la exportación: assigned_to_id es el id y assigned_to el nombre de usuario
+    if 'assigned_to_id' in data:
+        item['assigned_to'] = data['assigned_to_id']
+    elif 'assigned_to' in data:
+        item['assigned_to_username'] = str(data['assigned_to'])
+    return item
+
+
+class TaskImport:
+    """
+    Importa tareas por lotes de `batch_size` filas. Cada lote cuesta un
+    número fijo de consultas (usuarios por nombre, proyectos, usuarios por
+    id y el bulk_create) y se confirma por separado; con `dry_run` solo se
+    valida.
+    """
+
+    def __init__(self, user, default_project=None, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+        self.user = user
+        self.default_project = default_project
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.imported_by_assignee = {}
+        self.serializer = TaskBulkCreateItemSerializer()
+
+    def run(self, rows):
+        rows = iter(rows)
+        try:
+            while batch := list(islice(rows, self.batch_size)):
+                self.import_batch(batch)
+        finally:
+            # También si el fichero se corta a medias: los lotes anteriores ya se confirmaron
+            if not self.dry_run:
+                self.notify_assignees()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'created': self.created,
+            'failed': self.failed,
+            'errors': self.errors,
+            'dry_run': self.dry_run,
+        }
+
+    def add_errors(self, errors):
+        """Errores de un lote, (fila, errores), en el orden de las filas"""
+        for number, row_errors in sorted(errors, key=lambda error: error[0]):
+            self.failed += 1
+            if len(self.errors) < IMPORT_MAX_REPORTED_ERRORS:
+                self.errors.append({'row': number, 'errors': row_errors})
+
+    def import_batch(self, batch):
+        errors = []
+        self.validate_and_create(batch, errors)
+        self.add_errors(errors)
+
+    def validate_and_create(self, batch, errors):
+        cleaned = []
+        for number, row in batch:
+            if not isinstance(row, dict):
+                errors.append((number, {
+                    'non_field_errors': [row if isinstance(row, str) else 'Se esperaba un objeto.'],
+                }))
+            else:
+                cleaned.append((number, _cleaned(row, self.default_project)))
+
+        # Usuarios asignados por nombre de usuario: una consulta para todo el lote
+        usernames = {item['assigned_to_username'] for _, item in cleaned if 'assigned_to_username' in item}
+        user_ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+
+        valid = []
+        for number, item in cleaned:
+            username = item.pop('assigned_to_username', None)
+            if username is not None:
+                if username not in user_ids:
+                    errors.append((number, {'assigned_to': [f'No existe el usuario "{username}".']}))
+                    continue
+                item['assigned_to'] = user_ids[username]
+            try:
+                valid.append((number, self.serializer.run_validation(item)))
+            except ValidationError as exc:
+                errors.append((number, exc.detail))
+        if not valid:
+            return
+
+        items = [item for _, item in valid]
+        projects, assignees, item_errors = validate_task_items(self.user, items)
+        for index, message in item_errors.items():
+            errors.append((valid[index][0], {'non_field_errors': [message]}))
+        items = [item for index, item in enumerate(items) if index not in item_errors]
+        if self.dry_run:
+            # En una simulación `created` cuenta las filas que se crearían
+            self.created += len(items)
+            return
+        if not items:
+            return
+
+        with transaction.atomic():
+            created = create_tasks(self.user, items, projects, assignees)
+        self.created += len(created)
+        for task in created:
+            entry = self.imported_by_assignee.setdefault(task.assigned_to_id, [task.assigned_to, 0, set()])
+            entry[1] += 1
+            entry[2].add(task.project)
+
+    def notify_assignees(self):
+        """Una notificación por usuario asignado con el total importado para él"""
+        from .notification_views import send_notification
+
+        for assignee, count, projects in self.imported_by_assignee.values():
+            send_notification(
+                user=assignee,
+                notification_type='task_assigned',
+                title='Tareas importadas',
+                message=(
+                    'Se te ha asignado 1 tarea importada' if count == 1
+                    else f'Se te han asignado {count} tareas importadas'
+                ),
+                project=next(iter(projects)) if len(projects) == 1 else None,
+            )
@@ -0,0 +1,181 @@
+"""
+Actualizaciones en vivo por proyecto
+
+Las escrituras de tareas y comentarios publican deltas compactos tras el
+commit. Igual que las notificaciones, un backend (settings.LIVE_UPDATES) los
+agrupa fuera de la petición y envía un solo mensaje por proyecto y lote al
+grupo `project_<id>`, al que se suscribe ProjectConsumer (ws/projects/<id>/).
+Con Redis el channel layer reparte los grupos entre los hosts configurados.
+
+Los deltas de tareas de cada lote van también al grupo REMINDERS_GROUP, del
+que el programador de recordatorios (reminders.py) actualiza sus plazos.
+"""
+import logging
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Task, TaskComment
+from .notifications import InlineNotificationBackend, ThreadedNotificationBackend, _group_send_all
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'projects.live.ThreadedBroadcastBackend'
+TASK_PROJECT_CACHE_TTL = 300
+REMINDERS_GROUP = 'task_reminders'
+
+
+def project_group(project_id):
+    return f'project_{project_id}'
+
+
+def task_project_cache_key(task_id):
+    return f'projects:task-project:{task_id}'
+
+
+def remember_task_project(task):
+    cache.set(task_project_cache_key(task.pk), task.project_id, TASK_PROJECT_CACHE_TTL)
+
+
+def task_project_id(comment):
+    """Proyecto de la tarea de un comentario sin consultar si ya se conoce"""
+    if TaskComment.task.is_cached(comment):
+        return comment.task.project_id
+    return cache.get_or_set(
+        task_project_cache_key(comment.task_id),
+        lambda: Task.objects.filter(pk=comment.task_id).values_list('project_id', flat=True).first(),
+        TASK_PROJECT_CACHE_TTL,
+    )
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+def deleted_task_delta(task_id):
+    return {'kind': 'task', 'action': 'deleted', 'id': task_id}
+
+
+def task_delta(task, action):
+    """Cambio de una tarea: solo los campos que se muestran en el tablero"""
+    if action == 'deleted':
+        return deleted_task_delta(task.pk)
+    return {
+        'kind': 'task',
+        'action': action,
+        'id': task.pk,
+        'title': task.title,
+        'status': task.status,
+        'priority': task.priority,
+        'due_date': _isoformat(task.due_date),
+        'assigned_to': task.assigned_to_id,
+        'updated_at': _isoformat(task.updated_at),
+    }
+
+
+def deleted_comment_delta(comment_id, task_id):
+    return {'kind': 'comment', 'action': 'deleted', 'id': comment_id, 'task': task_id}
+
+
+def comment_delta(comment, action):
+    delta = {'kind': 'comment', 'action': action, 'id': comment.pk, 'task': comment.task_id}
+    if action != 'deleted':
+        delta.update({
+            'author': comment.author_id,
+            'content': comment.content,
+            'updated_at': _isoformat(comment.updated_at),
+        })
+    return delta
+
+
+def publish(project_id, delta):
+    """Encola un delta para el grupo del proyecto cuando la transacción haga commit"""
+    if project_id is None:
+        return
+    event = (project_id, delta)
+    transaction.on_commit(lambda: get_backend().enqueue(event))
+
+
+def publish_tasks(tasks, action):
+    for task in tasks:
+        publish(task.project_id, task_delta(task, action))
+
+
+def broadcast(events):
+    """
+    Envía un lote de (proyecto, delta): un mensaje por proyecto y otro con
+    los deltas de tareas para el programador de recordatorios
+    """
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    deltas = defaultdict(list)
+    for project_id, delta in events:
+        deltas[project_id].append(delta)
+    messages = [
+        (project_group(project_id), {'type': 'project_deltas', 'deltas': project_deltas})
+        for project_id, project_deltas in deltas.items()
+    ]
+    task_deltas = [delta for _, delta in events if delta['kind'] == 'task']
+    if task_deltas:
+        messages.append((REMINDERS_GROUP, {'type': 'task_deltas', 'deltas': task_deltas}))
+    try:
+        async_to_sync(_group_send_all)(channel_layer, messages)
+    except Exception:
+        logger.exception("Falló el envío de %s deltas a %s proyectos", len(events), len(messages))
+
+
+def notify_member_removed(project_id, user_id):
+    """Pide a las conexiones del proyecto que revisen si siguen teniendo acceso"""
+    message = {'type': 'project_member_removed', 'user_id': user_id}
+    transaction.on_commit(lambda: _send_to_project(project_id, message))
+
+
+def _send_to_project(project_id, message):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(project_group(project_id), message)
+    except Exception:
+        logger.exception("Falló el envío a %s", project_group(project_id))
+
+
+class InlineBroadcastBackend(InlineNotificationBackend):
+    """Envía cada delta en el mismo hilo; pensado para tests y desarrollo"""
+    deliver = staticmethod(broadcast)
+
+
+class ThreadedBroadcastBackend(ThreadedNotificationBackend):
+    """Agrupa los deltas en un hilo de fondo, como ThreadedNotificationBackend"""
+    deliver = staticmethod(broadcast)
+    thread_name = 'live-updates-broadcaster'
+
+
+_backend = None
+
+
+def get_backend():
+    """Devuelve (y cachea) el backend configurado en settings.LIVE_UPDATES"""
+    global _backend
+    if _backend is None:
+        config = dict(getattr(settings, 'LIVE_UPDATES', {}))
+        backend_class = import_string(config.pop('BACKEND', DEFAULT_BACKEND))
+        _backend = backend_class(**{key.lower(): value for key, value in config.get('OPTIONS', {}).items()})
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'LIVE_UPDATES':
+        _backend = None
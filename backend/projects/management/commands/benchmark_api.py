@@ -0,0 +1,96 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+
+from projects.benchmarking import (
+    api_scenarios, benchmark_actors, compare_query_counts, named_routes,
+    run_scenario, scratch_database, seed_dataset,
+)
+
+
+class Command(BaseCommand):
+    """
+    Genera un conjunto de datos en una base de datos desechable y ejecuta
+    cada ruta de `accounts` y `projects`, registrando consultas, latencias
+    p50/p95 y tamaño de la respuesta. Con --baseline falla si alguna ruta
+    ejecuta más consultas que en la ejecución de referencia.
+    
+    El motor es el de DATABASES['default']; para PostgreSQL basta con
+    ejecutarlo con --settings=project_management.settings_production.
+    """
+    help = 'Benchmark de consultas y latencia de todos los endpoints de la API'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--projects', type=int, default=100)
+        parser.add_argument('--members-per-project', type=int, default=8)
+        parser.add_argument('--tasks-per-project', type=int, default=100)
+        parser.add_argument('--comments-per-task', type=int, default=2)
+        parser.add_argument('--notifications-per-user', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=10, help='Repeticiones por endpoint')
+        parser.add_argument('--route', action='append', dest='routes', help='Limita a esta ruta (puede repetirse)')
+        parser.add_argument('--output', help='Guarda los resultados en este archivo JSON')
+        parser.add_argument('--baseline', help='Resultados JSON previos con los que comparar')
+        parser.add_argument(
+            '--tolerance', type=int, default=0,
+            help='Consultas adicionales permitidas respecto al baseline',
+        )
+    
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+        
+        with scratch_database():
+            self.stdout.write('Generando datos...')
+            rows = seed_dataset(
+                users=options['users'],
+                projects=options['projects'],
+                members_per_project=options['members_per_project'],
+                tasks_per_project=options['tasks_per_project'],
+                comments_per_task=options['comments_per_task'],
+                notifications_per_user=options['notifications_per_user'],
+            )
+            self.stdout.write(f'Filas generadas: {rows}')
+            
+            scenarios = api_scenarios(benchmark_actors())
+            missing = named_routes('accounts', 'projects') - {scenario[0] for scenario in scenarios}
+            if missing:
+                self.stdout.write(self.style.WARNING(
+                    f"Rutas sin escenario de benchmark: {', '.join(sorted(missing))}"
+                ))
+            if options['routes']:
+                scenarios = [scenario for scenario in scenarios if scenario[0] in options['routes']]
+            
+            client = APIClient()
+            endpoints = []
+            for scenario in scenarios:
+                result = run_scenario(client, *scenario, repeat=options['repeat'])
+                endpoints.append(result)
+                style = self.style.ERROR if result['status'] >= 500 else (lambda text: text)
+                self.stdout.write(style(
+                    f"{result['method']:6} {result['route']:45} {result['status']}  "
+                    f"{result['queries']:3} consultas ({result['queries_warm']} en caliente)  "
+                    f"p50 {result['p50_ms']:8.2f} ms  p95 {result['p95_ms']:8.2f} ms  "
+                    f"{result['payload_bytes']} bytes"
+                ))
+        
+        results = {'vendor': connection.vendor, 'rows': rows, 'endpoints': endpoints}
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+        
+        if baseline is not None:
+            regressions = compare_query_counts(endpoints, baseline, options['tolerance'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(
+                    f"{regression['method']} {regression['route']}: "
+                    f"{regression['before']} -> {regression['after']} consultas"
+                ))
+            if regressions:
+                raise CommandError(f'{len(regressions)} endpoint(s) ejecutan más consultas que el baseline.')
+            self.stdout.write(self.style.SUCCESS('Sin regresiones en el número de consultas.'))
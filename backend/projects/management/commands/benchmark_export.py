@@ -0,0 +1,66 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from projects.benchmarking import reset_peak_rss, rss_mb, scratch_database, seed_dataset
+from projects.exports import FORMATS, TASK_COLUMNS, export_stream
+from projects.models import Task
+
+
+class Command(BaseCommand):
+    """
+    Mide la exportación en streaming: filas por segundo y pico de memoria
+    residente al exportar una décima parte de las tareas y todas. El
+    crecimiento es el pico durante la exportación menos la memoria residente
+    al empezarla; si no depende del número de filas, ambos son parecidos.
+    """
+    help = 'Benchmark de la exportación CSV/NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=100000, help='Tareas en la base de datos')
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        results = {'tasks': options['tasks'], 'exports': []}
+        with scratch_database():
+            projects = max(10, options['tasks'] // 5000)
+            seed_dataset(
+                users=200, projects=projects, members_per_project=10,
+                tasks_per_project=-(-options['tasks'] // projects),
+                comments_per_task=0, notifications_per_user=0, description_words=12,
+            )
+            total = Task.objects.count()
+            for output in FORMATS:
+                for rows in (total // 10, total):
+                    queryset = Task.objects.order_by('id')[:rows]
+                    results['peak_rss_reset'] = reset_peak_rss()
+                    before = rss_mb(peak=False)
+                    start = time.perf_counter()
+                    size = sum(len(chunk) for chunk in export_stream(queryset, TASK_COLUMNS, output))
+                    elapsed = time.perf_counter() - start
+                    results['exports'].append({
+                        'output': output,
+                        'rows': rows,
+                        'bytes': size,
+                        'seconds': round(elapsed, 2),
+                        'rows_per_s': round(rows / elapsed),
+                        'rss_before_mb': before,
+                        'peak_rss_mb': rss_mb(),
+                        'rss_growth_mb': round(rss_mb() - before, 1),
+                    })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        if not results['peak_rss_reset']:
+            self.stdout.write(self.style.WARNING(
+                'No se pudo reiniciar el pico de memoria: incluye la carga de datos'
+            ))
+        for row in results['exports']:
+            self.stdout.write(
+                f"{row['output']:7} {row['rows']:>9} filas  {row['bytes'] / 2**20:8.1f} MB  "
+                f"{row['seconds']:7.2f} s  {row['rows_per_s']:>8} filas/s  "
+                f"pico RSS {row['peak_rss_mb']} MB (+{row['rss_growth_mb']} MB)"
+            )
@@ -0,0 +1,148 @@
+import json
+from collections import defaultdict
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations import AddIndex
+from django.db.models import Count
+from django.utils import timezone
+
+from projects.benchmarking import analyze_database, measure, scratch_database, seed_dataset
+from projects.models import (
+    OPEN_TASK_STATUSES, Notification, Project, ProjectMember, Task, TaskComment,
+)
+
+
+# Última migración de projects anterior a los índices de acceso: la pasada
+# "sin índices" quita todos los que añaden las migraciones posteriores
+# (0009_access_path_indexes y 0011_filter_indexes)
+BASELINE_MIGRATION = '0007_alter_notification_is_read_and_more'
+
+
+def access_path_indexes():
+    """{modelo: [nombres de índice]} de los AddIndex posteriores a BASELINE_MIGRATION"""
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    indexes = defaultdict(list)
+    for (app_label, name), migration in sorted(loader.disk_migrations.items()):
+        if app_label != 'projects' or name <= BASELINE_MIGRATION:
+            continue
+        for operation in migration.operations:
+            if isinstance(operation, AddIndex):
+                indexes[apps.get_model(app_label, operation.model_name)].append(operation.index.name)
+    return dict(indexes)
+
+
+def access_paths():
+    """Consultas calientes de la API, cada una con su QuerySet representativo"""
+    user = (
+        Notification.objects.values('user').order_by().annotate(total=Count('pk'))
+        .order_by('-total').values_list('user', flat=True).first()
+    )
+    project = Project.objects.order_by('-tasks_total').values_list('pk', flat=True).first()
+    task = TaskComment.objects.values_list('task', flat=True).first()
+    now = timezone.now()
+    return {
+        'notificaciones no leídas del usuario': Notification.objects.filter(
+            user=user, is_read=False
+        ).order_by('-created_at')[:20],
+        'notificaciones del usuario': Notification.objects.filter(
+            user=user
+        ).order_by('-created_at')[:20],
+        'tareas del usuario por estado y vencimiento': Task.objects.filter(
+            assigned_to=user, status='pending'
+        ).order_by('due_date')[:50],
+        'tareas del proyecto por estado': Task.objects.filter(
+            project=project, status='completed'
+        ).values('pk'),
+        'tareas abiertas vencidas': Task.objects.filter(
+            status__in=OPEN_TASK_STATUSES, due_date__isnull=False, due_date__lt=now
+        ).order_by('due_date')[:100],
+        'proyectos del usuario': ProjectMember.objects.filter(user=user).values('project'),
+        'comentarios de la tarea': TaskComment.objects.filter(task=task).order_by('-created_at')[:20],
+    }
+
+
+class Command(BaseCommand):
+    """
+    Carga un conjunto de datos grande en una base de datos desechable y
+    compara planes EXPLAIN y tiempos de las consultas calientes sin y con los
+    índices de acceso
+    """
+    help = 'Compara planes y tiempos de las consultas principales antes y después de los índices'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--projects', type=int, default=200)
+        parser.add_argument('--members-per-project', type=int, default=8)
+        parser.add_argument('--tasks-per-project', type=int, default=250)
+        parser.add_argument('--comments-per-task', type=int, default=1)
+        parser.add_argument('--notifications-per-user', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por consulta')
+        parser.add_argument('--json', dest='json_path', help='Guarda los resultados en este archivo JSON')
+    
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.stdout.write('Generando datos...')
+            rows = seed_dataset(
+                users=options['users'],
+                projects=options['projects'],
+                members_per_project=options['members_per_project'],
+                tasks_per_project=options['tasks_per_project'],
+                comments_per_task=options['comments_per_task'],
+                notifications_per_user=options['notifications_per_user'],
+            )
+            self.stdout.write(f'Filas generadas: {rows}')
+            
+            indexes = access_path_indexes()
+            self.stdout.write('Índices que se quitan en la pasada sin índices:')
+            for model, names in indexes.items():
+                self.stdout.write(f"  {model._meta.db_table}: {', '.join(names)}")
+            
+            self.set_indexes(indexes, enabled=False)
+            before = self.run_paths(options['repeat'])
+            self.set_indexes(indexes, enabled=True)
+            after = self.run_paths(options['repeat'])
+        
+        results = {
+            'vendor': connection.vendor,
+            'rows': rows,
+            'dropped_indexes': {model._meta.db_table: names for model, names in indexes.items()},
+            'paths': {},
+        }
+        for label in before:
+            results['paths'][label] = {'before': before[label], 'after': after[label]}
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{label}'))
+            for phase, data in (('sin índices', before[label]), ('con índices', after[label])):
+                self.stdout.write(
+                    f"  {phase}: p50 {data['p50_ms']} ms, p95 {data['p95_ms']} ms"
+                )
+                for line in data['plan'].splitlines():
+                    self.stdout.write(f'    {line}')
+        
+        if options['json_path']:
+            with open(options['json_path'], 'w') as output:
+                json.dump(results, output, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['json_path']}"))
+    
+    def set_indexes(self, indexes, enabled):
+        """Elimina o vuelve a crear los índices de acceso en la base desechable"""
+        with connection.schema_editor() as schema_editor:
+            for model, names in indexes.items():
+                for index in model._meta.indexes:
+                    if index.name in names:
+                        if enabled:
+                            schema_editor.add_index(model, index)
+                        else:
+                            schema_editor.remove_index(model, index)
+        analyze_database()
+    
+    def run_paths(self, repeat):
+        results = {}
+        for label, queryset in access_paths().items():
+            results[label] = {
+                'plan': queryset.explain(),
+                **measure(lambda: list(queryset.all()), repeat=repeat),
+            }
+        return results
@@ -0,0 +1,84 @@
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from projects.benchmarking import measure, scratch_database, seed_dataset
+from projects.models import OPEN_TASK_STATUSES, Task
+from projects.renderers import FastJSONParser, FastJSONRenderer, orjson
+from projects.serializers import TaskListFastSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compara JSONRenderer/JSONParser de DRF con FastJSONRenderer/FastJSONParser
+    sobre el payload de `my-tasks`, comprobando que la salida es idéntica
+    """
+    help = 'Micro-benchmark del renderer y parser JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5000, help='Tareas en el payload')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson no está instalado: FastJSONRenderer usa json estándar'))
+
+        with scratch_database():
+            seed_dataset(
+                users=50, projects=10, members_per_project=5,
+                tasks_per_project=-(-options['tasks'] // 10),
+                comments_per_task=0, notifications_per_user=0,
+            )
+            queryset = Task.objects.order_by('due_date', '-created_at', 'id')[:options['tasks']]
+            payload = {
+                'tasks': TaskListFastSerializer(TaskListFastSerializer.values(queryset)).data,
+                **Task.objects.aggregate(
+                    count=Count('pk'),
+                    overdue_count=Count('pk', filter=Q(
+                        due_date__lt=timezone.now(), status__in=OPEN_TASK_STATUSES
+                    )),
+                ),
+            }
+
+        standard, fast = JSONRenderer(), FastJSONRenderer()
+        body = standard.render(payload)
+        if fast.render(payload) != body:
+            raise CommandError('La salida de FastJSONRenderer difiere de JSONRenderer.')
+
+        results = {
+            'tasks': len(payload['tasks']),
+            'payload_bytes': len(body),
+            'orjson': orjson is not None,
+            'render': {
+                'JSONRenderer': measure(lambda: standard.render(payload), repeat=options['repeat']),
+                'FastJSONRenderer': measure(lambda: fast.render(payload), repeat=options['repeat']),
+            },
+            'parse': {
+                'JSONParser': measure(
+                    lambda: JSONParser().parse(io.BytesIO(body)), repeat=options['repeat']
+                ),
+                'FastJSONParser': measure(
+                    lambda: FastJSONParser().parse(io.BytesIO(body)), repeat=options['repeat']
+                ),
+            },
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{results['tasks']} tareas, {results['payload_bytes']} bytes, salida idéntica")
+        for group in ('render', 'parse'):
+            (slow_name, slow), (fast_name, fast_timings) = results[group].items()
+            for name, timings in ((slow_name, slow), (fast_name, fast_timings)):
+                self.stdout.write(
+                    f"{name:18} p50 {timings['p50_ms']:8.2f} ms  p95 {timings['p95_ms']:8.2f} ms"
+                )
+            self.stdout.write(self.style.SUCCESS(
+                f"  aceleración (p50): x{round(slow['p50_ms'] / fast_timings['p50_ms'], 2)}"
+            ))
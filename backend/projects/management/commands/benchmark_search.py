@@ -0,0 +1,84 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from accounts.models import User
+
+from projects.access import ProjectAccess
+from projects.benchmarking import benchmark_words, measure, scratch_database, seed_dataset
+from projects.models import SearchDocument
+from projects.search import rebuild_index, search_documents
+
+
+class Command(BaseCommand):
+    """
+    Mide la búsqueda de texto sobre un corpus sintético: términos raros,
+    frecuentes, varios términos y prefijos, como administrador (sin filtro
+    de visibilidad) y como colaborador (con él)
+    """
+    help = 'Benchmark de la búsqueda de texto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=200000, help='Tareas en el corpus')
+        parser.add_argument('--comments-per-task', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        words = benchmark_words()
+        queries = {
+            'rare': words[-1],
+            'common': words[10],
+            'two_terms': f'{words[50]} {words[400]}',
+            'prefix': words[200][:6],
+        }
+
+        with scratch_database():
+            projects = max(10, options['tasks'] // 2000)
+            seed_dataset(
+                users=200, projects=projects, members_per_project=10,
+                tasks_per_project=-(-options['tasks'] // projects),
+                comments_per_task=options['comments_per_task'], notifications_per_user=0,
+                description_words=20,
+            )
+            start = time.perf_counter()
+            documents = rebuild_index()
+            indexing_s = time.perf_counter() - start
+
+            # El colaborador con más tareas asignadas: el filtro de visibilidad trabaja de verdad
+            collaborator = (
+                User.objects.filter(role='collaborator')
+                .annotate(assigned=Count('assigned_tasks')).order_by('-assigned').first()
+            )
+            admin = User.objects.filter(role='admin').first()
+            access = ProjectAccess(collaborator)
+
+            results = {
+                'documents': documents,
+                'indexing_s': round(indexing_s, 1),
+                'index_rows': SearchDocument.objects.count(),
+                'queries': {},
+            }
+            for name, text in queries.items():
+                for role, user in (('admin', admin), ('collaborator', collaborator)):
+                    results['queries'][f'{name}/{role}'] = {
+                        'q': text,
+                        'hits_first_page': len(search_documents(user, access.member_project_ids, text)),
+                        **measure(
+                            lambda: search_documents(user, access.member_project_ids, text),
+                            repeat=options['repeat'],
+                        ),
+                    }
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{results['documents']} documentos indexados en {results['indexing_s']} s")
+        for name, timings in results['queries'].items():
+            self.stdout.write(
+                f"{name:24} {timings['q']:24} hits {timings['hits_first_page']:3}  "
+                f"p50 {timings['p50_ms']:9.2f} ms  p95 {timings['p95_ms']:9.2f} ms"
+            )
@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from projects.benchmarking import measure, scratch_database, seed_dataset
+from projects.models import Task
+from projects.serializers import TaskListFastSerializer, TaskSerializer
+
+
+class Command(BaseCommand):
+    """
+    Compara TaskSerializer(many=True) con TaskListFastSerializer sobre la
+    misma lista de tareas: consulta + serialización + JSON, comprobando que
+    ambos producen exactamente los mismos bytes
+    """
+    help = 'Benchmark de la serialización rápida de listas de tareas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5000, help='Tareas en la lista')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            seed_dataset(
+                users=50, projects=10, members_per_project=5,
+                tasks_per_project=-(-options['tasks'] // 10),
+                comments_per_task=0, notifications_per_user=0,
+            )
+            queryset = Task.objects.order_by('due_date', '-created_at', 'id')[:options['tasks']]
+            renderer = JSONRenderer()
+
+            def model_serializer():
+                tasks = queryset.select_related('project', 'assigned_to', 'created_by')
+                return renderer.render(TaskSerializer(tasks, many=True).data)
+
+            def fast_serializer():
+                rows = TaskListFastSerializer.values(queryset)
+                return renderer.render(TaskListFastSerializer(rows).data)
+
+            if model_serializer() != fast_serializer():
+                raise CommandError('La salida de TaskListFastSerializer difiere de TaskSerializer.')
+
+            results = {
+                'tasks': queryset.count(),
+                'model_serializer': measure(model_serializer, repeat=options['repeat']),
+                'fast_serializer': measure(fast_serializer, repeat=options['repeat']),
+            }
+
+        results['speedup_p50'] = round(
+            results['model_serializer']['p50_ms'] / results['fast_serializer']['p50_ms'], 2
+        )
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"{results['tasks']} tareas, salida idéntica")
+        for name in ('model_serializer', 'fast_serializer'):
+            timings = results[name]
+            self.stdout.write(
+                f"{name:18} p50 {timings['p50_ms']:9.2f} ms  p95 {timings['p95_ms']:9.2f} ms"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Aceleración (p50): x{results['speedup_p50']}"))
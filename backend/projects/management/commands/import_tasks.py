@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from projects.imports import IMPORT_BATCH_SIZE, InvalidImport, TaskImport, input_format_for, read_rows
+
+
+class Command(BaseCommand):
+    """
+    Importa tareas desde un fichero CSV, NDJSON o JSON en nombre de un
+    usuario, con las mismas validaciones y permisos que el endpoint
+    /api/projects/tasks/import/
+    """
+    help = 'Importa tareas desde un fichero CSV, NDJSON o JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Fichero a importar')
+        parser.add_argument('--user', required=True, help='Usuario que crea las tareas (username)')
+        parser.add_argument('--project', type=int, help='Proyecto de las filas sin project_id')
+        parser.add_argument('--input', help='Formato (csv, ndjson o json) si la extensión no lo indica')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo valida el fichero, sin crear tareas',
+        )
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"No existe el usuario {options['user']}.")
+
+        importer = TaskImport(
+            user, default_project=options['project'],
+            batch_size=options['batch_size'], dry_run=options['dry_run'],
+        )
+        try:
+            input_format = input_format_for(options['path'], options['input'])
+            with open(options['path'], 'rb') as stream:
+                summary = importer.run(read_rows(stream, input_format))
+        except (InvalidImport, OSError) as exc:
+            raise CommandError(f'{exc} ({importer.created} tarea(s) importada(s) antes del error)')
+
+        if options['json']:
+            self.stdout.write(json.dumps(summary, indent=2, default=str))
+            return
+
+        for error in summary['errors']:
+            self.stdout.write(f"Fila {error['row']}: {json.dumps(error['errors'], ensure_ascii=False, default=str)}")
+        verb = 'se crearían' if options['dry_run'] else 'creada(s)'
+        message = f"{summary['created']} tarea(s) {verb}, {summary['failed']} fila(s) con errores."
+        style = self.style.SUCCESS if not summary['failed'] else self.style.WARNING
+        self.stdout.write(style(message))
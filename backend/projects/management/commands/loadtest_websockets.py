@@ -0,0 +1,115 @@
+import asyncio
+import json
+import resource
+import time
+
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.middleware import JWTAuthMiddleware
+from accounts.models import User
+from accounts.tokens import UserRefreshToken
+from project_management.routing import websocket_urlpatterns
+from projects.benchmarking import percentiles, scratch_database, seed_dataset
+
+
+class Command(BaseCommand):
+    """
+    Prueba de carga de la autenticación de WebSockets: abre N conexiones
+    concurrentes a ws/notifications/ contra la aplicación ASGI en el mismo
+    proceso, las mantiene abiertas, entrega un mensaje a cada una y mide la
+    latencia de conexión y las consultas de usuario a la base de datos
+    """
+    help = 'Prueba de carga de conexiones WebSocket autenticadas con JWT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=5000)
+        parser.add_argument('--concurrency', type=int, default=500, help='Conexiones abriéndose a la vez')
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--legacy-tokens', action='store_true',
+                            help='Tokens sin claim de rol (obliga a consultar al usuario)')
+        parser.add_argument('--timeout', type=float, default=30.0)
+        parser.add_argument('--json', action='store_true', help='Salida en JSON')
+
+    def handle(self, *args, **options):
+        token_class = RefreshToken if options['legacy_tokens'] else UserRefreshToken
+        with scratch_database():
+            seed_dataset(
+                users=options['users'], projects=0, tasks_per_project=0,
+                comments_per_task=0, notifications_per_user=0,
+            )
+            tokens = [
+                (user.pk, str(token_class.for_user(user).access_token))
+                for user in User.objects.order_by('pk')
+            ]
+            results = asyncio.run(self.run(tokens, options))
+
+        if results['failed']:
+            raise CommandError(f"{results['failed']} conexiones fallidas de {options['connections']}")
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        latency = results['connect']
+        self.stdout.write(
+            f"{results['connections']} conexiones en {results['total_s']} s "
+            f"({results['connections_per_s']} conexiones/s)"
+        )
+        self.stdout.write(
+            f"Conexión: p50 {latency['p50_ms']} ms  p95 {latency['p95_ms']} ms  máx {latency['max_ms']} ms"
+        )
+        self.stdout.write(f"Mensajes entregados: {results['delivered']}")
+        self.stdout.write(f"Consultas de usuario: {results['user_loads']}")
+        self.stdout.write(f"RSS máximo: {results['peak_rss_mb']} MB")
+
+    async def run(self, tokens, options):
+        middleware = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        timeout = options['timeout']
+        samples = []
+
+        async def open_connection(index):
+            user_id, token = tokens[index % len(tokens)]
+            communicator = WebsocketCommunicator(middleware, f'/ws/notifications/?token={token}')
+            async with semaphore:
+                start = time.perf_counter()
+                connected, _ = await communicator.connect(timeout=timeout)
+                samples.append((time.perf_counter() - start) * 1000)
+            return user_id, communicator, connected
+
+        start = time.perf_counter()
+        opened = await asyncio.gather(*(open_connection(index) for index in range(options['connections'])))
+        total = time.perf_counter() - start
+
+        # Una notificación por usuario llega a todas sus conexiones abiertas
+        channel_layer = get_channel_layer()
+        for user_id in {user_id for user_id, _, connected in opened if connected}:
+            await channel_layer.group_send(f'notifications_{user_id}', {
+                'type': 'notification_message',
+                'notification': {'id': 0, 'title': 'Carga'},
+            })
+
+        async def receive(communicator):
+            try:
+                await communicator.receive_json_from(timeout=timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+        connected = [communicator for _, communicator, ok in opened if ok]
+        delivered = sum(await asyncio.gather(*(receive(communicator) for communicator in connected)))
+        await asyncio.gather(*(communicator.disconnect() for _, communicator, _ in opened))
+
+        return {
+            'connections': options['connections'],
+            'failed': options['connections'] - len(connected),
+            'delivered': delivered,
+            'total_s': round(total, 3),
+            'connections_per_s': round(options['connections'] / total, 1),
+            'connect': percentiles(samples),
+            'user_loads': middleware.user_loads,
+            'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        }
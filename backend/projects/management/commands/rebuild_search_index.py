@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye el índice de búsqueda desde las tablas de proyectos, tareas
+    y comentarios. Las señales lo mantienen al día; hace falta tras cargas
+    masivas que no las disparan (bulk_create, SQL directo, restauraciones).
+    """
+    help = 'Reconstruye el índice de búsqueda de texto'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            total = rebuild_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} documento(s) indexado(s).'))
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from projects.unread import (
+    UNREAD_COUNT_TTL, count_unread, push_unread_counts, unread_count_key,
+)
+
+
+class Command(BaseCommand):
+    """
+    Compara los contadores de no leídas en caché con la tabla de
+    notificaciones y corrige las desviaciones (borrados en cascada, carreras
+    entre un recálculo y una entrega). Pensado para ejecutarse periódicamente
+    (cron); los usuarios sin contador en caché se omiten porque se recalculan
+    en su próxima lectura.
+    """
+    help = 'Detecta y corrige desviaciones en los contadores de notificaciones no leídas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa de las desviaciones, sin corregirlas',
+        )
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='user_ids',
+            help='Limita la revisión a este usuario (puede repetirse)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['user_ids']:
+            users = users.filter(pk__in=options['user_ids'])
+        user_ids = list(users.values_list('pk', flat=True))
+
+        drifted = {}
+        for start in range(0, len(user_ids), options['batch_size']):
+            batch = user_ids[start:start + options['batch_size']]
+            keys = {unread_count_key(user_id): user_id for user_id in batch}
+            cached = {keys[key]: value for key, value in cache.get_many(keys).items()}
+            if not cached:
+                continue
+            actual = count_unread(list(cached))
+            for user_id, value in cached.items():
+                if value != actual[user_id]:
+                    drifted[user_id] = actual[user_id]
+                    self.stdout.write(f"Usuario {user_id}: {value} -> {actual[user_id]}")
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Los contadores de no leídas están sincronizados.'))
+            return
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'{len(drifted)} usuario(s) con desviaciones (sin corregir).'
+            ))
+            return
+
+        cache.set_many(
+            {unread_count_key(user_id): count for user_id, count in drifted.items()}, UNREAD_COUNT_TTL
+        )
+        push_unread_counts(drifted)
+        self.stdout.write(self.style.SUCCESS(f'{len(drifted)} contador(es) corregido(s).'))
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from projects.models import PROJECT_TASK_COUNTER_FIELDS as COUNTER_FIELDS, Project
+
+
+class Command(BaseCommand):
+    """
+    Recalcula los contadores de tareas almacenados en Project y corrige las
+    desviaciones respecto a la tabla `tasks`
+    """
+    help = 'Detecta y corrige desviaciones en los contadores de tareas de los proyectos'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo informa de las desviaciones, sin corregirlas',
+        )
+        parser.add_argument(
+            '--project',
+            type=int,
+            action='append',
+            dest='project_ids',
+            help='Limita la revisión a este proyecto (puede repetirse)',
+        )
+    
+    def handle(self, *args, **options):
+        projects = Project.objects.all()
+        if options['project_ids']:
+            projects = projects.filter(pk__in=options['project_ids'])
+        
+        drift = Q()
+        for field in COUNTER_FIELDS:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+        
+        drifted = list(
+            projects.with_actual_task_counts()
+            .filter(drift)
+            .values('pk', *COUNTER_FIELDS, *[f'actual_{field}' for field in COUNTER_FIELDS])
+        )
+        
+        for row in drifted:
+            changes = ', '.join(
+                f"{field}: {row[field]} -> {row[f'actual_{field}']}"
+                for field in COUNTER_FIELDS
+                if row[field] != row[f'actual_{field}']
+            )
+            self.stdout.write(f"Proyecto {row['pk']}: {changes}")
+        
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Los contadores de tareas están sincronizados.'))
+            return
+        
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                f'{len(drifted)} proyecto(s) con desviaciones (sin corregir).'
+            ))
+            return
+        
+        with transaction.atomic():
+            Project.objects.filter(pk__in=[row['pk'] for row in drifted]).recount_tasks()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(drifted)} proyecto(s) corregido(s).'
+        ))
@@ -0,0 +1,46 @@
+import asyncio
+
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from projects.reminders import ReminderScheduler
+
+
+class Command(BaseCommand):
+    """
+    Proceso del programador de recordatorios de vencimiento (un solo proceso
+    por despliegue). Necesita un channel layer compartido con los servidores
+    web (Redis) para enterarse de las escrituras al momento y para que sus
+    envíos por WebSocket lleguen a las conexiones: con InMemoryChannelLayer
+    cada proceso tiene el suyo, así que se niega a arrancar. Con --once hace
+    una pasada y termina, para lanzarlo desde cron sin channel layer.
+    """
+    help = "Envía los avisos de tareas próximas a vencer y vencidas"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Envía los avisos pendientes y termina',
+        )
+
+    def handle(self, *args, **options):
+        if not options['once']:
+            channel_layer = get_channel_layer()
+            if channel_layer is None or isinstance(channel_layer, InMemoryChannelLayer):
+                raise CommandError(
+                    'El programador necesita un channel layer compartido con los servidores web '
+                    '(p. ej. Redis con REDIS_URL); el actual es local al proceso y no recibiría '
+                    'las escrituras. Configúralo o lanza run_reminders --once desde cron.'
+                )
+        scheduler = ReminderScheduler.from_settings()
+        try:
+            if options['once']:
+                sent = scheduler.tick(timezone.now())
+                self.stdout.write(self.style.SUCCESS(f'{sent} aviso(s) enviado(s).'))
+            else:
+                self.stdout.write('Programador de recordatorios en marcha (Ctrl+C para salir).')
+                asyncio.run(scheduler.run())
+        except KeyboardInterrupt:
+            pass
@@ -12,25 +12,32 @@ class Migration(migrations.Migration):
         ('projects', '0005_alter_projectmember_options_and_more'),
     ]
 
+    # La tabla `notifications` ya la crea 0005; esta migración solo actualiza
+    # el estado para que `migrate` funcione sobre una base de datos vacía.
     operations = [
-        migrations.CreateModel(
-            name='Notification',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('type', models.CharField(choices=[('task_assigned', 'Tarea Asignada'), ('task_completed', 'Tarea Completada'), ('project_assigned', 'Proyecto Asignado'), ('comment_added', 'Comentario Agregado')], max_length=20)),
-                ('title', models.CharField(max_length=200)),
-                ('message', models.TextField()),
-                ('is_read', models.BooleanField(default=False)),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
-                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='projects.task')),
-                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[],
+            state_operations=[
+                migrations.CreateModel(
+                    name='Notification',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('type', models.CharField(choices=[('task_assigned', 'Tarea Asignada'), ('task_completed', 'Tarea Completada'), ('project_assigned', 'Proyecto Asignado'), ('comment_added', 'Comentario Agregado')], max_length=20)),
+                        ('title', models.CharField(max_length=200)),
+                        ('message', models.TextField()),
+                        ('is_read', models.BooleanField(default=False)),
+                        ('created_at', models.DateTimeField(auto_now_add=True)),
+                        ('project', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='projects.project')),
+                        ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='projects.task')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'verbose_name': 'Notificación',
+                        'verbose_name_plural': 'Notificaciones',
+                        'db_table': 'notifications',
+                        'ordering': ['-created_at'],
+                    },
+                ),
             ],
-            options={
-                'verbose_name': 'Notificación',
-                'verbose_name_plural': 'Notificaciones',
-                'db_table': 'notifications',
-                'ordering': ['-created_at'],
-            },
         ),
     ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:11
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_task_counters(apps, schema_editor):
+    """Inicializa los contadores de tareas de los proyectos existentes"""
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('projects', 'Task')
+    
+    counters = (
+        Task.objects.order_by()
+        .values('project')
+        .annotate(
+            tasks_total=Count('pk'),
+            tasks_completed=Count('pk', filter=Q(status='completed')),
+            tasks_in_progress=Count('pk', filter=Q(status='in_progress')),
+            tasks_overdue_eligible=Count('pk', filter=Q(
+                status__in=['pending', 'in_progress'], due_date__isnull=False
+            )),
+        )
+    )
+    for row in counters:
+        project_id = row.pop('project')
+        Project.objects.filter(pk=project_id).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_alter_notification_is_read_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='tasks_completed',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número de tareas completadas'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_in_progress',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número de tareas en progreso'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_overdue_eligible',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número de tareas abiertas con fecha límite (pueden vencer)'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='tasks_total',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Número total de tareas del proyecto'),
+        ),
+        migrations.RunPython(populate_task_counters, migrations.RunPython.noop),
+    ]
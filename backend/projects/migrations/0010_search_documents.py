@@ -0,0 +1,132 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SQLITE_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE search_documents_fts USING fts5(
+        title, body,
+        content='search_documents', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER search_documents_fts_insert AFTER INSERT ON search_documents BEGIN
+        INSERT INTO search_documents_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_documents_fts_delete AFTER DELETE ON search_documents BEGIN
+        INSERT INTO search_documents_fts (search_documents_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+    END
+    """,
+    """
+    CREATE TRIGGER search_documents_fts_update AFTER UPDATE OF title, body ON search_documents
+    WHEN old.title IS NOT new.title OR old.body IS NOT new.body BEGIN
+        INSERT INTO search_documents_fts (search_documents_fts, rowid, title, body)
+        VALUES ('delete', old.id, old.title, old.body);
+        INSERT INTO search_documents_fts (rowid, title, body) VALUES (new.id, new.title, new.body);
+    END
+    """,
+]
+
+SQLITE_SCHEMA_REVERSE = [
+    'DROP TRIGGER IF EXISTS search_documents_fts_update',
+    'DROP TRIGGER IF EXISTS search_documents_fts_delete',
+    'DROP TRIGGER IF EXISTS search_documents_fts_insert',
+    'DROP TABLE IF EXISTS search_documents_fts',
+]
+
+POSTGRESQL_SCHEMA = [
+    """
+    ALTER TABLE search_documents ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(body, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX search_documents_vector_idx ON search_documents USING GIN (search_vector)',
+]
+
+POSTGRESQL_SCHEMA_REVERSE = [
+    'DROP INDEX IF EXISTS search_documents_vector_idx',
+    'ALTER TABLE search_documents DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_text_index(apps, schema_editor):
+    """Índice de texto propio de cada base de datos (ver projects/search.py)"""
+    _run(schema_editor, {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRESQL_SCHEMA})
+
+
+def drop_text_index(apps, schema_editor):
+    _run(schema_editor, {'sqlite': SQLITE_SCHEMA_REVERSE, 'postgresql': POSTGRESQL_SCHEMA_REVERSE})
+
+
+def populate_documents(apps, schema_editor):
+    """Indexa los proyectos, tareas y comentarios existentes"""
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('projects', 'Task')
+    TaskComment = apps.get_model('projects', 'TaskComment')
+    SearchDocument = apps.get_model('projects', 'SearchDocument')
+    
+    documents = [
+        SearchDocument(
+            kind='project', object_id=project.pk, project_id=project.pk,
+            title=project.name, body=project.description or '',
+        )
+        for project in Project.objects.all()
+    ]
+    documents += [
+        SearchDocument(
+            kind='task', object_id=task.pk, project_id=task.project_id, task_id=task.pk,
+            title=task.title, body=task.description or '',
+        )
+        for task in Task.objects.all()
+    ]
+    documents += [
+        SearchDocument(
+            kind='comment', object_id=comment.pk, project_id=comment.task.project_id,
+            task_id=comment.task_id, body=comment.content,
+        )
+        for comment in TaskComment.objects.select_related('task')
+    ]
+    SearchDocument.objects.bulk_create(documents, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Proyecto'), ('task', 'Tarea'), ('comment', 'Comentario')], max_length=10)),
+                ('object_id', models.BigIntegerField(help_text='Id del proyecto, tarea o comentario')),
+                ('title', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.project')),
+                ('task', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='projects.task')),
+            ],
+            options={
+                'db_table': 'search_documents',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_object_uniq'),
+        ),
+        migrations.RunPython(create_text_index, drop_text_index),
+        migrations.RunPython(populate_documents, migrations.RunPython.noop),
+    ]
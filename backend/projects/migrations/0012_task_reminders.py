@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0011_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='due_soon_notified_for',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='overdue_notified_for',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='type',
+            field=models.CharField(choices=[('task_assigned', 'Tarea Asignada'), ('task_completed', 'Tarea Completada'), ('project_assigned', 'Proyecto Asignado'), ('comment_added', 'Comentario Agregado'), ('task_due_soon', 'Tarea Próxima a Vencer'), ('task_overdue', 'Tarea Vencida')], help_text='Tipo de notificación', max_length=20),
+        ),
+    ]
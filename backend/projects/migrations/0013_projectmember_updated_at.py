@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0012_task_reminders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectmember',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
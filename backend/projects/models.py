@@ -1,7 +1,127 @@
-from django.db import models
+from contextvars import ContextVar
+
+from django.db import models, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
 from django.utils import timezone
 
 from accounts.models import User
+from .caching import invalidate_projects
+from .unread import update_unread_counts
+
+
+# Estados de tarea que todavía pueden vencer
+OPEN_TASK_STATUSES = ['pending', 'in_progress']
+
+# Contadores de tareas almacenados en Project
+PROJECT_TASK_COUNTER_FIELDS = [
+    'tasks_total', 'tasks_completed', 'tasks_in_progress', 'tasks_overdue_eligible',
+]
+
+# Campos de Task que afectan a los contadores almacenados en Project
+TASK_COUNTER_SOURCE_FIELDS = {'status', 'due_date', 'project', 'project_id'}
+
+# Una vez por TaskQuerySet.delete() y por proyecto o usuario borrado, con las
+# filas de tareas borradas (id, proyecto, asignado)
+tasks_deleted = Signal()
+
+# Activo mientras TaskQuerySet.delete() borra: los receptores de post_delete
+# de tareas y comentarios no hacen nada y el trabajo se hace con tasks_deleted
+bulk_task_deletion = ContextVar('bulk_task_deletion', default=False)
+
+
+def _count_subquery(queryset):
+    """
+    Construye una subconsulta correlacionada que cuenta las filas de `queryset`
+    agrupadas por proyecto. Evita el producto cartesiano que producen varios
+    `Count` sobre relaciones inversas en la misma consulta.
+    """
+    counts = (
+        queryset.filter(project=OuterRef('pk'))
+        .order_by()
+        .values('project')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _task_counter_expressions():
+    """Expresiones que calculan cada contador de tareas de Project"""
+    return {
+        'tasks_total': _count_subquery(Task.objects.all()),
+        'tasks_completed': _count_subquery(Task.objects.filter(status='completed')),
+        'tasks_in_progress': _count_subquery(Task.objects.filter(status='in_progress')),
+        'tasks_overdue_eligible': _count_subquery(
+            Task.objects.filter(status__in=OPEN_TASK_STATUSES, due_date__isnull=False)
+        ),
+    }
+
+
+def _task_stats_expressions(now=None):
+    """Conteos filtrados que componen las estadísticas de tareas de un proyecto"""
+    now = now or timezone.now()
+    return {
+        'total_tasks': Count('pk'),
+        'completed_tasks': Count('pk', filter=Q(status='completed')),
+        'in_progress_tasks': Count('pk', filter=Q(status='in_progress')),
+        'pending_tasks': Count('pk', filter=~Q(status__in=['completed', 'cancelled'])),
+        'overdue_tasks': Count('pk', filter=Q(
+            due_date__lt=now, status__in=OPEN_TASK_STATUSES
+        )),
+    }
+
+
+def _member_stats_expressions(prefix=''):
+    """Conteos filtrados de miembros; `prefix` permite usarlos desde Project"""
+    return {
+        'total_members': Count(f'{prefix}pk'),
+        'active_members': Count(f'{prefix}pk', filter=Q(**{f'{prefix}user__is_active': True})),
+    }
+
+
+class ProjectQuerySet(models.QuerySet):
+    """QuerySet de proyectos con las consultas de lectura más frecuentes"""
+    
+    def visible_to(self, user):
+        """Filtra los proyectos que el usuario puede ver según su rol"""
+        if user.is_admin():
+            return self
+        memberships = ProjectMember.objects.filter(user_id=user.id).values('project')
+        if user.is_collaborator():
+            return self.filter(Q(owner_id=user.id) | Q(pk__in=memberships))
+        return self.filter(pk__in=memberships)
+    
+    def with_counts(self):
+        """
+        Carga el propietario y anota el número de miembros que usa
+        ProjectSerializer; los contadores de tareas ya están almacenados en
+        el proyecto. Serializar una página de proyectos cuesta así un número
+        constante de consultas.
+        """
+        return self.select_related('owner').annotate(
+            members_count=_count_subquery(ProjectMember.objects.all()),
+        )
+    
+    def with_actual_task_counts(self):
+        """Anota los contadores de tareas calculados desde la tabla `tasks`"""
+        return self.annotate(**{
+            f'actual_{field}': expression
+            for field, expression in _task_counter_expressions().items()
+        })
+    
+    def recount_tasks(self):
+        """Recalcula los contadores de tareas almacenados con un solo UPDATE"""
+        return self.update(**_task_counter_expressions())
+    
+    def member_stats(self):
+        """
+        Estadísticas de miembros por proyecto en una sola consulta agrupada.
+        Incluye los proyectos sin miembros (con conteos a cero).
+        """
+        rows = self.order_by().values('pk').annotate(**_member_stats_expressions('members__'))
+        return {row.pop('pk'): row for row in rows}
 
 
 class Project(models.Model):
@@ -68,15 +188,48 @@ class Project(models.Model):
         help_text="Usuario propietario del proyecto"
     )
     
+    # Contadores de tareas desnormalizados (los mantiene Task al escribir)
+    tasks_total = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Número total de tareas del proyecto"
+    )
+    
+    tasks_completed = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Número de tareas completadas"
+    )
+    
+    tasks_in_progress = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Número de tareas en progreso"
+    )
+    
+    tasks_overdue_eligible = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Número de tareas abiertas con fecha límite (pueden vencer)"
+    )
+    
     # Metadatos
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ProjectQuerySet.as_manager()
+    
     class Meta:
         db_table = 'projects'
         verbose_name = 'Proyecto'
         verbose_name_plural = 'Proyectos'
         ordering = ['-created_at']
+        indexes = [
+            # Planes de filtros.PROJECT_FILTERS para administradores
+            models.Index(fields=['owner', 'created_at'], name='project_owner_created_idx'),
+            models.Index(fields=['status', 'created_at'], name='project_status_created_idx'),
+            models.Index(fields=['created_at'], name='project_created_idx'),
+        ]
     
     def __str__(self):
         return self.name
@@ -94,20 +247,51 @@ class Project(models.Model):
     @property
     def progress_percentage(self):
         """Calcula el porcentaje de progreso del proyecto"""
-        total_tasks = self.tasks.count()
-        if total_tasks == 0:
+        if self.tasks_total == 0:
             return 0
-        
-        completed_tasks = self.tasks.filter(status='completed').count()
-        return round((completed_tasks / total_tasks) * 100, 2)
+        return round((self.tasks_completed / self.tasks_total) * 100, 2)
+    
+    def save(self, *args, **kwargs):
+        """
+        Override save para no sobrescribir los contadores de tareas con los
+        valores (posiblemente obsoletos) cargados en esta instancia
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in PROJECT_TASK_COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def apply_task_counter_delta(cls, project_id, delta):
+        """
+        Suma `delta` (campo -> incremento) a los contadores de un proyecto.
+        Los decrementos no bajan de cero: un contador desviado se corrige con
+        recount_tasks() en lugar de hacer fallar el borrado.
+        """
+        changes = {
+            field: F(field) + value if value > 0 else Greatest(F(field) + value, 0)
+            for field, value in delta.items() if value
+        }
+        if changes:
+            cls.objects.filter(pk=project_id).update(**changes)
     
     def can_user_edit(self, user):
         """Verifica si un usuario puede editar este proyecto"""
-        return user == self.owner or user.can_edit_projects()
+        return user.id == self.owner_id or user.can_edit_projects()
     
     def can_user_delete(self, user):
         """Verifica si un usuario puede eliminar este proyecto"""
-        return user == self.owner or user.can_delete_projects()
+        return user.id == self.owner_id or user.can_delete_projects()
+
+
+class ProjectMemberQuerySet(models.QuerySet):
+    """QuerySet de miembros de proyecto"""
+    
+    def stats(self):
+        """Estadísticas de miembros con un solo aggregate()"""
+        return self.aggregate(**_member_stats_expressions())
 
 
 class ProjectMember(models.Model):
@@ -144,6 +328,10 @@ class ProjectMember(models.Model):
     )
     
     joined_at = models.DateTimeField(auto_now_add=True)
+    # Cambios de rol: forma parte del ETag del proyecto (conditional.py)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = ProjectMemberQuerySet.as_manager()
     
     class Meta:
         db_table = 'project_members'
@@ -151,11 +339,104 @@ class ProjectMember(models.Model):
         verbose_name_plural = 'Miembros de Proyectos'
         unique_together = ['project', 'user']
         ordering = ['-joined_at']
+        indexes = [
+            # Proyectos de un usuario (visibilidad y permisos)
+            models.Index(fields=['user', 'project'], name='member_user_project_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.project.name}"
 
 
+class TaskQuerySet(models.QuerySet):
+    """
+    QuerySet de tareas que mantiene los contadores de Project en las
+    operaciones masivas, que no pasan por Task.save ni por las señales.
+    """
+    
+    def visible_to(self, user):
+        """Filtra las tareas de los proyectos que el usuario puede ver"""
+        if user.is_admin():
+            return self
+        return self.filter(project__in=Project.objects.visible_to(user).values('pk'))
+    
+    def stats(self, now=None):
+        """Estadísticas de tareas con un solo aggregate()"""
+        return self.aggregate(**_task_stats_expressions(now))
+    
+    def stats_by_project(self, now=None):
+        """Estadísticas de tareas agrupadas por proyecto en una sola consulta"""
+        rows = self.order_by().values('project').annotate(**_task_stats_expressions(now))
+        return {row.pop('project'): row for row in rows}
+    
+    def _recount_projects(self, project_ids):
+        project_ids = {project_id for project_id in project_ids if project_id is not None}
+        if project_ids:
+            Project.objects.filter(pk__in=project_ids).recount_tasks()
+            invalidate_projects(project_ids)
+    
+    def update(self, **kwargs):
+        if not TASK_COUNTER_SOURCE_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        
+        with transaction.atomic(using=self.db):
+            project_ids = set(self.order_by().values_list('project_id', flat=True).distinct())
+            rows = super().update(**kwargs)
+            new_project = kwargs.get('project', kwargs.get('project_id'))
+            # bulk_update pasa expresiones Case; allí los proyectos ya se conocen
+            if new_project is not None and not hasattr(new_project, 'resolve_expression'):
+                project_ids.add(getattr(new_project, 'pk', new_project))
+            self._recount_projects(project_ids)
+        return rows
+    
+    def delete(self):
+        """
+        Borrado en bloque: en lugar de un post_delete por tarea y comentario,
+        un recuento de los proyectos afectados y una señal tasks_deleted
+        """
+        with transaction.atomic(using=self.db):
+            rows = list(self.order_by().values_list('pk', 'project_id', 'assigned_to_id'))
+            token = bulk_task_deletion.set(True)
+            try:
+                result = super().delete()
+            finally:
+                bulk_task_deletion.reset(token)
+            self.tasks_deleted(rows)
+        return result
+    
+    def tasks_deleted(self, rows):
+        """Recuento de los proyectos que siguen existiendo y señal tasks_deleted de filas ya borradas"""
+        if rows:
+            self._recount_projects({project_id for _, project_id, _ in rows})
+            tasks_deleted.send(sender=Task, rows=rows)
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            self._recount_projects(obj.project_id for obj in objs)
+        for obj in created:
+            obj._store_counter_snapshot()
+        return created
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if not TASK_COUNTER_SOURCE_FIELDS & set(fields):
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        
+        with transaction.atomic(using=self.db):
+            project_ids = {obj.project_id for obj in objs}
+            project_ids.update(
+                Task.objects.filter(pk__in=[obj.pk for obj in objs])
+                .order_by().values_list('project_id', flat=True).distinct()
+            )
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            self._recount_projects(project_ids)
+        for obj in objs:
+            obj._store_counter_snapshot()
+        return rows
+
+
 class Task(models.Model):
     """
     Modelo para tareas
@@ -236,15 +517,41 @@ class Task(models.Model):
         help_text="Usuario que creó la tarea"
     )
     
+    # Recordatorios enviados: la fecha límite para la que se avisó (ver reminders.py)
+    due_soon_notified_for = models.DateTimeField(null=True, blank=True, editable=False)
+    overdue_notified_for = models.DateTimeField(null=True, blank=True, editable=False)
+    
     # Metadatos
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TaskQuerySet.as_manager()
+    
     class Meta:
         db_table = 'tasks'
         verbose_name = 'Tarea'
         verbose_name_plural = 'Tareas'
         ordering = ['-created_at']
+        indexes = [
+            # Tareas de un usuario filtradas por estado y ordenadas por vencimiento
+            models.Index(fields=['assigned_to', 'status', 'due_date'], name='task_assignee_status_due_idx'),
+            # Estadísticas y tableros por proyecto
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            # Tareas abiertas con fecha límite (vencidas / próximas a vencer)
+            models.Index(
+                fields=['due_date'],
+                name='task_open_due_date_idx',
+                condition=Q(status__in=OPEN_TASK_STATUSES, due_date__isnull=False),
+            ),
+            # Planes de filtros.TASK_FILTERS: tablero de un proyecto por vencimiento o por fecha
+            models.Index(fields=['project', 'due_date'], name='task_project_due_idx'),
+            models.Index(fields=['project', 'created_at'], name='task_project_created_idx'),
+            # Tareas creadas por un usuario
+            models.Index(fields=['created_by', 'created_at'], name='task_creator_created_idx'),
+            # Listados de administración: por estado y vencimiento, o todas por fecha (keyset)
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+            models.Index(fields=['created_at'], name='task_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.project.name}"
@@ -271,13 +578,89 @@ class Task(models.Model):
         # Solo administradores y colaboradores pueden eliminar tareas
         return user.can_edit_projects()
     
-    def save(self, *args, **kwargs):
-        """Override save para marcar fecha de completado"""
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._store_counter_snapshot()
+        # Asignado persistido, para invalidar también su dashboard al reasignar
+        instance._loaded_assigned_to_id = instance.__dict__.get('assigned_to_id')
+        return instance
+    
+    @staticmethod
+    def task_counter_values(status, due_date):
+        """Aportación de una tarea con este estado y fecha límite a los contadores"""
+        return {
+            'tasks_total': 1,
+            'tasks_completed': int(status == 'completed'),
+            'tasks_in_progress': int(status == 'in_progress'),
+            'tasks_overdue_eligible': int(status in OPEN_TASK_STATUSES and due_date is not None),
+        }
+    
+    def counter_values(self):
+        """Aportación de esta tarea a los contadores de su proyecto"""
+        return self.task_counter_values(self.status, self.due_date)
+    
+    def _store_counter_snapshot(self):
+        """Guarda el estado persistido que usan las señales para detectar cambios"""
+        loaded = {'status', 'due_date', 'project_id'} <= self.__dict__.keys()
+        self._counter_snapshot = (
+            (self.project_id, self.counter_values()) if loaded and self.pk else None
+        )
+    
+    def _lock_counter_snapshot(self, using=None):
+        """
+        Relee con la fila bloqueada (select_for_update) el estado del que parte
+        el delta: dos guardados concurrentes desde instancias cargadas antes
+        no aplican el mismo cambio dos veces
+        """
+        row = (
+            Task.objects.db_manager(using).select_for_update().filter(pk=self.pk)
+            .values_list('project_id', 'status', 'due_date').first()
+        )
+        self._counter_snapshot = (row[0], self.task_counter_values(row[1], row[2])) if row else None
+    
+    def _apply_counter_changes(self, created):
+        old_project_id, old_values = (None, {}) if created else self._counter_snapshot
+        new_values = self.counter_values()
+        if old_project_id == self.project_id:
+            delta = {
+                field: new_values[field] - old_values.get(field, 0)
+                for field in new_values
+            }
+            Project.apply_task_counter_delta(self.project_id, delta)
+        else:
+            Project.apply_task_counter_delta(
+                old_project_id, {field: -value for field, value in old_values.items()}
+            )
+            Project.apply_task_counter_delta(self.project_id, new_values)
+    
+    def sync_completed_at(self, now=None):
+        """Ajusta completed_at al estado actual (misma regla que save)"""
         if self.status == 'completed' and not self.completed_at:
-            self.completed_at = timezone.now()
+            self.completed_at = now or timezone.now()
         elif self.status != 'completed' and self.completed_at:
             self.completed_at = None
-        super().save(*args, **kwargs)
+    
+    def save(self, *args, **kwargs):
+        """
+        Override save para marcar fecha de completado y mantener los
+        contadores de tareas del proyecto en la misma transacción
+        """
+        self.sync_completed_at()
+        
+        created = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        counted = created or update_fields is None or bool(TASK_COUNTER_SOURCE_FIELDS & set(update_fields))
+        with transaction.atomic(using=kwargs.get('using')):
+            if counted and not created:
+                self._lock_counter_snapshot(kwargs.get('using'))
+            super().save(*args, **kwargs)
+            if created or (counted and self._counter_snapshot is not None):
+                self._apply_counter_changes(created)
+            elif counted:
+                # La fila ya no existía al bloquearla: recalcular
+                Task.objects._recount_projects({self.project_id})
+        self._store_counter_snapshot()
 
 
 class TaskComment(models.Model):
@@ -312,6 +695,9 @@ class TaskComment(models.Model):
         verbose_name = 'Comentario de Tarea'
         verbose_name_plural = 'Comentarios de Tareas'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['task', '-created_at'], name='comment_task_created_idx'),
+        ]
     
     def __str__(self):
         return f"Comentario de {self.author.get_full_name()} en {self.task.title}"
@@ -336,6 +722,8 @@ class Notification(models.Model):
         ('task_completed', 'Tarea Completada'),
         ('project_assigned', 'Proyecto Asignado'),
         ('comment_added', 'Comentario Agregado'),
+        ('task_due_soon', 'Tarea Próxima a Vencer'),
+        ('task_overdue', 'Tarea Vencida'),
     ]
     
     user = models.ForeignKey(
@@ -389,11 +777,56 @@ class Notification(models.Model):
         verbose_name = 'Notificación'
         verbose_name_plural = 'Notificaciones'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_created_idx'),
+            # Solo no leídas: contador y badge del usuario
+            models.Index(
+                fields=['user', '-created_at'],
+                name='notif_unread_user_idx',
+                condition=Q(is_read=False),
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.user.get_full_name()}"
     
     def mark_as_read(self):
-        """Marca la notificación como leída"""
+        """Marca la notificación como leída (y descuenta el contador si no lo estaba)"""
+        updated = Notification.objects.filter(pk=self.pk, is_read=False).update(is_read=True)
         self.is_read = True
-        self.save(update_fields=['is_read'])
\ No newline at end of file
+        update_unread_counts({self.user_id: -updated})
+
+
+class SearchDocument(models.Model):
+    """
+    Documento del índice de búsqueda de texto (ver projects/search.py)
+    Un documento por proyecto, tarea o comentario, con su texto y los ids que
+    necesitan las reglas de visibilidad. El índice de texto en sí (FTS5 en
+    SQLite, tsvector + GIN en PostgreSQL) se crea en la migración y se
+    mantiene desde la base de datos a partir de esta tabla.
+    """
+    
+    KIND_CHOICES = [
+        ('project', 'Proyecto'),
+        ('task', 'Tarea'),
+        ('comment', 'Comentario'),
+    ]
+    
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField(help_text="Id del proyecto, tarea o comentario")
+    
+    # Los documentos desaparecen en cascada con su proyecto o su tarea
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='+')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    
+    title = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    
+    class Meta:
+        db_table = 'search_documents'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='search_document_object_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
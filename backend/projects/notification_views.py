@@ -3,9 +3,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Q
 from .models import Notification
+from .pagination import OptionalKeysetPagination
 from .serializers import NotificationSerializer
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+from .notifications import dispatch
+from .unread import get_unread_count, update_unread_counts
 
 
 class NotificationListView(generics.ListAPIView):
@@ -14,6 +15,7 @@ class NotificationListView(generics.ListAPIView):
     """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
@@ -24,13 +26,9 @@ class NotificationListView(generics.ListAPIView):
 def unread_notifications_count(request):
     """
     Vista para obtener el conteo de notificaciones no leídas
+    Lee el contador mantenido en projects/unread.py, sin COUNT en cada consulta
     """
-    count = Notification.objects.filter(
-        user=request.user,
-        is_read=False
-    ).count()
-    
-    return Response({'count': count})
+    return Response({'count': get_unread_count(request.user.id)})
 
 
 @api_view(['POST'])
@@ -59,10 +57,11 @@ def mark_all_as_read(request):
     """
     Vista para marcar todas las notificaciones como leídas
     """
-    Notification.objects.filter(
+    updated = Notification.objects.filter(
         user=request.user,
         is_read=False
     ).update(is_read=True)
+    update_unread_counts({request.user.id: -updated})
     
     return Response({'message': 'Todas las notificaciones marcadas como leídas'})
 
@@ -70,57 +69,9 @@ def mark_all_as_read(request):
 def send_notification(user, notification_type, title, message, project=None, task=None):
     """
     Función helper para enviar notificaciones
+    La inserción y el envío por WebSocket se hacen después del commit, fuera
+    de la petición, a través del backend configurado en settings.NOTIFICATIONS
     """
-    print(f"🔔 Creating notification for user {user.id}: {title}")
-    
-    # Crear la notificación en la base de datos
-    notification = Notification.objects.create(
-        user=user,
-        type=notification_type,
-        title=title,
-        message=message,
-        project=project,
-        task=task
+    return dispatch(
+        user, notification_type, title, message, project=project, task=task
     )
-    
-    print(f"✅ Notification created with ID: {notification.id}")
-    
-    # Enviar notificación en tiempo real via WebSocket
-    try:
-        channel_layer = get_channel_layer()
-        if channel_layer:
-            group_name = f'notifications_{user.id}'
-            message_data = {
-                'type': 'notification_message',
-                'notification': {
-                    'id': notification.id,
-                    'type': notification.type,
-                    'title': notification.title,
-                    'message': notification.message,
-                    'is_read': notification.is_read,
-                    'created_at': notification.created_at.isoformat(),
-                    'project': {
-                        'id': project.id,
-                        'name': project.name
-                    } if project else None,
-                    'task': {
-                        'id': task.id,
-                        'title': task.title
-                    } if task else None,
-                }
-            }
-            
-            print(f"📡 Sending WebSocket message to group: {group_name}")
-            print(f"📨 Message data: {message_data}")
-            
-            async_to_sync(channel_layer.group_send)(group_name, message_data)
-            print(f"✅ WebSocket message sent successfully")
-        else:
-            print("❌ No channel layer available")
-    except Exception as e:
-        print(f"⚠️ WebSocket notification failed (continuing anyway): {str(e)}")
-        # No lanzar la excepción, solo logear el error
-    
-    return notification
-
-
@@ -0,0 +1,276 @@
+"""
+Despachador de notificaciones
+
+Las notificaciones se encolan cuando la transacción que las origina hace
+commit y un backend las entrega (inserción + envío por WebSocket) fuera del
+ciclo de la petición. El backend se elige con `settings.NOTIFICATIONS`.
+
+Con ThreadedNotificationBackend los eventos esperan en una cola en memoria
+entre el commit y la entrega (como mucho `flush_interval` segundos si el
+hilo no está atascado). Al salir el proceso de forma ordenada se espera a
+vaciarla (hasta `shutdown_timeout` segundos), pero si muere de golpe
+(SIGKILL, OOM) los eventos encolados se pierden. Las notificaciones que no
+pueden perderse insertan sus filas con create_notifications() dentro de la
+transacción que las origina y solo dejan el envío en tiempo real para
+después del commit (push_notifications).
+"""
+import asyncio
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import IntegrityError, close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Notification
+from .unread import adjust_unread_counts, unread_count_messages
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'projects.notifications.ThreadedNotificationBackend'
+
+
+def build_event(user, notification_type, title, message, project=None, task=None):
+    """Crea un evento de notificación serializable, sin instancias de modelos"""
+    return {
+        'user_id': user.id,
+        'type': notification_type,
+        'title': title,
+        'message': message,
+        'project': {'id': project.id, 'name': project.name} if project else None,
+        'task': {'id': task.id, 'title': task.title} if task else None,
+    }
+
+
+def websocket_payload(notification, event):
+    """Mensaje que recibe NotificationConsumer.notification_message"""
+    return {
+        'type': 'notification_message',
+        'notification': {
+            'id': notification.id,
+            'type': notification.type,
+            'title': notification.title,
+            'message': notification.message,
+            'is_read': notification.is_read,
+            'created_at': notification.created_at.isoformat(),
+            'project': event['project'],
+            'task': event['task'],
+        }
+    }
+
+
+async def _group_send_all(channel_layer, messages):
+    await asyncio.gather(*(
+        channel_layer.group_send(group_name, message) for group_name, message in messages
+    ))
+
+
+def _notification(event):
+    return Notification(
+        user_id=event['user_id'],
+        type=event['type'],
+        title=event['title'],
+        message=event['message'],
+        project_id=event['project']['id'] if event['project'] else None,
+        task_id=event['task']['id'] if event['task'] else None,
+    )
+
+
+def create_notifications(events):
+    """
+    Inserta las filas de un lote con un solo bulk_create. Si alguna viola una
+    restricción (p. ej. la tarea se borró antes de la entrega) se reintenta
+    fila a fila y solo se descartan las inválidas. Devuelve las notificaciones
+    creadas y sus eventos.
+    """
+    events = list(events)
+    try:
+        with transaction.atomic():
+            notifications = Notification.objects.bulk_create([_notification(event) for event in events])
+        return notifications, events
+    except IntegrityError:
+        logger.warning("Lote de %s notificaciones con filas inválidas; se reintenta una a una", len(events))
+
+    notifications, saved = [], []
+    for event in events:
+        notification = _notification(event)
+        try:
+            with transaction.atomic():
+                notification.save()
+        except IntegrityError:
+            logger.warning("Notificación descartada para el usuario %s: %s", event['user_id'], event['title'])
+            continue
+        notifications.append(notification)
+        saved.append(event)
+    return notifications, saved
+
+
+def push_notifications(notifications, events):
+    """Contadores de no leídas y envío por WebSocket, todos los group_send en una vuelta del event loop"""
+    unread_counts = adjust_unread_counts(Counter(event['user_id'] for event in events))
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        logger.warning("No hay channel layer configurado; %s notificaciones sin tiempo real", len(events))
+        return
+
+    messages = [
+        (f"notifications_{event['user_id']}", websocket_payload(notification, event))
+        for notification, event in zip(notifications, events)
+    ] + unread_count_messages(unread_counts)
+    try:
+        async_to_sync(_group_send_all)(channel_layer, messages)
+    except Exception:
+        # No lanzar la excepción: las notificaciones ya están guardadas
+        logger.exception("Falló el envío en tiempo real de %s notificaciones", len(messages))
+
+
+def deliver(events):
+    """Entrega un lote de eventos: inserción en bloque y envío en tiempo real"""
+    notifications, events = create_notifications(events)
+    logger.debug("%s notificaciones creadas", len(notifications))
+    if notifications:
+        push_notifications(notifications, events)
+    return notifications
+
+
+class InlineNotificationBackend:
+    """Entrega cada evento en el mismo hilo; pensado para tests y desarrollo"""
+    deliver = staticmethod(deliver)
+
+    def __init__(self, **options):
+        pass
+
+    def enqueue(self, event):
+        self.deliver([event])
+
+    def flush(self, timeout=None):
+        pass
+
+
+def _register_exit_flush(flush, timeout):
+    """
+    Registra la espera de salida antes de que se cierren los ThreadPoolExecutor:
+    async_to_sync los usa y con atexit.register ya no aceptarían el envío.
+    threading._register_atexit (Python 3.9+) es lo que usa concurrent.futures
+    y sus funciones se llaman en orden inverso, así que esta va antes.
+    """
+    register = getattr(threading, '_register_atexit', None)
+    try:
+        if register is not None:
+            register(flush, timeout)
+            return
+    except RuntimeError:
+        # Ya se está cerrando el intérprete
+        return
+    atexit.register(flush, timeout)
+
+
+class ThreadedNotificationBackend:
+    """
+    Entrega los eventos desde un hilo de fondo que agrupa en lotes de hasta
+    `batch_size` eventos o `flush_interval` segundos, lo que llegue antes
+    """
+    deliver = staticmethod(deliver)
+    thread_name = 'notification-dispatcher'
+
+    def __init__(self, batch_size=100, flush_interval=0.05, max_queue_size=10000, shutdown_timeout=5):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.shutdown_timeout = shutdown_timeout
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, event):
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Cola llena: se entrega en línea antes que perder la notificación
+            logger.warning("Cola de %s llena; entrega en línea", self.thread_name)
+            self.deliver([event])
+
+    def flush(self, timeout=None):
+        """Espera a que se entreguen los eventos encolados"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.005)
+        return True
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                if self._worker is None:
+                    # El hilo es daemon: al salir se espera a que entregue lo encolado
+                    _register_exit_flush(self.flush, self.shutdown_timeout)
+                self._worker = threading.Thread(
+                    target=self._run, name=self.thread_name, daemon=True
+                )
+                self._worker.start()
+
+    def _next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            close_old_connections()
+            try:
+                self.deliver(batch)
+            except Exception:
+                logger.exception("Error entregando un lote de %s eventos (%s)", len(batch), self.thread_name)
+            finally:
+                close_old_connections()
+                for _ in batch:
+                    self.queue.task_done()
+
+
+_backend = None
+
+
+def get_backend():
+    """Devuelve (y cachea) el backend configurado en settings.NOTIFICATIONS"""
+    global _backend
+    if _backend is None:
+        config = dict(getattr(settings, 'NOTIFICATIONS', {}))
+        backend_class = import_string(config.pop('BACKEND', DEFAULT_BACKEND))
+        _backend = backend_class(**{key.lower(): value for key, value in config.get('OPTIONS', {}).items()})
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting, **kwargs):
+    global _backend
+    if setting == 'NOTIFICATIONS':
+        _backend = None
+
+
+def dispatch(user, notification_type, title, message, project=None, task=None):
+    """Encola una notificación para entregarla tras el commit de la transacción actual"""
+    event = build_event(user, notification_type, title, message, project=project, task=task)
+    transaction.on_commit(lambda: get_backend().enqueue(event))
+    return event
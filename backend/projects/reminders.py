@@ -0,0 +1,296 @@
+"""
+Recordatorios de vencimiento de tareas
+
+ReminderScheduler corre en su propio proceso (manage.py run_reminders, con
+un channel layer compartido como Redis) y guarda en un montículo los avisos de la ventana próxima: 'vence pronto'
+DUE_SOON segundos antes de la fecha límite y 'vencida' al llegar a ella.
+Entre un aviso y el siguiente espera mensajes del channel layer, así que sin
+plazos cercanos ni escrituras no consume CPU.
+
+- Carga: consultas por rango de due_date de tareas abiertas, que resuelven
+  los índices task_open_due_date_idx o task_status_due_idx sin recorrer la
+  tabla: al arrancar y en cada resincronización (RESYNC_INTERVAL, recupera
+  escrituras cuyo mensaje se perdiera) la ventana completa; al ampliarla
+  (HORIZON) solo el tramo nuevo.
+- Cambios: los deltas de tareas que publica live.py llegan al grupo
+  REMINDERS_GROUP. Un cambio de fecha o de estado deja obsoletas las
+  entradas anteriores del montículo, que se descartan al salir.
+- Envío: los avisos que vencen se confirman por lotes contra la base de datos
+  (tarea abierta y con la misma fecha) y se marcan en due_soon_notified_for u
+  overdue_notified_for con la fecha avisada, en la misma transacción que
+  inserta las filas de Notification. Marca y notificación se confirman o se
+  pierden juntas, así que cada aviso queda guardado exactamente una vez por
+  tarea y fecha límite, también si el proceso se reinicia o muere; si la
+  fecha cambia, la tarea vuelve a tener avisos pendientes. Solo el envío por
+  WebSocket va después del commit y se pierde si el proceso muere entre
+  ambos: el aviso sigue en el listado de notificaciones.
+"""
+import asyncio
+import heapq
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .live import REMINDERS_GROUP
+from .models import OPEN_TASK_STATUSES, Task
+from .notifications import build_event, create_notifications, push_notifications
+
+
+logger = logging.getLogger(__name__)
+
+DUE_SOON = 'due_soon'
+OVERDUE = 'overdue'
+NOTIFIED_FIELDS = {DUE_SOON: 'due_soon_notified_for', OVERDUE: 'overdue_notified_for'}
+
+# Segundos; se sobrescriben con settings.REMINDERS
+DEFAULTS = {
+    # Antelación del aviso 'vence pronto'
+    'DUE_SOON': 24 * 3600,
+    # Avisos que se mantienen en memoria
+    'HORIZON': 3600,
+    # Al arrancar, tareas vencidas hace menos de esto que aún no se avisaron
+    'CATCH_UP': 24 * 3600,
+    'RESYNC_INTERVAL': 15 * 60,
+    'BATCH_SIZE': 500,
+}
+
+
+def claim(kind, task_ids, now, due_soon):
+    """
+    Tareas de `task_ids` a las que aún corresponde el aviso `kind`, marcadas
+    como avisadas. Llamar dentro de una transacción; con PostgreSQL las filas
+    quedan bloqueadas y otro programador se las salta.
+    """
+    tasks = Task.objects.filter(pk__in=task_ids, status__in=OPEN_TASK_STATUSES, due_date__isnull=False)
+    if kind == DUE_SOON:
+        tasks = tasks.filter(due_date__gt=now, due_date__lte=now + due_soon)
+    else:
+        tasks = tasks.filter(due_date__lte=now)
+    field = NOTIFIED_FIELDS[kind]
+    claimed = [
+        task for task in
+        tasks.select_related('project', 'assigned_to').select_for_update(skip_locked=True, of=('self',))
+        if getattr(task, field) != task.due_date
+    ]
+    for task in claimed:
+        # La fecha leída, no F('due_date'): un cambio concurrente deja pendiente la nueva
+        setattr(task, field, task.due_date)
+    Task.objects.bulk_update(claimed, [field])
+    return claimed
+
+
+def _local(moment):
+    return timezone.localtime(moment).strftime('%d/%m/%Y %H:%M')
+
+
+def reminder_events(kind, tasks):
+    """Eventos de notificación: uno por usuario asignado y lote"""
+    by_assignee = defaultdict(list)
+    for task in tasks:
+        by_assignee[task.assigned_to_id].append(task)
+
+    events = []
+    for assigned in by_assignee.values():
+        task = assigned[0]
+        if kind == DUE_SOON:
+            title = 'Tarea próxima a vencer'
+            message = (
+                f'La tarea "{task.title}" vence el {_local(task.due_date)}' if len(assigned) == 1
+                else f'Tienes {len(assigned)} tareas próximas a vencer'
+            )
+        else:
+            title = 'Tarea vencida'
+            message = (
+                f'La tarea "{task.title}" venció el {_local(task.due_date)}' if len(assigned) == 1
+                else f'Tienes {len(assigned)} tareas vencidas'
+            )
+        projects = {item.project_id for item in assigned}
+        events.append(build_event(
+            task.assigned_to,
+            f'task_{kind}',
+            title,
+            message,
+            project=task.project if len(projects) == 1 else None,
+            task=task if len(assigned) == 1 else None,
+        ))
+    return events
+
+
+class ReminderScheduler:
+    """
+    Montículo de avisos (momento, tarea, tipo, fecha límite) hasta
+    `loaded_until`. `deadlines` guarda la fecha límite vigente de cada tarea:
+    una entrada con otra fecha es obsoleta.
+    """
+
+    def __init__(self, due_soon=DEFAULTS['DUE_SOON'], horizon=DEFAULTS['HORIZON'],
+                 catch_up=DEFAULTS['CATCH_UP'], resync_interval=DEFAULTS['RESYNC_INTERVAL'],
+                 batch_size=DEFAULTS['BATCH_SIZE']):
+        self.due_soon = timedelta(seconds=due_soon)
+        self.horizon = timedelta(seconds=horizon)
+        self.catch_up = timedelta(seconds=catch_up)
+        self.resync_interval = timedelta(seconds=resync_interval)
+        self.batch_size = batch_size
+        self.heap = []
+        self.queued = set()
+        self.deadlines = {}
+        self.loaded_until = None
+        self.resync_at = None
+
+    @classmethod
+    def from_settings(cls):
+        config = {**DEFAULTS, **getattr(settings, 'REMINDERS', {})}
+        return cls(**{key.lower(): value for key, value in config.items()})
+
+    # Montículo
+
+    def fire_time(self, kind, due_date):
+        return due_date - self.due_soon if kind == DUE_SOON else due_date
+
+    def schedule(self, task_id, due_date, notified=()):
+        """Apunta la fecha límite vigente y encola sus avisos que caen en la ventana"""
+        self.deadlines[task_id] = due_date
+        for kind in (DUE_SOON, OVERDUE):
+            entry = (task_id, kind, due_date)
+            fire_at = self.fire_time(kind, due_date)
+            if kind in notified or entry in self.queued or fire_at > self.loaded_until:
+                continue
+            self.queued.add(entry)
+            heapq.heappush(self.heap, (fire_at, task_id, kind, due_date))
+
+    def apply_deltas(self, deltas, now):
+        """Deltas de tareas de live.py: altas, cambios de fecha o de estado y borrados"""
+        floor = now - self.catch_up
+        for delta in deltas:
+            task_id = delta['id']
+            due_date = parse_datetime(delta['due_date']) if delta.get('due_date') else None
+            if due_date is None or delta.get('status') not in OPEN_TASK_STATUSES or due_date <= floor:
+                self.deadlines.pop(task_id, None)
+            elif self.deadlines.get(task_id) != due_date:
+                self.schedule(task_id, due_date)
+
+    def next_time(self):
+        """Momento del próximo aviso vigente, o None"""
+        while self.heap:
+            _, task_id, kind, due_date = self.heap[0]
+            if self.deadlines.get(task_id) == due_date:
+                return self.heap[0][0]
+            heapq.heappop(self.heap)
+            self.queued.discard((task_id, kind, due_date))
+        return None
+
+    def pop_due(self, now):
+        """Hasta batch_size avisos vigentes con momento <= now, por tipo"""
+        batch = defaultdict(list)
+        count = 0
+        while self.heap and self.heap[0][0] <= now and count < self.batch_size:
+            _, task_id, kind, due_date = heapq.heappop(self.heap)
+            self.queued.discard((task_id, kind, due_date))
+            if self.deadlines.get(task_id) != due_date:
+                continue
+            if kind == DUE_SOON and due_date <= now:
+                # Ya vencida: solo corresponde el aviso de vencida
+                continue
+            if kind == OVERDUE:
+                # Último aviso de esta fecha límite
+                del self.deadlines[task_id]
+            batch[kind].append(task_id)
+            count += 1
+        return batch
+
+    # Base de datos
+
+    def load(self, start, end):
+        """Tareas abiertas con fecha límite en (start, end]: un rango de índice sobre due_date"""
+        rows = Task.objects.filter(
+            status__in=OPEN_TASK_STATUSES, due_date__isnull=False, due_date__gt=start, due_date__lte=end,
+        ).order_by().values_list('id', 'due_date', 'due_soon_notified_for', 'overdue_notified_for')
+        for task_id, due_date, due_soon_for, overdue_for in rows.iterator(chunk_size=2000):
+            notified = {
+                kind for kind, notified_for in ((DUE_SOON, due_soon_for), (OVERDUE, overdue_for))
+                if notified_for == due_date
+            }
+            if len(notified) < 2:
+                self.schedule(task_id, due_date, notified)
+
+    def refresh(self, now):
+        """Carga inicial y resincronización: rehace el montículo con la ventana completa"""
+        self.heap, self.queued, self.deadlines = [], set(), {}
+        self.loaded_until = now + self.horizon
+        self.load(now - self.catch_up, self.loaded_until + self.due_soon)
+        self.resync_at = now + self.resync_interval
+
+    def extend(self, now):
+        """Amplía la ventana cuando le queda la mitad del horizonte; carga solo el tramo nuevo"""
+        if self.loaded_until - now > self.horizon / 2:
+            return
+        start, self.loaded_until = self.loaded_until, now + self.horizon
+        # Avisos de vencida y de 'vence pronto' que entran en la ventana
+        self.load(start, self.loaded_until)
+        self.load(start + self.due_soon, self.loaded_until + self.due_soon)
+
+    def fire(self, now):
+        """Envía los avisos con momento <= now; devuelve cuántas tareas se avisaron"""
+        sent = 0
+        while batch := self.pop_due(now):
+            for kind, task_ids in batch.items():
+                with transaction.atomic():
+                    tasks = claim(kind, task_ids, now, self.due_soon)
+                    notifications, events = create_notifications(reminder_events(kind, tasks))
+                    if notifications:
+                        transaction.on_commit(partial(push_notifications, notifications, events))
+                if tasks:
+                    logger.debug("Avisos %s enviados para %s tareas", kind, len(tasks))
+                sent += len(tasks)
+        return sent
+
+    def tick(self, now):
+        """Resincroniza o amplía la ventana si toca y envía los avisos pendientes"""
+        if self.resync_at is None or now >= self.resync_at:
+            self.refresh(now)
+        else:
+            self.extend(now)
+        return self.fire(now)
+
+    def timeout(self, now):
+        """Segundos hasta el próximo aviso, ampliación de ventana o resincronización"""
+        wake = min(self.resync_at, self.loaded_until - self.horizon / 2)
+        next_time = self.next_time()
+        if next_time is not None:
+            wake = min(wake, next_time)
+        return max((wake - now).total_seconds(), 0)
+
+    # Proceso
+
+    async def run(self):
+        """Bucle del proceso: duerme en el channel layer hasta el siguiente plazo o mensaje"""
+        channel_layer = get_channel_layer()
+        channel = await channel_layer.new_channel()
+        # Antes de la carga inicial, para no perder escrituras entre ambas
+        await channel_layer.group_add(REMINDERS_GROUP, channel)
+        tick = database_sync_to_async(self.tick)
+        try:
+            while True:
+                resync = self.resync_at is None or timezone.now() >= self.resync_at
+                if resync and self.resync_at is not None:
+                    # La pertenencia a grupos caduca (group_expiry del channel layer)
+                    await channel_layer.group_add(REMINDERS_GROUP, channel)
+                await tick(timezone.now())
+                try:
+                    message = await asyncio.wait_for(
+                        channel_layer.receive(channel), self.timeout(timezone.now())
+                    )
+                except asyncio.TimeoutError:
+                    continue
+                if message.get('type') == 'task_deltas':
+                    self.apply_deltas(message['deltas'], timezone.now())
+        finally:
+            await channel_layer.group_discard(REMINDERS_GROUP, channel)
@@ -0,0 +1,111 @@
+"""
+Renderer y parser JSON de alto rendimiento
+
+Usan orjson cuando está instalado y, si no, se comportan exactamente como
+los de DRF (json de la biblioteca estándar). Se activan en
+REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] / ['DEFAULT_PARSER_CLASSES'].
+
+La salida equivale a la de JSONRenderer: fechas, Decimal, cadenas perezosas
+y demás tipos no nativos pasan por el mismo JSONEncoder.default de DRF, el
+JSON es compacto, sin escapar caracteres no ASCII, y con \\u2028 y \\u2029
+escapados. Lo que orjson no sabe representar igual (enteros de más de 64
+bits, indentación distinta de la compacta, opciones de DRF no por defecto) se
+delega al renderer estándar, y también los floats no finitos: orjson los
+escribiría como null y DRF (strict) lanza ValueError.
+
+Única diferencia textual: los floats que Python escribe con exponente salen
+en la forma más corta de orjson (1e16 en lugar de 1e+16, 1e-7 en lugar de
+1e-07); el valor numérico es el mismo.
+"""
+import math
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+    ORJSON_ERRORS = (orjson.JSONEncodeError,)
+else:
+    ORJSON_OPTIONS = 0
+    ORJSON_ERRORS = ()
+
+LINE_SEPARATOR = '\u2028'.encode()
+PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+def _all_finite(data):
+    """Ningún float NaN o infinito dentro de `data` (dicts, listas y tuplas)"""
+    if type(data) is float:
+        return math.isfinite(data)
+    # ReturnDict / ReturnList de los serializers son subclases
+    if isinstance(data, dict):
+        return all(map(_all_finite, data.values()))
+    if isinstance(data, (list, tuple)):
+        return all(map(_all_finite, data))
+    return True
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer que serializa con orjson cuando puede dar la misma salida"""
+
+    def __init__(self):
+        self._default = self.encoder_class().default
+
+    def uses_orjson(self, indent):
+        return (
+            orjson is not None and indent is None and
+            self.compact and self.strict and not self.ensure_ascii
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if not self.uses_orjson(indent):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._default, option=ORJSON_OPTIONS)
+        except ORJSON_ERRORS:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Un float no finito solo puede haber salido como null: solo entonces se recorre
+        if b'null' in ret and not _all_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Igual que JSONRenderer: JSON que también es JavaScript válido
+        if LINE_SEPARATOR in ret:
+            ret = ret.replace(LINE_SEPARATOR, b'\\u2028')
+        if PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser que decodifica con orjson las peticiones en UTF-8"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+
+def default_renderer():
+    """Instancia del primer renderer configurado, para respuestas generadas a mano"""
+    return api_settings.DEFAULT_RENDERER_CLASSES[0]()
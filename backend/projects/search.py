@@ -0,0 +1,249 @@
+"""
+Búsqueda de texto en proyectos, tareas y comentarios
+
+Cada objeto tiene un SearchDocument (título, cuerpo e ids para la
+visibilidad) que las señales mantienen al guardar y borrar; los documentos
+de tareas y comentarios desaparecen en cascada con su proyecto o su tarea.
+El índice de texto lo mantiene la base de datos a partir de esa tabla:
+
+- SQLite: tabla FTS5 `search_documents_fts` de contenido externo, con
+  triggers; el ranking es bm25 con el título pesando más que el cuerpo.
+- PostgreSQL: columna generada `search_vector` (título con peso A, cuerpo
+  con peso B) con índice GIN; el ranking es ts_rank.
+
+La visibilidad es la de los listados: proyectos de visible_to(), tareas
+asignadas al usuario en proyectos de los que es miembro y comentarios de
+tareas que puede ver (task_comments). Los administradores lo ven todo.
+"""
+import re
+from itertools import islice
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+from .models import Project, SearchDocument, Task
+
+
+SEARCH_CONFIG = 'spanish'
+MAX_QUERY_TERMS = 8
+EXCERPT_LENGTH = 200
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+
+# Documentos
+
+def project_document(project):
+    return SearchDocument(
+        kind='project', object_id=project.pk, project_id=project.pk,
+        title=project.name, body=project.description or '',
+    )
+
+
+def task_document(task):
+    return SearchDocument(
+        kind='task', object_id=task.pk, project_id=task.project_id, task_id=task.pk,
+        title=task.title, body=task.description or '',
+    )
+
+
+def comment_document(comment, project_id):
+    return SearchDocument(
+        kind='comment', object_id=comment.pk, project_id=project_id, task_id=comment.task_id,
+        body=comment.content,
+    )
+
+
+def index_documents(documents):
+    """
+    Inserta o actualiza documentos: un UPDATE por documento y un solo
+    bulk_create para los que no existían. El índice de texto solo se
+    recalcula si cambia el texto.
+    """
+    missing = []
+    for document in documents:
+        updated = SearchDocument.objects.filter(
+            kind=document.kind, object_id=document.object_id
+        ).update(
+            project_id=document.project_id, task_id=document.task_id,
+            title=document.title, body=document.body,
+        )
+        if not updated:
+            missing.append(document)
+    if missing:
+        SearchDocument.objects.bulk_create(missing, ignore_conflicts=True)
+
+
+def add_documents(documents, batch_size=2000):
+    """
+    Inserta documentos de objetos recién creados (sin comprobar si existen),
+    por lotes para no materializar un iterable grande
+    """
+    documents = iter(documents)
+    while batch := list(islice(documents, batch_size)):
+        SearchDocument.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def remove_document(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def remove_documents(kind, object_ids):
+    SearchDocument.objects.filter(kind=kind, object_id__in=object_ids).delete()
+
+
+def move_task_comments(task_id, project_id):
+    """Los comentarios de una tarea movida pasan a su nuevo proyecto"""
+    SearchDocument.objects.filter(kind='comment', task_id=task_id).update(project_id=project_id)
+
+
+# Consultas
+
+def query_terms(text):
+    """Palabras de la consulta, sin operadores del motor (se buscan todas)"""
+    return re.findall(r'\w+', text.lower())[:MAX_QUERY_TERMS]
+
+
+class SQLiteSearchBackend:
+    """FTS5 con bm25; el último término se busca también como prefijo"""
+
+    def match(self, terms):
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def sql(self, where):
+        return f"""
+            SELECT d.kind, d.object_id, d.project_id, d.task_id, d.title, d.body, t.title,
+                   -bm25(search_documents_fts, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score
+            FROM search_documents_fts
+            JOIN search_documents d ON d.id = search_documents_fts.rowid
+            LEFT JOIN tasks t ON t.id = d.task_id
+            WHERE search_documents_fts MATCH %s {where}
+            ORDER BY score DESC, d.id
+            LIMIT %s OFFSET %s
+        """
+
+
+class PostgreSQLSearchBackend:
+    """tsvector + GIN con ts_rank; el último término se busca también como prefijo"""
+
+    def match(self, terms):
+        return ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+
+    def sql(self, where):
+        return f"""
+            SELECT d.kind, d.object_id, d.project_id, d.task_id, d.title, d.body, t.title,
+                   ts_rank(d.search_vector, query, 1) AS score
+            FROM search_documents d
+            CROSS JOIN to_tsquery('{SEARCH_CONFIG}', %s) query
+            LEFT JOIN tasks t ON t.id = d.task_id
+            WHERE d.search_vector @@ query {where}
+            ORDER BY score DESC, d.id
+            LIMIT %s OFFSET %s
+        """
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend,
+}
+
+
+def get_backend():
+    try:
+        return BACKENDS[connection.vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(f'No hay búsqueda de texto para la base de datos {connection.vendor}')
+
+
+def _in(column, values):
+    """`column IN (...)` con parámetros; falso si no hay valores"""
+    values = list(values)
+    if not values:
+        return '0 = 1', []
+    return f"{column} IN ({', '.join(['%s'] * len(values))})", values
+
+
+def visibility_filter(user, member_project_ids):
+    """Condición SQL (y parámetros) con las reglas de visibilidad de los listados"""
+    if user.is_superuser or user.is_admin():
+        return '', []
+
+    visible_sql, visible_params = _in(
+        'd.project_id', Project.objects.visible_to(user).values_list('pk', flat=True)
+    )
+    member_sql, member_params = _in('d.project_id', member_project_ids)
+    sql = f"""(
+        (d.kind = 'project' AND {visible_sql})
+        OR (d.kind = 'task' AND t.assigned_to_id = %s AND {member_sql})
+        OR (d.kind = 'comment' AND (t.assigned_to_id = %s OR t.created_by_id = %s OR {visible_sql}))
+    )"""
+    return sql, [*visible_params, user.id, *member_params, user.id, user.id, *visible_params]
+
+
+def search_documents(user, member_project_ids, text, kinds=None, project_id=None, limit=20, offset=0):
+    """
+    Documentos visibles para `user` que contienen todas las palabras de
+    `text`, de mayor a menor relevancia. Devuelve como mucho `limit` hits.
+    """
+    terms = query_terms(text)
+    if not terms:
+        return []
+
+    backend = get_backend()
+    conditions, params = [], []
+    visibility_sql, visibility_params = visibility_filter(user, member_project_ids)
+    if visibility_sql:
+        conditions.append(visibility_sql)
+        params.extend(visibility_params)
+    if kinds:
+        kinds_sql, kinds_params = _in('d.kind', kinds)
+        conditions.append(kinds_sql)
+        params.extend(kinds_params)
+    if project_id is not None:
+        conditions.append('d.project_id = %s')
+        params.append(project_id)
+
+    where = ''.join(f' AND {condition}' for condition in conditions)
+    with connection.cursor() as cursor:
+        cursor.execute(backend.sql(where), [backend.match(terms), *params, limit, offset])
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'type': kind,
+            'id': object_id,
+            'project': row_project_id,
+            'task': task_id,
+            'title': title if kind != 'comment' else task_title,
+            'excerpt': body[:EXCERPT_LENGTH],
+            'rank': round(score, 4),
+        }
+        for kind, object_id, row_project_id, task_id, title, body, task_title, score in rows
+    ]
+
+
+def rebuild_index(batch_size=2000):
+    """Reconstruye todos los documentos desde las tablas (tras cargas masivas)"""
+    from .models import TaskComment
+
+    SearchDocument.objects.all().delete()
+    add_documents(
+        (project_document(project) for project in Project.objects.only('id', 'name', 'description').iterator()),
+        batch_size,
+    )
+    add_documents(
+        (task_document(task) for task in
+         Task.objects.only('id', 'project_id', 'title', 'description').iterator(chunk_size=batch_size)),
+        batch_size,
+    )
+    add_documents(
+        (comment_document(comment, project_id) for comment, project_id in (
+            (comment, comment.task.project_id) for comment in
+            TaskComment.objects.select_related('task').only('id', 'task_id', 'content', 'task__project_id')
+            .iterator(chunk_size=batch_size)
+        )),
+        batch_size,
+    )
+    return SearchDocument.objects.count()
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.utils import timezone
 from accounts.models import User
@@ -45,11 +46,13 @@ class ProjectSerializer(serializers.ModelSerializer):
     
     def get_members_count(self, obj):
         """Retorna el número de miembros del proyecto"""
+        if hasattr(obj, 'members_count'):
+            return obj.members_count
         return obj.members.count()
     
     def get_tasks_count(self, obj):
         """Retorna el número de tareas del proyecto"""
-        return obj.tasks.count()
+        return obj.tasks_total
     
     def get_can_user_edit(self, obj):
         """Verifica si el usuario puede editar el proyecto"""
@@ -141,6 +144,71 @@ class TaskSerializer(serializers.ModelSerializer):
         return super().update(instance, validated_data)
 
 
+class TaskListFastSerializer:
+    """
+    Serialización de solo lectura para listas de tareas
+    Produce exactamente la salida de TaskSerializer a partir de filas de
+    `.values()`, sin instanciar modelos ni campos DRF por fila: etiquetas de
+    estado y prioridad precalculadas y un único `now` para is_overdue
+    """
+    value_fields = [
+        'id', 'title', 'description', 'status', 'priority', 'due_date', 'completed_at',
+        'project_id', 'project__name',
+        'assigned_to_id', 'assigned_to__first_name', 'assigned_to__last_name',
+        'created_by_id', 'created_by__first_name', 'created_by__last_name',
+        'created_at', 'updated_at',
+    ]
+    status_labels = {value: str(label) for value, label in Task.STATUS_CHOICES}
+    priority_labels = {value: str(label) for value, label in Task.PRIORITY_CHOICES}
+    
+    def __init__(self, rows, now=None):
+        self.rows = rows
+        self.now = now or timezone.now()
+        # Mismo formato de fechas que TaskSerializer (zona horaria y sufijo Z),
+        # resolviendo la zona horaria actual una sola vez y no en cada campo
+        self.format_datetime = serializers.DateTimeField(
+            default_timezone=timezone.get_current_timezone() if settings.USE_TZ else None
+        ).to_representation
+    
+    @classmethod
+    def values(cls, queryset):
+        """Filas que espera este serializer"""
+        return queryset.values(*cls.value_fields)
+    
+    def to_representation(self, row):
+        format_datetime = self.format_datetime
+        due_date = row['due_date']
+        completed_at = row['completed_at']
+        status = row['status']
+        return {
+            'id': row['id'],
+            'title': row['title'],
+            'description': row['description'],
+            'status': status,
+            'status_display': self.status_labels.get(status, status),
+            'priority': row['priority'],
+            'priority_display': self.priority_labels.get(row['priority'], row['priority']),
+            'due_date': format_datetime(due_date) if due_date is not None else None,
+            'completed_at': format_datetime(completed_at) if completed_at is not None else None,
+            'project': row['project_id'],
+            'project_name': row['project__name'],
+            'assigned_to': row['assigned_to_id'],
+            'assigned_to_name': f"{row['assigned_to__first_name']} {row['assigned_to__last_name']}".strip(),
+            'created_by': row['created_by_id'],
+            'created_by_name': f"{row['created_by__first_name']} {row['created_by__last_name']}".strip(),
+            'is_overdue': bool(due_date) and status != 'completed' and self.now > due_date,
+            'created_at': format_datetime(row['created_at']),
+            'updated_at': format_datetime(row['updated_at']),
+        }
+    
+    def __iter__(self):
+        return map(self.to_representation, self.rows)
+    
+    @property
+    def data(self):
+        return list(self)
+
+
 class TaskStatusUpdateSerializer(serializers.ModelSerializer):
     """
     Serializer para que los usuarios asignados puedan actualizar solo el estado de la tarea
@@ -159,6 +227,59 @@ class TaskStatusUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
+class TaskBulkCreateItemSerializer(serializers.Serializer):
+    """
+    Serializer para cada tarea de una creación masiva
+    Las claves foráneas se validan como enteros y se resuelven en bloque
+    """
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, default='pending')
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, default='medium')
+    due_date = serializers.DateTimeField(required=False, allow_null=True, default=None)
+    project = serializers.IntegerField()
+    assigned_to = serializers.IntegerField(required=False)
+
+
+class TaskBulkSerializer(serializers.Serializer):
+    """
+    Serializer para operaciones masivas sobre tareas
+    Una acción por petición: create, update_status, reassign o delete
+    """
+    ACTION_CHOICES = ['create', 'update_status', 'reassign', 'delete']
+    MAX_TASKS = 1000
+    
+    action = serializers.ChoiceField(choices=ACTION_CHOICES)
+    tasks = TaskBulkCreateItemSerializer(many=True, required=False)
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    assigned_to = serializers.IntegerField(required=False)
+    
+    def validate(self, attrs):
+        """Valida que cada acción reciba los datos que necesita"""
+        action = attrs['action']
+        required = {
+            'create': ['tasks'],
+            'update_status': ['ids', 'status'],
+            'reassign': ['ids', 'assigned_to'],
+            'delete': ['ids'],
+        }[action]
+        missing = [field for field in required if not attrs.get(field)]
+        if missing:
+            raise serializers.ValidationError(
+                {field: f"Este campo es obligatorio para la acción '{action}'." for field in missing}
+            )
+        
+        items = attrs.get('tasks') if action == 'create' else attrs.get('ids')
+        if len(items) > self.MAX_TASKS:
+            raise serializers.ValidationError(
+                f"Solo se pueden procesar {self.MAX_TASKS} tareas por petición."
+            )
+        if 'ids' in attrs:
+            attrs['ids'] = list(dict.fromkeys(attrs['ids']))
+        return attrs
+
+
 class TaskCommentSerializer(serializers.ModelSerializer):
     """
     Serializer para comentarios de tareas
@@ -0,0 +1,239 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import User
+from .access import invalidate_memberships
+from .caching import invalidate_projects
+from .dashboard import invalidate_dashboards, project_owner_cache_key, task_dashboard_users
+from .live import (
+    comment_delta, deleted_comment_delta, deleted_task_delta, notify_member_removed, publish,
+    remember_task_project, task_delta, task_project_id,
+)
+from .models import Project, ProjectMember, Task, TaskComment, bulk_task_deletion, tasks_deleted
+from .search import (
+    comment_document, index_documents, move_task_comments, project_document, remove_document,
+    remove_documents, task_document,
+)
+
+
+def _handled_in_bulk(kwargs):
+    """
+    Borrado que resuelven los receptores de lote: TaskQuerySet.delete() o la
+    cascada de un proyecto o un usuario (ver tasks_deleted_with_parent)
+    """
+    if bulk_task_deletion.get():
+        return True
+    origin = kwargs.get('origin')
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Project or model is User
+
+
+@receiver(post_delete, sender=Task)
+def discount_deleted_task(sender, instance, **kwargs):
+    """
+    Descuenta la tarea eliminada de los contadores de su proyecto.
+    TaskQuerySet.delete() y los borrados de proyectos y usuarios recuentan
+    una vez por lote.
+    """
+    if _handled_in_bulk(kwargs):
+        return
+    Project.apply_task_counter_delta(
+        instance.project_id,
+        {field: -value for field, value in instance.counter_values().items()}
+    )
+
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def invalidate_member_access(sender, instance, **kwargs):
+    """Las membresías en caché del usuario dejan de ser válidas"""
+    user_id = instance.user_id
+    invalidate_memberships(user_id)
+    # De nuevo tras el commit, por si otra petición recargó la caché antes
+    transaction.on_commit(lambda: invalidate_memberships(user_id))
+    invalidate_dashboards([user_id])
+    invalidate_projects([instance.project_id])
+
+
+@receiver(post_delete, sender=ProjectMember)
+def revoke_live_updates(sender, instance, **kwargs):
+    """Las conexiones en vivo del usuario retirado vuelven a comprobar su acceso"""
+    notify_member_removed(instance.project_id, instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_dashboards(sender, instance, **kwargs):
+    """Dashboards del asignado (actual y anterior) y del propietario del proyecto"""
+    if _handled_in_bulk(kwargs):
+        return
+    invalidate_dashboards(task_dashboard_users([instance]))
+    instance._loaded_assigned_to_id = instance.assigned_to_id
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_task_projects(sender, instance, **kwargs):
+    """
+    Estadísticas del proyecto (y del anterior, si cambió). Las listas de
+    proyectos solo muestran los contadores, así que se invalidan únicamente
+    si la tarea los modifica; post_save llega antes de actualizar la instantánea.
+    """
+    if _handled_in_bulk(kwargs):
+        return
+    snapshot = getattr(instance, '_counter_snapshot', None)
+    counters_changed = (
+        kwargs.get('created', True) or snapshot is None or
+        snapshot != (instance.project_id, instance.counter_values())
+    )
+    invalidate_projects(
+        [instance.project_id, snapshot[0] if snapshot else None], lists=counters_changed
+    )
+
+
+@receiver(post_save, sender=Task)
+def publish_task_saved(sender, instance, created, **kwargs):
+    """
+    Delta para el tablero del proyecto; si la tarea cambió de proyecto, el
+    anterior la recibe como eliminada
+    """
+    snapshot = getattr(instance, '_counter_snapshot', None)
+    previous_project_id = snapshot[0] if snapshot and not created else None
+    if previous_project_id is not None and previous_project_id != instance.project_id:
+        publish(previous_project_id, task_delta(instance, 'deleted'))
+        remember_task_project(instance)
+    elif created:
+        remember_task_project(instance)
+    publish(instance.project_id, task_delta(instance, 'created' if created else 'updated'))
+
+
+@receiver(post_delete, sender=Task)
+def publish_task_deleted(sender, instance, **kwargs):
+    if _handled_in_bulk(kwargs):
+        return
+    publish(instance.project_id, task_delta(instance, 'deleted'))
+
+
+@receiver(tasks_deleted, sender=Task)
+def tasks_deleted_in_bulk(sender, rows, **kwargs):
+    """
+    Lo que hacen los post_delete de cada tarea, una vez por lote: dashboards
+    de asignados y propietarios y deltas en vivo de los proyectos que siguen
+    existiendo. Los contadores ya se recontaron y los documentos de búsqueda
+    de las tareas y sus comentarios se borran en cascada.
+    """
+    project_ids = {project_id for _, project_id, _ in rows}
+    owners = dict(Project.objects.filter(pk__in=project_ids).values_list('pk', 'owner_id'))
+    invalidate_dashboards({assigned_to_id for _, _, assigned_to_id in rows} | set(owners.values()))
+    for task_id, project_id, _ in rows:
+        if project_id in owners:
+            publish(project_id, deleted_task_delta(task_id))
+
+
+def _task_rows(tasks):
+    return list(tasks.order_by().values_list('pk', 'project_id', 'assigned_to_id'))
+
+
+@receiver(pre_delete, sender=Project)
+def collect_project_tasks(sender, instance, **kwargs):
+    """Tareas que se borrarán en cascada con el proyecto, para tratarlas en bloque"""
+    instance._deleted_task_rows = _task_rows(Task.objects.filter(project_id=instance.pk))
+
+
+@receiver(pre_delete, sender=User)
+def collect_user_tasks(sender, instance, **kwargs):
+    """Tareas y comentarios que se borrarán en cascada con el usuario, para tratarlos en bloque"""
+    instance._deleted_task_rows = _task_rows(
+        Task.objects.filter(Q(assigned_to_id=instance.pk) | Q(created_by_id=instance.pk))
+    )
+    instance._deleted_comment_rows = list(
+        TaskComment.objects.filter(author_id=instance.pk).values_list('pk', 'task_id', 'task__project_id')
+    )
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=User)
+def tasks_deleted_with_parent(sender, instance, **kwargs):
+    """
+    En lugar de los post_delete de cada tarea y comentario de la cascada:
+    recuento de los proyectos que quedan, tasks_deleted y, para los
+    comentarios de un usuario, sus documentos de búsqueda y deltas
+    """
+    rows = getattr(instance, '_deleted_task_rows', [])
+    if sender is Project:
+        # Sus contadores desaparecen con él
+        if rows:
+            tasks_deleted.send(sender=Task, rows=rows)
+    else:
+        Task.objects.tasks_deleted(rows)
+
+    comments = getattr(instance, '_deleted_comment_rows', [])
+    if comments:
+        remove_documents('comment', [comment_id for comment_id, _, _ in comments])
+        project_ids = set(Project.objects.filter(
+            pk__in={project_id for _, _, project_id in comments}
+        ).values_list('pk', flat=True))
+        for comment_id, task_id, project_id in comments:
+            if project_id in project_ids:
+                publish(project_id, deleted_comment_delta(comment_id, task_id))
+
+
+@receiver(post_save, sender=TaskComment)
+def publish_comment_saved(sender, instance, created, **kwargs):
+    publish(task_project_id(instance), comment_delta(instance, 'created' if created else 'updated'))
+
+
+@receiver(post_delete, sender=TaskComment)
+def publish_comment_deleted(sender, instance, **kwargs):
+    if _handled_in_bulk(kwargs):
+        return
+    publish(task_project_id(instance), comment_delta(instance, 'deleted'))
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_project_caches(sender, instance, **kwargs):
+    """
+    Dashboard del propietario (proyectos recientes) y de los asignados a sus
+    tareas pendientes, que muestran el nombre del proyecto
+    """
+    cache.delete(project_owner_cache_key(instance.pk))
+    user_ids = {instance.owner_id}
+    if kwargs.get('created') is False:
+        # Actualización (en un borrado las tareas ya se eliminaron en cascada)
+        user_ids.update(
+            Task.objects.filter(project=instance).order_by()
+            .values_list('assigned_to_id', flat=True).distinct()
+        )
+    invalidate_dashboards(user_ids)
+    invalidate_projects([instance.pk])
+
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, **kwargs):
+    index_documents([project_document(instance)])
+
+
+@receiver(post_save, sender=Task)
+def index_task(sender, instance, created, **kwargs):
+    """Documento de la tarea; si cambió de proyecto, también los de sus comentarios"""
+    index_documents([task_document(instance)])
+    snapshot = getattr(instance, '_counter_snapshot', None)
+    if not created and snapshot and snapshot[0] != instance.project_id:
+        move_task_comments(instance.pk, instance.project_id)
+
+
+@receiver(post_save, sender=TaskComment)
+def index_comment(sender, instance, **kwargs):
+    index_documents([comment_document(instance, task_project_id(instance))])
+
+
+@receiver(post_delete, sender=TaskComment)
+def unindex_comment(sender, instance, **kwargs):
+    """Los documentos de proyectos y tareas se borran en cascada"""
+    if _handled_in_bulk(kwargs):
+        return
+    remove_document('comment', instance.pk)
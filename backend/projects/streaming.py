@@ -0,0 +1,61 @@
+"""
+Respuestas en streaming que no se materializan bajo ASGI
+
+Con un iterador síncrono, StreamingHttpResponse bajo ASGI (daphne) lo
+consume entero con sync_to_async(list) antes de enviar el primer byte. Bajo
+ASGI se le pasa en su lugar un generador asíncrono que pide cada bloque al
+generador síncrono en el hilo de la petición (thread_sensitive, el de su
+conexión a la base de datos), así que en memoria solo hay un bloque cada vez.
+Los generadores que producen piezas pequeñas se agrupan antes con buffered()
+para no pagar un salto de hilo por pieza.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+
+STREAM_BUFFER_SIZE = 64 * 1024
+
+_END = object()
+
+
+def buffered(chunks, size=STREAM_BUFFER_SIZE):
+    """Agrupa las piezas en bloques de unos `size` bytes para el servidor"""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield b''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def _next_chunk(iterator):
+    return next(iterator, _END)
+
+
+def _close(iterator):
+    close = getattr(iterator, 'close', None)
+    if close is not None:
+        close()
+
+
+async def async_chunks(chunks):
+    """Bloques de un iterable síncrono, obtenidos de uno en uno fuera del event loop"""
+    iterator = iter(chunks)
+    next_chunk = sync_to_async(_next_chunk, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(iterator)) is not _END:
+            yield chunk
+    finally:
+        # Cliente desconectado a medias: libera el cursor en su hilo
+        await sync_to_async(_close, thread_sensitive=True)(iterator)
+
+
+def streaming_response(request, chunks, **kwargs):
+    """StreamingHttpResponse con un iterador asíncrono si la petición llega por ASGI"""
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        chunks = async_chunks(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
@@ -1,3 +1,2215 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+import asyncio
+import json
+import os
+import threading
+import time
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .access import ProjectAccess
+from .benchmarking import (
+    api_scenarios, benchmark_actors, compare_query_counts, named_routes, run_scenario, seed_dataset,
+)
+from .caching import cached, invalidate
+from .models import Notification, Project, ProjectMember, Task, TaskComment
+from .notifications import get_backend
+
+
+class APITestCase(TestCase):
+    """Base para tests de la API: cliente nuevo y caché vacía en cada test"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+
+class ProjectListQueryCountTests(APITestCase):
+    """Regresión de consultas para el listado de proyectos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        cls.collaborator = User.objects.create_user(
+            'colab', 'colab@example.com', 'pass', role='collaborator'
+        )
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+
+    def create_projects(self, count):
+        for index in range(count):
+            project = Project.objects.create(
+                name=f'Proyecto {index}',
+                start_date=date(2024, 1, 1),
+                owner=self.collaborator,
+            )
+            ProjectMember.objects.create(project=project, user=self.viewer)
+            for task_index in range(3):
+                Task.objects.create(
+                    title=f'Tarea {task_index}',
+                    project=project,
+                    assigned_to=self.viewer,
+                    created_by=self.collaborator,
+                    status='completed' if task_index == 0 else 'pending',
+                )
+
+    def list_projects(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('projects:project_list'))
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.create_projects(2)
+        # Conteo de la paginación + página de proyectos
+        with self.assertNumQueries(2):
+            self.list_projects(self.collaborator)
+
+        self.create_projects(15)
+        with self.assertNumQueries(2):
+            results = self.list_projects(self.collaborator)
+        self.assertEqual(len(results), 17)
+
+    def test_annotated_counters_match_relations(self):
+        self.create_projects(1)
+        project = self.list_projects(self.viewer)[0]
+        self.assertEqual(project['members_count'], 1)
+        self.assertEqual(project['tasks_count'], 3)
+        self.assertEqual(project['progress_percentage'], 33.33)
+        self.assertEqual(project['owner_name'], self.collaborator.full_name)
+
+    def test_visibility_by_role(self):
+        self.create_projects(2)
+        Project.objects.create(name='Ajeno', start_date=date(2024, 1, 1), owner=self.admin)
+        self.assertEqual(len(self.list_projects(self.admin)), 3)
+        self.assertEqual(len(self.list_projects(self.collaborator)), 2)
+        self.assertEqual(len(self.list_projects(self.viewer)), 2)
+
+
+class ProjectTaskCounterTests(TestCase):
+    """Sincronización de los contadores de tareas desnormalizados"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('colab', 'colab@example.com', 'pass', role='collaborator')
+
+    def setUp(self):
+        self.project = Project.objects.create(name='A', start_date=date(2024, 1, 1), owner=self.user)
+        self.other = Project.objects.create(name='B', start_date=date(2024, 1, 1), owner=self.user)
+
+    def create_task(self, project=None, **kwargs):
+        return Task.objects.create(
+            title='Tarea', project=project or self.project,
+            assigned_to=self.user, created_by=self.user, **kwargs
+        )
+
+    def assertCounters(self, project, total, completed, in_progress, overdue_eligible):
+        project.refresh_from_db()
+        self.assertEqual(
+            (project.tasks_total, project.tasks_completed,
+             project.tasks_in_progress, project.tasks_overdue_eligible),
+            (total, completed, in_progress, overdue_eligible)
+        )
+
+    def test_save_and_delete_keep_counters_in_sync(self):
+        task = self.create_task(due_date=timezone.now() + timedelta(days=1))
+        self.create_task(status='completed')
+        self.assertCounters(self.project, 2, 1, 0, 1)
+
+        task.status = 'in_progress'
+        task.save()
+        self.assertCounters(self.project, 2, 1, 1, 1)
+
+        task = Task.objects.get(pk=task.pk)
+        task.status = 'completed'
+        task.save()
+        self.assertCounters(self.project, 2, 2, 0, 0)
+        self.assertEqual(self.project.progress_percentage, 100)
+
+        task.project = self.other
+        task.save()
+        self.assertCounters(self.project, 1, 1, 0, 0)
+        self.assertCounters(self.other, 1, 1, 0, 0)
+
+        task.delete()
+        self.assertCounters(self.other, 0, 0, 0, 0)
+        Task.objects.filter(project=self.project).delete()
+        self.assertCounters(self.project, 0, 0, 0, 0)
+
+    def test_bulk_paths_keep_counters_in_sync(self):
+        tasks = Task.objects.bulk_create([
+            Task(title=f'T{index}', project=self.project,
+                 assigned_to=self.user, created_by=self.user)
+            for index in range(4)
+        ])
+        self.assertCounters(self.project, 4, 0, 0, 0)
+
+        Task.objects.filter(pk__in=[task.pk for task in tasks[:2]]).update(status='in_progress')
+        self.assertCounters(self.project, 4, 0, 2, 0)
+
+        for task in tasks:
+            task.project = self.other
+        Task.objects.bulk_update(tasks[:3], ['project'])
+        self.assertCounters(self.project, 1, 0, 0, 0)
+        self.assertCounters(self.other, 3, 0, 2, 0)
+
+    def test_repair_command_fixes_drift(self):
+        self.create_task(status='completed')
+        Project.objects.filter(pk=self.project.pk).update(tasks_total=7, tasks_completed=0)
+
+        output = StringIO()
+        call_command('repair_task_counters', '--dry-run', stdout=output)
+        self.assertIn(f'Proyecto {self.project.pk}', output.getvalue())
+        self.assertCounters(self.project, 7, 0, 0, 0)
+
+        call_command('repair_task_counters', stdout=StringIO())
+        self.assertCounters(self.project, 1, 1, 0, 0)
+
+    def test_stale_instances_do_not_double_count(self):
+        task = self.create_task()
+        first, second = Task.objects.get(pk=task.pk), Task.objects.get(pk=task.pk)
+        first.status = 'completed'
+        first.save()
+        second.status = 'completed'
+        second.save()
+        self.assertCounters(self.project, 1, 1, 0, 0)
+
+        # Un título no toca los contadores aunque la instancia tenga otro estado en memoria
+        first.status = 'pending'
+        first.title = 'Renombrada'
+        first.save(update_fields=['title'])
+        self.assertCounters(self.project, 1, 1, 0, 0)
+
+    def test_decrements_never_go_below_zero(self):
+        task = self.create_task(status='completed')
+        Project.objects.filter(pk=self.project.pk).update(tasks_total=0, tasks_completed=0)
+        task.delete()
+        self.assertCounters(self.project, 0, 0, 0, 0)
+
+    def test_project_save_does_not_overwrite_counters(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        self.create_task()
+        stale.name = 'Renombrado'
+        stale.save()
+        self.assertCounters(self.project, 1, 0, 0, 0)
+
+
+class ProjectStatsTests(APITestCase):
+    """Estadísticas de proyecto con consultas agregadas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('colab', 'colab@example.com', 'pass', role='collaborator')
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        cls.outsider = User.objects.create_user('otro', 'otro@example.com', 'pass', role='viewer')
+        cls.projects = [
+            Project.objects.create(name=f'P{index}', start_date=date(2024, 1, 1), owner=cls.owner)
+            for index in range(3)
+        ]
+        for project in cls.projects:
+            ProjectMember.objects.create(project=project, user=cls.viewer)
+            for status_value in ['pending', 'in_progress', 'completed', 'cancelled']:
+                Task.objects.create(
+                    title=status_value, status=status_value, project=project,
+                    assigned_to=cls.viewer, created_by=cls.owner,
+                    due_date=timezone.now() - timedelta(days=1),
+                )
+
+    def test_project_stats(self):
+        self.client.force_authenticate(self.viewer)
+        url = reverse('projects:project_stats', args=[self.projects[0].pk])
+        # Proyecto + membresías del usuario + aggregate de miembros + aggregate de tareas
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        # Membresías y estadísticas en caché: solo el proyecto (comprobación de acceso)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats'], {
+            'total_tasks': 4,
+            'completed_tasks': 1,
+            'in_progress_tasks': 1,
+            'pending_tasks': 2,
+            'overdue_tasks': 2,
+            'progress_percentage': 25.0,
+            'total_members': 1,
+        })
+        self.assertEqual(response.data['project']['members_count'], 1)
+
+    def test_project_stats_forbidden_for_outsider(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(reverse('projects:project_stats', args=[self.projects[0].pk]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_portfolio_stats_uses_two_queries(self):
+        empty = Project.objects.create(name='Vacío', start_date=date(2024, 1, 1), owner=self.owner)
+        ids = [project.pk for project in self.projects] + [empty.pk]
+        self.client.force_authenticate(self.owner)
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                reverse('projects:portfolio_stats'), {'ids': ','.join(map(str, ids))}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['project_id'] for row in response.data['results']], ids)
+        self.assertEqual(response.data['results'][0]['overdue_tasks'], 2)
+        self.assertEqual(response.data['results'][-1]['total_tasks'], 0)
+
+    def test_portfolio_stats_hides_invisible_projects(self):
+        self.client.force_authenticate(self.outsider)
+        response = self.client.get(
+            reverse('projects:portfolio_stats'), {'ids': str(self.projects[0].pk)}
+        )
+        self.assertEqual(response.data['count'], 0)
+
+    def test_portfolio_stats_rejects_invalid_ids(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get(reverse('projects:portfolio_stats'), {'ids': '1,a'})
+        self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTests(APITestCase):
+    """Paginación keyset opcional sobre (created_at, id)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        Notification.objects.bulk_create([
+            Notification(user=cls.user, type='task_assigned', title=f'N{index}', message='-')
+            for index in range(45)
+        ])
+        # Empates en created_at para comprobar el desempate por id
+        Notification.objects.filter(pk__in=Notification.objects.values('pk')[:30]).update(
+            created_at=timezone.now()
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def test_walks_all_pages_without_count_query(self):
+        url = reverse('projects:notification_list') + '?pagination=cursor'
+        seen = []
+        pages = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+            pages.append(response.data)
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual([len(page['results']) for page in pages], [20, 20, 5])
+        self.assertEqual(len(set(seen)), 45)
+        expected = list(
+            Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual(
+            [item['id'] for item in response.data['results']],
+            [item['id'] for item in pages[1]['results']]
+        )
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(reverse('projects:notification_list'))
+        self.assertEqual(response.data['count'], 45)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('projects:notification_list'), {'cursor': 'xx'})
+        self.assertEqual(response.status_code, 404)
+
+
+INLINE_NOTIFICATIONS = {'BACKEND': 'projects.notifications.InlineNotificationBackend'}
+
+
+def receive_from_group(group_name):
+    """Suscribe un canal de prueba al grupo y devuelve una función para leerlo"""
+    channel_layer = get_channel_layer()
+    channel_name = async_to_sync(channel_layer.new_channel)()
+    async_to_sync(channel_layer.group_add)(group_name, channel_name)
+    return lambda: async_to_sync(channel_layer.receive)(channel_name)
+
+
+@override_settings(NOTIFICATIONS=INLINE_NOTIFICATIONS)
+class NotificationDispatchTests(APITestCase):
+    """Notificaciones entregadas después del commit"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        cls.project = Project.objects.create(name='P', start_date=date(2024, 1, 1), owner=cls.admin)
+        ProjectMember.objects.create(project=cls.project, user=cls.viewer)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.admin)
+
+    def test_notification_is_sent_after_commit(self):
+        receive = receive_from_group(f'notifications_{self.viewer.id}')
+        url = reverse('projects:project_tasks', args=[self.project.pk])
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(url, {
+                'title': 'Nueva', 'project': self.project.pk, 'assigned_to': self.viewer.pk,
+            })
+            self.assertEqual(response.status_code, 201)
+            self.assertFalse(Notification.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        notification = Notification.objects.get(user=self.viewer)
+        self.assertEqual(notification.type, 'task_assigned')
+        message = receive()
+        self.assertEqual(message['notification']['id'], notification.id)
+        self.assertEqual(message['notification']['task']['title'], 'Nueva')
+
+
+@override_settings(NOTIFICATIONS={
+    'BACKEND': 'projects.notifications.ThreadedNotificationBackend',
+    'OPTIONS': {'BATCH_SIZE': 50, 'FLUSH_INTERVAL': 0.2},
+})
+class ThreadedNotificationBackendTests(TransactionTestCase):
+    """El hilo de fondo agrupa las entregas en lotes"""
+
+    def test_events_are_batched(self):
+        from .notification_views import send_notification
+
+        user = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        receive = receive_from_group(f'notifications_{user.id}')
+        with CaptureQueriesContext(connection) as queries:
+            for index in range(10):
+                send_notification(user, 'task_assigned', f'N{index}', 'mensaje')
+            self.assertTrue(get_backend().flush(timeout=5))
+
+        self.assertEqual(Notification.objects.filter(user=user).count(), 10)
+        # Ninguna inserción en el hilo de la petición
+        self.assertFalse(any('INSERT' in query['sql'] for query in queries))
+        titles = {receive()['notification']['title'] for _ in range(10)}
+        self.assertEqual(titles, {f'N{index}' for index in range(10)})
+
+    def test_invalid_event_does_not_drop_the_batch(self):
+        from .notifications import build_event, deliver
+
+        user = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        project = Project.objects.create(name='P', start_date=date(2024, 1, 1), owner=user)
+        task = Task.objects.create(title='Borrada', project=project, assigned_to=user, created_by=user)
+        events = [build_event(user, 'task_assigned', f'N{index}', 'mensaje', project=project) for index in range(3)]
+        events.insert(1, build_event(user, 'task_assigned', 'Huérfana', 'mensaje', task=task))
+        task.delete()
+
+        deliver(events)
+        self.assertEqual(
+            sorted(Notification.objects.filter(user=user).values_list('title', flat=True)), ['N0', 'N1', 'N2']
+        )
+
+    def test_pending_events_are_sent_at_exit(self):
+        import subprocess
+        import sys
+        from django.conf import settings
+
+        # Un proceso que termina con un envío por channel layer aún en la cola
+        script = '\n'.join([
+            'import django',
+            'django.setup()',
+            'from projects import live',
+            'backend = live.ThreadedBroadcastBackend(flush_interval=0.5)',
+            "backend.deliver = lambda events: (live._send_to_project(1, {'type': 'x'}), print('entregado'))",
+            "backend.enqueue({'kind': 'x'})",
+        ])
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=60,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'project_management.settings'},
+        )
+        self.assertIn('entregado', result.stdout)
+        self.assertNotIn('Falló el envío', result.stderr)
+
+
+@override_settings(NOTIFICATIONS=INLINE_NOTIFICATIONS)
+class BulkTaskOperationTests(APITestCase):
+    """Endpoint de operaciones masivas sobre tareas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        cls.other = User.objects.create_user('otro', 'otro@example.com', 'pass', role='viewer')
+        cls.project = Project.objects.create(name='P', start_date=date(2024, 1, 1), owner=cls.admin)
+        ProjectMember.objects.create(project=cls.project, user=cls.viewer)
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('projects:bulk_tasks')
+
+    def post(self, user, payload):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, payload, format='json')
+
+    def create_tasks(self, count, assigned_to=None):
+        return Task.objects.bulk_create([
+            Task(title=f'T{index}', project=self.project,
+                 assigned_to=assigned_to or self.viewer, created_by=self.admin)
+            for index in range(count)
+        ])
+
+    def test_bulk_create_coalesces_notifications(self):
+        response = self.post(self.admin, {'action': 'create', 'tasks': [
+            {'title': f'T{index}', 'project': self.project.pk, 'assigned_to': self.viewer.pk}
+            for index in range(5)
+        ] + [{'title': 'Completada', 'project': self.project.pk, 'status': 'completed'}]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 6)
+        self.assertIsNotNone(Task.objects.get(title='Completada').completed_at)
+        self.assertEqual(Notification.objects.filter(user=self.viewer).count(), 1)
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_total, self.project.tasks_completed), (6, 1))
+
+    def test_bulk_create_rejects_whole_batch_on_errors(self):
+        response = self.post(self.viewer, {'action': 'create', 'tasks': [
+            {'title': 'A', 'project': self.project.pk},
+            {'title': 'B', 'project': 9999},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data['errors']), {0, 1})
+        self.assertFalse(Task.objects.exists())
+
+    def test_update_status_in_constant_queries(self):
+        tasks = self.create_tasks(3)
+        ids = [task.pk for task in tasks]
+        self.client.force_authenticate(self.viewer)
+        with CaptureQueriesContext(connection) as small:
+            self.post(self.viewer, {'action': 'update_status', 'ids': ids[:1], 'status': 'in_progress'})
+        tasks += self.create_tasks(20)
+        ids = [task.pk for task in tasks]
+        with CaptureQueriesContext(connection) as large:
+            response = self.post(self.viewer, {'action': 'update_status', 'ids': ids, 'status': 'completed'})
+        self.assertEqual(response.data, {'updated': 23})
+        # + la notificación agrupada (INSERT dentro de un savepoint)
+        self.assertEqual(len(small), len(large) - 3)
+        self.assertFalse(Task.objects.filter(completed_at__isnull=True).exists())
+        self.assertEqual(Notification.objects.filter(type='task_completed').count(), 1)
+
+        self.post(self.viewer, {'action': 'update_status', 'ids': ids[:2], 'status': 'pending'})
+        self.assertEqual(Task.objects.filter(completed_at__isnull=True).count(), 2)
+
+    def test_update_status_requires_permission_for_every_task(self):
+        tasks = self.create_tasks(1) + self.create_tasks(1, assigned_to=self.other)
+        ProjectMember.objects.create(project=self.project, user=self.other)
+        response = self.post(self.viewer, {
+            'action': 'update_status', 'ids': [task.pk for task in tasks], 'status': 'completed',
+        })
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.data['ids'], [tasks[1].pk])
+        self.assertFalse(Task.objects.filter(status='completed').exists())
+
+    def test_reassign_and_delete(self):
+        ids = [task.pk for task in self.create_tasks(4)]
+        self.assertEqual(
+            self.post(self.viewer, {'action': 'reassign', 'ids': ids, 'assigned_to': self.other.pk}).status_code,
+            403
+        )
+        response = self.post(self.admin, {'action': 'reassign', 'ids': ids, 'assigned_to': self.other.pk})
+        self.assertEqual(response.data, {'updated': 4})
+        self.assertEqual(Notification.objects.filter(user=self.other).count(), 1)
+
+        response = self.post(self.admin, {'action': 'delete', 'ids': ids + [9999]})
+        self.assertEqual(response.status_code, 404)
+        response = self.post(self.admin, {'action': 'delete', 'ids': ids})
+        self.assertEqual(response.data, {'deleted': 4})
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.tasks_total, 0)
+
+    def test_delete_in_constant_queries(self):
+        from .models import SearchDocument
+
+        def create(count):
+            tasks = [
+                Task.objects.create(title=f'T{index}', project=self.project, assigned_to=self.viewer,
+                                    created_by=self.admin, status='completed')
+                for index in range(count)
+            ]
+            for task in tasks:
+                TaskComment.objects.create(task=task, author=self.viewer, content='Hecho')
+            return [task.pk for task in tasks]
+
+        ids = create(2)
+        with CaptureQueriesContext(connection) as small:
+            self.post(self.admin, {'action': 'delete', 'ids': ids})
+        ids = create(20)
+        with CaptureQueriesContext(connection) as large:
+            response = self.post(self.admin, {'action': 'delete', 'ids': ids})
+        self.assertEqual(response.data, {'deleted': 20})
+        self.assertEqual(len(small), len(large))
+        self.assertFalse(SearchDocument.objects.filter(kind__in=['task', 'comment']).exists())
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.tasks_total, self.project.tasks_completed), (0, 0))
+
+    def test_project_delete_in_constant_queries(self):
+        from .models import SearchDocument
+
+        def delete_project(count):
+            project = Project.objects.create(name='Borrar', start_date=date(2024, 1, 1), owner=self.admin)
+            for index in range(count):
+                task = Task.objects.create(title=f'T{index}', project=project, assigned_to=self.viewer,
+                                           created_by=self.admin)
+                TaskComment.objects.create(task=task, author=self.viewer, content='Hola')
+            self.client.force_authenticate(self.admin)
+            with CaptureQueriesContext(connection) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.delete(reverse('projects:project_detail', args=[project.pk]))
+            self.assertEqual(response.status_code, 204)
+            return len(queries)
+
+        # Sin post_delete por tarea ni comentario: la cascada cuesta lo mismo con 2 que con 50 tareas
+        self.assertEqual(delete_project(2), delete_project(50))
+        self.assertFalse(SearchDocument.objects.filter(kind__in=['task', 'comment']).exists())
+
+    def test_user_delete_updates_surviving_projects_once(self):
+        from unittest import mock
+        from .models import SearchDocument
+
+        kept = Task.objects.create(title='Queda', project=self.project, assigned_to=self.viewer,
+                                   created_by=self.admin)
+        self.create_tasks(3, assigned_to=self.other)
+        comment = TaskComment.objects.create(task=kept, author=self.other, content='Adiós')
+        # Su proyecto desaparece con él: sin deltas para ese grupo
+        owned = Project.objects.create(name='Suyo', start_date=date(2024, 1, 1), owner=self.other)
+        Task.objects.create(title='Suya', project=owned, assigned_to=self.viewer, created_by=self.other)
+
+        with mock.patch('projects.signals.publish') as publish:
+            self.other.delete()
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.tasks_total, 1)
+        self.assertFalse(SearchDocument.objects.filter(kind='comment', object_id=comment.pk).exists())
+        self.assertEqual(
+            sorted((project_id, delta['kind']) for (project_id, delta), _ in publish.call_args_list),
+            [(self.project.pk, 'comment')] + [(self.project.pk, 'task')] * 3,
+        )
+
+
+@override_settings(NOTIFICATIONS=INLINE_NOTIFICATIONS)
+class TaskImportTests(APITestCase):
+    """Importación por lotes: errores por fila, notificaciones resumidas y consultas por lote"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        cls.other = User.objects.create_user('otro', 'otro@example.com', 'pass', role='viewer')
+        cls.project = Project.objects.create(name='P', start_date=date(2024, 1, 1), owner=cls.admin)
+
+    def upload(self, user, name, content, **fields):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('projects:import_tasks'), {
+                'file': SimpleUploadedFile(name, content.encode()), **fields,
+            }, format='multipart')
+
+    def test_csv_import_reports_row_errors(self):
+        content = '\n'.join([
+            'title,project_id,assigned_to,status,due_date',
+            f'Uno,{self.project.pk},viewer,pending,2030-01-01T10:00:00Z',
+            f'Dos,{self.project.pk},otro,completed,',
+            f'Tres,{self.project.pk},nadie,pending,',
+            f'Cuatro,{self.project.pk},viewer,archivada,',
+            'Cinco,9999,viewer,pending,',
+            f',{self.project.pk},viewer,pending,',
+            f'Seis,{self.project.pk},viewer,in_progress,',
+        ])
+        response = self.upload(self.admin, 'tareas.csv', content)
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['created'], response.data['failed']), (3, 4))
+        self.assertEqual([error['row'] for error in response.data['errors']], [3, 4, 5, 6])
+        self.assertIn('status', response.data['errors'][1]['errors'])
+        self.assertEqual(
+            sorted(Task.objects.values_list('title', flat=True)), ['Dos', 'Seis', 'Uno']
+        )
+        self.assertIsNotNone(Task.objects.get(title='Dos').completed_at)
+        # Una notificación resumen por asignado, no una por tarea
+        notification = Notification.objects.get(user=self.viewer)
+        self.assertEqual(notification.message, 'Se te han asignado 2 tareas importadas')
+        self.assertEqual(Notification.objects.filter(user=self.other).count(), 1)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.tasks_total, 3)
+
+    def test_ndjson_round_trip_with_export_columns(self):
+        from .exports import TASK_COLUMNS, export_stream
+
+        Task.objects.create(title='Original', project=self.project, assigned_to=self.viewer, created_by=self.admin)
+        exported = b''.join(export_stream(Task.objects.all(), TASK_COLUMNS, 'ndjson')).decode()
+        response = self.upload(self.admin, 'tareas.ndjson', exported + '{roto\n')
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(Task.objects.filter(title='Original', assigned_to=self.viewer).count(), 2)
+
+    def test_csv_round_trip_keeps_formula_like_values(self):
+        from .exports import TASK_COLUMNS, export_stream
+
+        Task.objects.create(
+            title='=1+1', description="'@mención", project=self.project, assigned_to=self.viewer,
+            created_by=self.admin,
+        )
+        exported = b''.join(export_stream(Task.objects.all(), TASK_COLUMNS, 'csv')).decode()
+        self.assertIn("'=1+1", exported)
+        response = self.upload(self.admin, 'tareas.csv', exported)
+        self.assertEqual(response.data['created'], 1, response.data)
+        self.assertEqual(
+            list(Task.objects.order_by('pk').values_list('title', 'description'))[-1], ('=1+1', "'@mención")
+        )
+
+    def test_assigned_to_is_a_username_and_assigned_to_id_an_id(self):
+        numeric = User.objects.create_user(str(self.other.pk), 'numerico@example.com', 'pass', role='viewer')
+        content = '\n'.join(json.dumps(row) for row in [
+            {'title': 'Nombre', 'assigned_to': str(self.other.pk)},
+            {'title': 'Id', 'assigned_to_id': self.other.pk},
+            {'title': 'Ambos', 'assigned_to_id': self.viewer.pk, 'assigned_to': 'otro'},
+            {'title': 'Id como nombre', 'assigned_to': self.viewer.pk + 1000},
+        ])
+        response = self.upload(self.admin, 'tareas.ndjson', content, project=self.project.pk)
+        self.assertEqual((response.data['created'], response.data['failed']), (3, 1), response.data)
+        self.assertIn('assigned_to', response.data['errors'][0]['errors'])
+        self.assertEqual(
+            dict(Task.objects.values_list('title', 'assigned_to')),
+            {'Nombre': numeric.pk, 'Id': self.other.pk, 'Ambos': self.viewer.pk},
+        )
+
+    def test_permissions_dry_run_and_default_project(self):
+        content = json.dumps([{'title': 'A'}, {'title': 'B', 'assigned_to_id': self.other.pk}])
+        response = self.upload(self.viewer, 'tareas.json', content, project=self.project.pk)
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(response.data['failed'], 2)
+
+        response = self.upload(self.admin, 'tareas.json', content, project=self.project.pk, dry_run='true')
+        self.assertEqual((response.data['created'], response.data['failed']), (2, 0))
+        self.assertFalse(Task.objects.exists())
+
+    def test_invalid_files(self):
+        self.assertEqual(self.upload(self.admin, 'tareas.txt', 'x').status_code, 400)
+        self.assertEqual(self.upload(self.admin, 'tareas.json', '{"a": 1}').status_code, 400)
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.post(reverse('projects:import_tasks'), {}).status_code, 400)
+
+    def test_queries_per_batch_do_not_grow_with_rows(self):
+        from .imports import TaskImport
+
+        def run(count):
+            rows = [(index, {'title': f'T{index}', 'project_id': self.project.pk, 'assigned_to': 'viewer'})
+                    for index in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                TaskImport(self.admin, batch_size=1000, dry_run=True).run(rows)
+            return len(queries)
+
+        self.assertEqual(run(5), run(200))
+
+    def test_management_command(self):
+        import tempfile
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write(f'title,project_id\nA,{self.project.pk}\nB,{self.project.pk}\n')
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_tasks', handle.name, '--user', 'admin', '--batch-size', '1', stdout=out)
+        self.assertIn('2 tarea(s) creada(s)', out.getvalue())
+        self.assertEqual(Notification.objects.filter(user=self.admin).count(), 1)
+
+class ProjectAccessTests(APITestCase):
+    """Servicio de control de acceso con membresías en caché"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('colab', 'colab@example.com', 'pass', role='collaborator')
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        cls.project = Project.objects.create(name='P', start_date=date(2024, 1, 1), owner=cls.owner)
+        cls.task = Task.objects.create(
+            title='T', project=cls.project, assigned_to=cls.owner, created_by=cls.owner
+        )
+        TaskComment.objects.create(task=cls.task, author=cls.owner, content='Hola')
+
+    def test_memberships_load_once_and_invalidate_on_write(self):
+        with self.assertNumQueries(1):
+            access = ProjectAccess(self.viewer)
+            self.assertFalse(access.can_view_project(self.project))
+            self.assertFalse(access.can_view_task(self.task))
+        with self.assertNumQueries(0):
+            self.assertFalse(ProjectAccess(self.viewer).can_view_project(self.project))
+
+        member = ProjectMember.objects.create(project=self.project, user=self.viewer)
+        self.assertTrue(ProjectAccess(self.viewer).can_view_project(self.project))
+        member.delete()
+        self.assertFalse(ProjectAccess(self.viewer).can_view_project(self.project))
+
+    def test_owner_needs_no_membership_query(self):
+        with self.assertNumQueries(0):
+            self.assertTrue(ProjectAccess(self.owner).can_view_task(self.task))
+
+    def test_task_comments_access(self):
+        url = reverse('projects:task_comments', args=[self.task.pk])
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        ProjectMember.objects.create(project=self.project, user=self.viewer)
+        # Tarea + membresías + comentarios con su autor
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['author_name'], self.owner.full_name)
+
+
+class APIBenchmarkTests(APITestCase):
+    """El harness de benchmark cubre todas las rutas y no rompe ninguna"""
+
+    def test_every_route_has_a_working_scenario(self):
+        seed_dataset(
+            users=12, projects=3, members_per_project=3, tasks_per_project=4,
+            comments_per_task=1, notifications_per_user=2,
+        )
+        scenarios = api_scenarios(benchmark_actors())
+        self.assertEqual(
+            named_routes('accounts', 'projects') - {scenario[0] for scenario in scenarios}, set()
+        )
+        with self.assertLogs('accounts', level='INFO'):
+            for scenario in scenarios:
+                result = run_scenario(self.client, *scenario, repeat=1)
+                self.assertLess(result['status'], 400, result)
+
+    def test_compare_query_counts(self):
+        baseline = {'endpoints': [
+            {'route': 'projects:project_list', 'method': 'GET', 'queries': 2},
+            {'route': 'projects:task_list', 'method': 'GET', 'queries': 3},
+        ]}
+        results = [
+            {'route': 'projects:project_list', 'method': 'GET', 'queries': 3},
+            {'route': 'projects:task_list', 'method': 'GET', 'queries': 3},
+            {'route': 'projects:user_tasks', 'method': 'GET', 'queries': 50},
+        ]
+        self.assertEqual(compare_query_counts(results, baseline, tolerance=1), [])
+        self.assertEqual(compare_query_counts(results, baseline), [{
+            'route': 'projects:project_list', 'method': 'GET', 'before': 2, 'after': 3,
+        }])
+
+
+class UserTasksTests(APITestCase):
+    """my-tasks: consultas constantes, totales agregados y respuesta por páginas o transmitida"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        cls.user = User.objects.create_user('member', 'member@example.com', 'pass', role='viewer')
+        project = Project.objects.create(name='P', owner=cls.owner, start_date=date.today())
+        other = Project.objects.create(name='Ajeno', owner=cls.owner, start_date=date.today())
+        ProjectMember.objects.create(project=project, user=cls.user)
+        yesterday = timezone.now() - timedelta(days=1)
+        Task.objects.bulk_create(
+            [
+                Task(title=f'T{index}', project=project, assigned_to=cls.user, created_by=cls.owner,
+                     status='completed' if index % 5 == 0 else 'pending',
+                     due_date=yesterday if index % 2 else None)
+                for index in range(25)
+            ] + [
+                # Asignada pero fuera de sus proyectos: no debe aparecer
+                Task(title='Fuera', project=other, assigned_to=cls.user, created_by=cls.owner),
+            ]
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def stream(self, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('projects:user_tasks'), params or {})
+            self.assertTrue(response.streaming)
+            body = json.loads(b''.join(response.streaming_content))
+        return body, len(queries)
+
+    def test_streams_asynchronously_under_asgi(self):
+        from django.test import AsyncClient
+        from accounts.tokens import UserRefreshToken
+        token = UserRefreshToken.for_user(self.user).access_token
+
+        async def fetch():
+            response = await AsyncClient().get(
+                reverse('projects:user_tasks'), headers={'Authorization': f'Bearer {token}'}
+            )
+            return response, [chunk async for chunk in response.streaming_content]
+
+        response, chunks = async_to_sync(fetch)()
+        # Un iterador asíncrono: ASGIHandler no lo convierte en lista antes de enviar
+        self.assertTrue(response.is_async)
+        body = json.loads(b''.join(chunks))
+        self.assertEqual((body['count'], len(body['tasks'])), (25, 25))
+
+    def test_streamed_document_with_constant_queries(self):
+        body, queries = self.stream()
+        # Membresías + aggregate + tareas con sus tres relaciones
+        self.assertEqual(queries, 3)
+        self.assertEqual(list(body), ['tasks', 'count', 'overdue_count'])
+        self.assertEqual(body['count'], 25)
+        self.assertEqual(len(body['tasks']), 25)
+        # Impares con fecha vencida, sin las completadas (múltiplos de 5)
+        self.assertEqual(body['overdue_count'], 10)
+        self.assertEqual(body['tasks'][0]['assigned_to_name'], self.user.full_name)
+        self.assertEqual(body['tasks'][0]['project_name'], 'P')
+
+        body, queries = self.stream({'status': 'completed'})
+        self.assertEqual((body['count'], body['overdue_count'], len(body['tasks'])), (5, 0, 5))
+
+    def test_paginated(self):
+        url = reverse('projects:user_tasks')
+        seen = []
+        response = self.client.get(url, {'page_size': 10})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 25)
+            seen.extend(task['id'] for task in response.data['tasks'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        self.assertIsNotNone(response.data['previous'])
+
+        self.assertEqual(self.client.get(url, {'page': 9}).status_code, 404)
+
+
+class DashboardTests(APITestCase):
+    """Dashboard agregado y su snapshot en caché"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        cls.user = User.objects.create_user('member', 'member@example.com', 'pass', role='viewer')
+        cls.projects = [
+            Project.objects.create(name=f'P{index}', owner=cls.owner, start_date=date.today())
+            for index in range(7)
+        ]
+        yesterday = timezone.now() - timedelta(days=1)
+        for index, project in enumerate(cls.projects):
+            Task.objects.create(
+                title=f'T{index}', project=project, assigned_to=cls.user, created_by=cls.owner,
+                status='completed' if index < 2 else 'pending', due_date=yesterday,
+            )
+
+    def dashboard(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('accounts:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_payload_and_cached_snapshot(self):
+        with self.assertNumQueries(3):
+            data = self.dashboard(self.user)
+        self.assertEqual(data['stats'], {
+            'owned_projects': 0, 'assigned_tasks': 7, 'completed_tasks': 2, 'pending_tasks': 5,
+        })
+        self.assertEqual(len(data['pending_tasks']), 5)
+        self.assertTrue(all(task['is_overdue'] for task in data['pending_tasks']))
+        self.assertEqual(data['pending_tasks'][0]['project_name'], 'P6')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.dashboard(self.user)['stats'], data['stats'])
+
+        data = self.dashboard(self.owner)
+        self.assertEqual(data['stats']['owned_projects'], 7)
+        self.assertEqual([project['name'] for project in data['recent_projects']], ['P6', 'P5', 'P4', 'P3', 'P2'])
+        self.assertEqual(data['recent_projects'][0]['progress'], 0)
+
+    def test_task_and_project_writes_invalidate(self):
+        self.dashboard(self.user)
+        self.dashboard(self.owner)
+
+        task = Task.objects.get(title='T6')
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(self.dashboard(self.user)['stats']['completed_tasks'], 3)
+        self.assertEqual(self.dashboard(self.owner)['recent_projects'][0]['progress'], 100)
+
+        self.projects[5].name = 'Renombrado'
+        self.projects[5].save()
+        self.assertEqual(self.dashboard(self.user)['pending_tasks'][0]['project_name'], 'Renombrado')
+
+        # Reasignar invalida también el dashboard del asignado anterior
+        task = Task.objects.get(title='T5')
+        task.assigned_to = self.owner
+        task.save()
+        self.assertEqual(self.dashboard(self.user)['stats']['assigned_tasks'], 6)
+        self.assertEqual(self.dashboard(self.owner)['stats']['assigned_tasks'], 1)
+
+        Task.objects.filter(title='T4').delete()
+        self.assertEqual(self.dashboard(self.user)['stats']['assigned_tasks'], 5)
+
+    def test_bulk_operations_invalidate(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        self.dashboard(self.user)
+        ids = list(Task.objects.filter(status='pending').values_list('pk', flat=True))
+        self.client.force_authenticate(admin)
+        response = self.client.post(
+            reverse('projects:bulk_tasks'), {'action': 'update_status', 'ids': ids, 'status': 'completed'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.dashboard(self.user)['stats']['completed_tasks'], 7)
+
+
+class CachingTests(APITestCase):
+    """Caché read-through con espacios de nombres versionados"""
+
+    def test_read_through_and_namespace_invalidation(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(cached(['a', 'b'], ('x',), compute), 1)
+        self.assertEqual(cached(['a', 'b'], ('x',), compute), 1)
+        self.assertEqual(cached(['a'], ('x',), compute), 2)
+        invalidate('b')
+        self.assertEqual(cached(['a', 'b'], ('x',), compute), 3)
+        self.assertEqual(cached(['a'], ('x',), compute), 2)
+
+    def test_single_flight(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'valor'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cached('lento', (), compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['valor'] * 5)
+        self.assertEqual(len(calls), 1)
+
+
+class CachedEndpointTests(APITestCase):
+    """Los endpoints en caché se invalidan con las escrituras"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        cls.project = Project.objects.create(name='P', owner=cls.owner, start_date=date.today())
+        cls.task = Task.objects.create(
+            title='T', project=cls.project, assigned_to=cls.owner, created_by=cls.owner
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.owner)
+
+    def test_project_list(self):
+        url = reverse('projects:project_list')
+        self.assertEqual(self.client.get(url).data['count'], 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['count'], 1)
+
+        # Editar el título no cambia los contadores: la lista sigue en caché
+        self.task.title = 'Otro'
+        self.task.save()
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        self.task.status = 'completed'
+        self.task.save()
+        self.assertEqual(self.client.get(url).data['results'][0]['progress_percentage'], 100)
+
+        Project.objects.create(name='Q', owner=self.owner, start_date=date.today())
+        self.assertEqual(self.client.get(url).data['count'], 2)
+
+    def test_project_stats(self):
+        url = reverse('projects:project_stats', args=[self.project.pk])
+        self.assertEqual(self.client.get(url).data['stats']['completed_tasks'], 0)
+        self.task.status = 'completed'
+        self.task.save()
+        self.assertEqual(self.client.get(url).data['stats']['completed_tasks'], 1)
+
+        Task.objects.filter(pk=self.task.pk).update(status='pending')
+        self.assertEqual(self.client.get(url).data['stats']['completed_tasks'], 0)
+
+    def test_unread_count(self):
+        from .notification_views import send_notification
+
+        url = reverse('projects:unread_notifications_count')
+        notification = Notification.objects.create(
+            user=self.owner, type='task_assigned', title='N', message='-'
+        )
+        self.assertEqual(self.client.get(url).data['count'], 1)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            notification.mark_as_read()
+        self.assertEqual(self.client.get(url).data['count'], 0)
+
+        with override_settings(NOTIFICATIONS=INLINE_NOTIFICATIONS), self.captureOnCommitCallbacks(execute=True):
+            send_notification(self.owner, 'task_assigned', 'N', '-')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('projects:mark_all_as_read'))
+        self.assertEqual(self.client.get(url).data['count'], 0)
+
+
+class ConditionalRequestTests(APITestCase):
+    """ETag / Last-Modified en proyecto, tarea y comentarios"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        cls.project = Project.objects.create(name='P', owner=cls.owner, start_date=date.today())
+        ProjectMember.objects.create(project=cls.project, user=cls.viewer)
+        cls.task = Task.objects.create(
+            title='T', project=cls.project, assigned_to=cls.viewer, created_by=cls.owner
+        )
+        cls.comment = TaskComment.objects.create(task=cls.task, author=cls.viewer, content='Hola')
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.owner)
+
+    def assertRevalidates(self, url, change):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+
+        # Solo la consulta de validadores: ni carga ni serialización
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        change()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # Otro usuario no comparte el ETag (permisos en la representación)
+        self.client.force_authenticate(self.viewer)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_project_detail(self):
+        def change():
+            # Los contadores cambian sin tocar projects.updated_at
+            Task.objects.create(title='Nueva', project=self.project, assigned_to=self.viewer, created_by=self.owner)
+
+        self.assertRevalidates(reverse('projects:project_detail', args=[self.project.pk]), change)
+
+    def test_project_detail_member_removed(self):
+        url = reverse('projects:project_detail', args=[self.project.pk])
+        etag = self.client.get(url)['ETag']
+        ProjectMember.objects.filter(project=self.project).delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_nested_member_and_user_changes_revalidate(self):
+        url = reverse('projects:project_detail', args=[self.project.pk])
+        task_url = reverse('projects:task_detail', args=[self.task.pk])
+        later = timezone.now() + timedelta(seconds=1)
+
+        etag = self.client.get(url)['ETag']
+        member = ProjectMember.objects.get(project=self.project, user=self.viewer)
+        member.role = 'lead'
+        member.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['members'][0]['role'], 'lead')
+
+        etags = self.client.get(url)['ETag'], self.client.get(task_url)['ETag']
+        # Renombrar al miembro (asignado de la tarea) cambia ambas representaciones
+        User.objects.filter(pk=self.viewer.pk).update(first_name='Vera', updated_at=later)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[0]).status_code, 200)
+        self.assertEqual(self.client.get(task_url, HTTP_IF_NONE_MATCH=etags[1]).status_code, 200)
+
+    def test_task_detail(self):
+        def change():
+            Task.objects.filter(pk=self.task.pk).update(
+                status='in_progress', updated_at=timezone.now() + timedelta(seconds=1)
+            )
+
+        self.assertRevalidates(reverse('projects:task_detail', args=[self.task.pk]), change)
+
+    def test_task_comments(self):
+        url = reverse('projects:task_comments', args=[self.task.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+        # Tarea con sus validadores; las membresías del propietario no hacen falta
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.comment.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+    def test_if_modified_since(self):
+        url = reverse('projects:task_detail', args=[self.task.pk])
+        last_modified = self.client.get(url)['Last-Modified']
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        Task.objects.filter(pk=self.task.pk).update(updated_at=timezone.now() + timedelta(seconds=5))
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_invisible_task_is_not_revealed(self):
+        outsider = User.objects.create_user('otro', 'otro@example.com', 'pass', role='viewer')
+        self.client.force_authenticate(outsider)
+        response = self.client.get(reverse('projects:task_detail', args=[self.task.pk]), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskListFastSerializerTests(APITestCase):
+    """La serialización rápida produce los mismos bytes que TaskSerializer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(
+            'owner', 'owner@example.com', 'pass', role='collaborator', first_name='Ana', last_name='Pérez'
+        )
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        cls.project = Project.objects.create(name='Proyecto ñ', owner=cls.owner, start_date=date.today())
+        ProjectMember.objects.create(project=cls.project, user=cls.viewer)
+        now = timezone.now()
+        for index, (status_value, due_date) in enumerate([
+            ('pending', None),
+            ('pending', now - timedelta(days=1)),
+            ('in_progress', now + timedelta(days=3)),
+            ('completed', now - timedelta(days=2)),
+            ('cancelled', now - timedelta(hours=1)),
+        ]):
+            Task.objects.create(
+                title=f'Tarea "{index}"', description='Línea 1\nLínea 2', status=status_value,
+                priority=['low', 'medium', 'high', 'urgent', 'medium'][index], due_date=due_date,
+                project=cls.project, assigned_to=cls.viewer, created_by=cls.owner,
+            )
+
+    def test_identical_json(self):
+        from rest_framework.renderers import JSONRenderer
+        from .serializers import TaskListFastSerializer, TaskSerializer
+
+        queryset = Task.objects.order_by('id')
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(TaskListFastSerializer(TaskListFastSerializer.values(queryset)).data),
+            renderer.render(TaskSerializer(queryset, many=True).data),
+        )
+
+    def test_task_list_constant_queries(self):
+        self.client.force_authenticate(self.viewer)
+        # Membresías + COUNT de la paginación + filas con sus relaciones
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('projects:task_list'))
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual(response.data['results'][0]['created_by_name'], 'Ana Pérez')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('projects:task_list'), {'pagination': 'cursor'})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+
+
+class ListFilterTests(APITestCase):
+    """Filtros y orden declarativos: resultados, planes de índice y combinaciones rechazadas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        cls.viewer = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        cls.project = Project.objects.create(
+            name='P', owner=cls.owner, start_date=date.today(), status='in_progress', priority='high',
+        )
+        cls.other_project = Project.objects.create(name='Q', owner=cls.admin, start_date=date.today())
+        ProjectMember.objects.create(project=cls.project, user=cls.viewer)
+        now = timezone.now()
+        cls.tasks = {}
+        for name, status_value, priority, due_date, assignee in [
+            ('late', 'pending', 'urgent', now - timedelta(days=2), cls.viewer),
+            ('soon', 'in_progress', 'low', now + timedelta(days=2), cls.viewer),
+            ('done', 'completed', 'medium', now - timedelta(days=5), cls.viewer),
+            ('other', 'pending', 'high', None, cls.owner),
+        ]:
+            cls.tasks[name] = Task.objects.create(
+                title=name, status=status_value, priority=priority, due_date=due_date,
+                project=cls.project, assigned_to=assignee, created_by=cls.owner,
+            )
+
+    def titles(self, user, route='projects:task_list', kwargs=None, **params):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse(route, kwargs=kwargs), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        if route == 'projects:user_tasks':
+            return [task['title'] for task in response.data['tasks']]
+        return [item.get('title', item.get('name')) for item in response.data['results']]
+
+    def assertRejected(self, user, route='projects:task_list', **params):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse(route), params)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+    def test_task_filters_and_ordering(self):
+        project = {'project': self.project.pk}
+        self.assertEqual(self.titles(self.admin, **project, ordering='-priority'), ['late', 'other', 'done', 'soon'])
+        self.assertEqual(
+            self.titles(self.admin, assignee=self.viewer.pk, status='pending,in_progress', ordering='-due_date'),
+            ['soon', 'late'],
+        )
+        self.assertEqual(self.titles(self.admin, overdue='true'), ['late'])
+        self.assertEqual(
+            self.titles(self.admin, **project, due_after=date.today().isoformat(), ordering='due_date'), ['soon']
+        )
+        self.assertEqual(self.titles(self.admin, assignee=self.owner.pk), ['other'])
+        self.assertEqual(
+            self.titles(self.admin, 'projects:project_tasks', {'project_id': self.project.pk}, priority='low'),
+            ['soon'],
+        )
+
+    def test_unsupported_combinations_are_rejected(self):
+        # Sin una columna que acote la búsqueda recorrería toda la tabla
+        self.assertRejected(self.admin, priority='urgent')
+        self.assertRejected(self.admin, ordering='priority')
+        self.assertRejected(self.admin, 'projects:project_list', priority='high')
+        # Valores y órdenes desconocidos
+        self.assertRejected(self.admin, status='archived')
+        self.assertRejected(self.admin, project='x')
+        self.assertRejected(self.admin, overdue='false')
+        self.assertRejected(self.admin, ordering='title')
+        # El cursor ya fija el orden
+        self.assertRejected(self.admin, project=self.project.pk, ordering='due_date', pagination='cursor')
+
+    def test_scoped_users_can_combine_filters(self):
+        # Las tareas propias ya acotan la consulta: cualquier combinación vale
+        self.assertEqual(self.titles(self.viewer, priority='urgent'), ['late'])
+        self.assertEqual(self.titles(self.viewer, ordering='priority'), ['soon', 'done', 'late'])
+        self.assertEqual(self.titles(self.viewer, 'projects:project_list', priority='high'), ['P'])
+
+    def test_user_tasks_and_projects(self):
+        self.assertEqual(self.titles(self.viewer, 'projects:user_tasks', status='completed', page=1), ['done'])
+        self.assertEqual(
+            self.titles(self.viewer, 'projects:user_tasks', overdue='true', page=1), ['late']
+        )
+        self.assertRejected(self.admin, 'projects:user_tasks', priority='low')
+        self.assertEqual(self.titles(self.admin, 'projects:project_list', owner=self.admin.pk), ['Q'])
+        self.assertEqual(self.titles(self.admin, 'projects:project_list', status='in_progress'), ['P'])
+
+    def test_user_tasks_default_ordering_has_a_plan(self):
+        from .filters import TASK_FILTERS
+        from .views import USER_TASKS_DEFAULT_ORDERINGS
+
+        # Administrador sin filtros: solo task_created_idx, las más recientes primero
+        self.assertEqual(TASK_FILTERS.plan(set(), 'due_date'), None)
+        self.assertEqual(TASK_FILTERS.plan(set(), 'created_at').index, 'task_created_idx')
+        self.assertEqual(
+            self.titles(self.admin, 'projects:user_tasks', page=1), ['other', 'done', 'soon', 'late']
+        )
+        # Con un índice por vencimiento se mantiene ese orden
+        self.assertEqual(USER_TASKS_DEFAULT_ORDERINGS[0], 'due_date')
+        self.assertEqual(TASK_FILTERS.plan({'status'}, 'due_date').index, 'task_status_due_idx')
+        self.assertEqual(
+            self.titles(self.admin, 'projects:user_tasks', status='completed,in_progress', page=1),
+            ['done', 'soon'],
+        )
+        self.assertEqual(TASK_FILTERS.plan({'assigned_to'}, 'due_date').index, 'task_assignee_status_due_idx')
+        self.assertEqual(self.titles(self.viewer, 'projects:user_tasks', page=1), ['done', 'late', 'soon'])
+
+    def test_plans_name_existing_indexes(self):
+        from .filters import PROJECT_FILTERS, TASK_FILTERS
+
+        indexes = {
+            index.name: index for model in (Project, ProjectMember, Task) for index in model._meta.indexes
+        }
+        for filterset in (TASK_FILTERS, PROJECT_FILTERS):
+            for plan in filterset.plans:
+                self.assertIn(plan.index, indexes)
+                if plan.range:
+                    self.assertIn(plan.range, indexes[plan.index].fields)
+
+
+class ExportTests(APITestCase):
+    """Exportación en streaming: formatos, visibilidad, filtros y consultas constantes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        cls.member = User.objects.create_user('member', 'member@example.com', 'pass', role='viewer')
+        cls.outsider = User.objects.create_user('outsider', 'outsider@example.com', 'pass', role='viewer')
+        cls.project = Project.objects.create(name='Proyecto, "uno"', owner=cls.owner, start_date=date(2024, 1, 1))
+        ProjectMember.objects.create(project=cls.project, user=cls.member)
+        for index in range(5):
+            Task.objects.create(
+                title=f'Tarea {index}', description='Línea 1\nLínea 2', priority='high' if index else 'low',
+                project=cls.project, assigned_to=cls.member if index % 2 else cls.owner, created_by=cls.owner,
+            )
+
+    def export(self, user, route='projects:export_project', **params):
+        self.client.force_authenticate(user)
+        kwargs = {'project_id': self.project.pk} if route == 'projects:export_project' else None
+        return self.client.get(reverse(route, kwargs=kwargs), params)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        import csv
+
+        response = self.export(self.owner)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn(f'project-{self.project.pk}-tasks.csv', response['Content-Disposition'])
+        rows = list(csv.DictReader(StringIO(self.read(response))))
+        # El propietario no administrador ve sus tareas asignadas, como en el listado
+        self.assertEqual([row['title'] for row in rows], ['Tarea 0', 'Tarea 2', 'Tarea 4'])
+        self.assertEqual(rows[0]['project'], 'Proyecto, "uno"')
+        self.assertEqual(rows[0]['description'], 'Línea 1\nLínea 2')
+        self.assertEqual(rows[0]['assigned_to'], 'owner')
+
+    def test_csv_formula_injection(self):
+        import csv
+
+        Task.objects.create(
+            title='=HYPERLINK("http://example.com","x")', description='-2+3', project=self.project,
+            assigned_to=self.owner, created_by=self.owner,
+        )
+        rows = list(csv.DictReader(StringIO(self.read(self.export(self.owner)))))
+        self.assertEqual(rows[-1]['title'], '\'=HYPERLINK("http://example.com","x")')
+        self.assertEqual(rows[-1]['description'], "'-2+3")
+        self.assertEqual(rows[0]['title'], 'Tarea 0')
+        # NDJSON no lo abre una hoja de cálculo: sin cambios
+        tasks = [json.loads(line) for line in self.read(self.export(self.owner, output='ndjson')).splitlines()]
+        self.assertEqual(tasks[-1]['description'], '-2+3')
+
+    def test_ndjson_export_with_filters(self):
+        response = self.export(self.member, output='ndjson', priority='high')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        tasks = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([task['title'] for task in tasks], ['Tarea 1', 'Tarea 3'])
+        self.assertTrue(tasks[0]['created_at'].endswith('Z'))
+
+    def test_user_exports(self):
+        tasks = self.read(self.export(self.member, 'projects:export', output='ndjson'))
+        self.assertEqual(len(tasks.splitlines()), 2)
+        projects = self.read(self.export(self.member, 'projects:export', resource='projects'))
+        self.assertIn('Proyecto, ""uno""', projects)
+        self.assertEqual(self.read(self.export(self.outsider, 'projects:export')).splitlines()[1:], [])
+
+    def test_access_and_validation(self):
+        self.assertEqual(self.export(self.outsider).status_code, 403)
+        self.assertEqual(self.export(self.owner, output='xml').status_code, 400)
+        self.assertEqual(self.export(self.owner, 'projects:export', resource='users').status_code, 400)
+        self.client.force_authenticate(self.owner)
+        missing = self.client.get(reverse('projects:export_project', kwargs={'project_id': 999999}))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_constant_queries(self):
+        self.client.force_authenticate(self.owner)
+        # Proyecto + una sola consulta con los JOIN de las claves foráneas, se exporte lo que se exporte
+        with self.assertNumQueries(2):
+            self.read(self.client.get(reverse('projects:export_project', kwargs={'project_id': self.project.pk})))
+
+    def test_streams_asynchronously_under_asgi(self):
+        from django.test import AsyncClient
+        from accounts.tokens import UserRefreshToken
+        token = UserRefreshToken.for_user(self.owner).access_token
+
+        async def fetch():
+            response = await AsyncClient().get(
+                reverse('projects:export_project', kwargs={'project_id': self.project.pk}),
+                {'output': 'ndjson'}, headers={'Authorization': f'Bearer {token}'},
+            )
+            return response, [chunk async for chunk in response.streaming_content]
+
+        response, chunks = async_to_sync(fetch)()
+        # Un iterador asíncrono: ASGIHandler no lo convierte en lista antes de enviar
+        self.assertTrue(response.is_async)
+        tasks = [json.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual([task['title'] for task in tasks], ['Tarea 0', 'Tarea 2', 'Tarea 4'])
+
+
+class FastJSONRendererTests(TestCase):
+    """FastJSONRenderer/FastJSONParser equivalen a los de DRF"""
+
+    def test_same_output_as_json_renderer(self):
+        import datetime
+        import decimal
+        import uuid
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from .renderers import FastJSONRenderer
+
+        now = timezone.now()
+        data = {
+            'aware': now,
+            'utc_z': datetime.datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc),
+            'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+            'date': date(2024, 1, 2),
+            'time': datetime.time(10, 30),
+            'duration': timedelta(hours=1, seconds=1),
+            'decimal': decimal.Decimal('12.50'),
+            'lazy': gettext_lazy('Pendiente'),
+            'uuid': uuid.UUID(int=1),
+            'ids': {3},
+            'keys': {1: 'uno', False: 'no', None: 'nada', 2.5: 'dos y medio'},
+            'text': 'ñandú \u2028 \u2029 "comillas" </script>',
+            'float': 33.33,
+            'nested': [{'a': None, 'b': False}, ()],
+            'big': 2 ** 70,
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+        indented = FastJSONRenderer().render({'a': [1]}, 'application/json; indent=4')
+        self.assertEqual(indented, JSONRenderer().render({'a': [1]}, 'application/json; indent=4'))
+
+    def test_floats(self):
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.utils.serializer_helpers import ReturnList
+        from .renderers import FastJSONRenderer
+
+        # Con exponente cambia el texto (1e16 / 1e+16), no el valor
+        data = {'big': 1e16, 'small': 1e-7, 'plain': 0.1}
+        self.assertEqual(json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data)))
+
+        # Los no finitos no se convierten en null: mismo error que DRF en modo estricto
+        for value in (float('nan'), float('inf')):
+            data = ReturnList([{'a': None, 'ratio': value}], serializer=None)
+            with self.assertRaises(ValueError):
+                JSONRenderer().render(data)
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render(data)
+
+    def test_parser(self):
+        from io import BytesIO
+        from rest_framework.exceptions import ParseError
+        from .renderers import FastJSONParser
+
+        body = json.dumps({'título': 'ñ', 'ids': [1, 2], 'n': None}).encode()
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), {'título': 'ñ', 'ids': [1, 2], 'n': None})
+        for invalid in (b'{"a":', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                FastJSONParser().parse(BytesIO(invalid))
+
+    def test_api_uses_fast_renderer(self):
+        user = User.objects.create_user('viewer', 'viewer@example.com', 'pass', role='viewer')
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.patch(reverse('accounts:profile_update'), {'first_name': 'Ñoño'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(type(response.accepted_renderer).__name__, 'FastJSONRenderer')
+        self.assertEqual(json.loads(response.content)['user']['first_name'], 'Ñoño')
+
+
+class WebSocketAuthTests(TransactionTestCase):
+    """Autenticación JWT de WebSockets sin consultas por conexión"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('socket', 'socket@example.com', 'pass', role='collaborator')
+
+    def application(self):
+        from channels.routing import URLRouter
+        from accounts.middleware import JWTAuthMiddleware
+        from project_management.routing import websocket_urlpatterns
+        return JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def connect(self, application, path):
+        from channels.testing import WebsocketCommunicator
+
+        async def run():
+            communicator = WebsocketCommunicator(application, path)
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        return async_to_sync(run)()
+
+    def authenticate(self, application, token):
+        return async_to_sync(application.authenticate)({
+            'query_string': f'token={token}'.encode(), 'headers': [],
+        })
+
+    def test_token_from_scope(self):
+        from accounts.middleware import token_from_scope
+        scope = {'query_string': b'lang=es&token=a%2Bb.c%3D&token=otro', 'headers': []}
+        self.assertEqual(token_from_scope(scope), 'a+b.c=')
+        self.assertIsNone(token_from_scope({'query_string': b'notoken=x', 'headers': []}))
+        self.assertEqual(
+            token_from_scope({'query_string': b'', 'headers': [(b'authorization', b'Bearer abc')]}),
+            'abc',
+        )
+
+    def test_role_claim_connects_without_queries(self):
+        from accounts.tokens import UserRefreshToken
+        token = UserRefreshToken.for_user(self.user).access_token
+        application = self.application()
+
+        self.assertTrue(self.connect(application, f'/ws/notifications/?v=2&token={token}'))
+        user = self.authenticate(application, token)
+
+        self.assertEqual(application.user_loads, 0)
+        self.assertEqual(user.id, self.user.id)
+        self.assertTrue(user.is_collaborator())
+        self.assertTrue(user.can_edit_projects())
+        self.assertFalse(user.is_admin())
+
+    def test_invalid_or_missing_token_is_rejected(self):
+        from accounts.tokens import UserRefreshToken
+        refresh = UserRefreshToken.for_user(self.user)
+        application = self.application()
+        for path in ('/ws/notifications/', '/ws/notifications/?token=basura',
+                     f'/ws/notifications/?token={refresh}'):
+            self.assertFalse(self.connect(application, path), path)
+
+    def test_legacy_token_loads_active_user_once(self):
+        from rest_framework_simplejwt.tokens import RefreshToken
+        token = RefreshToken.for_user(self.user).access_token
+        application = self.application()
+
+        self.assertTrue(self.connect(application, f'/ws/notifications/?token={token}'))
+        self.assertEqual(application.user_loads, 1)
+        self.assertEqual(self.authenticate(application, token).role, 'collaborator')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.connect(application, f'/ws/notifications/?token={token}'))
+
+    @override_settings(WEBSOCKET_AUTH={'USER_CACHE_TTL': 60})
+    def test_user_cache_ttl(self):
+        from accounts.tokens import UserRefreshToken
+        token = UserRefreshToken.for_user(self.user).access_token
+        application = self.application()
+
+        for _ in range(3):
+            self.assertTrue(self.connect(application, f'/ws/notifications/?token={token}'))
+        self.assertIsInstance(self.authenticate(application, token), User)
+        self.assertEqual(application.user_loads, 1)
+
+    @override_settings(WEBSOCKET_AUTH={'USER_CACHE_TTL': 60})
+    def test_user_cache_checks_active_user_and_current_role(self):
+        from accounts.tokens import UserRefreshToken
+        token = UserRefreshToken.for_user(self.user).access_token
+        application = self.application()
+
+        self.user.role = 'viewer'
+        self.user.save()
+        self.assertTrue(self.authenticate(application, token).is_viewer())
+
+        application.user_cache.clear()
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.connect(application, f'/ws/notifications/?token={token}'))
+
+    def test_refresh_reads_current_role(self):
+        from accounts.tokens import UserRefreshToken
+        from rest_framework_simplejwt.tokens import AccessToken
+        refresh = UserRefreshToken.for_user(self.user)
+        self.assertNotIn('role', refresh.payload)
+        self.assertEqual(AccessToken(str(refresh.access_token))['role'], 'collaborator')
+
+        self.user.role = 'viewer'
+        self.user.save()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(refresh)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'viewer')
+        self.assertNotIn('role', UserRefreshToken(response.data['refresh']).payload)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': response.data['refresh']})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_drops_role_of_legacy_refresh_tokens(self):
+        from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+        refresh = RefreshToken.for_user(self.user)
+        refresh['role'] = 'admin'
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': str(refresh)})
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'collaborator')
+
+
+class NotificationConsumerBatchingTests(TestCase):
+    """Agrupación de notificaciones por conexión y límite del buffer"""
+
+    def setUp(self):
+        from accounts.tokens import UserRefreshToken
+        self.user = User.objects.create_user('socket', 'socket@example.com', 'pass', role='viewer')
+        self.path = f'/ws/notifications/?token={UserRefreshToken.for_user(self.user).access_token}'
+
+    def receive_after_burst(self, count):
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+        from accounts.middleware import JWTAuthMiddleware
+        from project_management.routing import websocket_urlpatterns
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                JWTAuthMiddleware(URLRouter(websocket_urlpatterns)), self.path
+            )
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            channel_layer = get_channel_layer()
+            for index in range(count):
+                await channel_layer.group_send(f'notifications_{self.user.id}', {
+                    'type': 'notification_message', 'notification': {'id': index},
+                })
+            frame = await communicator.receive_json_from(timeout=2)
+            nothing_else = await communicator.receive_nothing(timeout=0.2)
+            await communicator.disconnect()
+            return frame, nothing_else
+
+        return async_to_sync(run)()
+
+    def test_single_event_keeps_notification_frame(self):
+        frame, nothing_else = self.receive_after_burst(1)
+        self.assertEqual(frame, {'type': 'notification', 'notification': {'id': 0}, 'seq': 1})
+        self.assertTrue(nothing_else)
+
+    def test_burst_is_coalesced_into_one_frame(self):
+        frame, nothing_else = self.receive_after_burst(50)
+        self.assertEqual(frame['type'], 'notifications')
+        self.assertEqual([item['id'] for item in frame['notifications']], list(range(50)))
+        self.assertNotIn('dropped', frame)
+        self.assertTrue(nothing_else)
+
+    @override_settings(WEBSOCKET_DELIVERY={'MAX_PENDING': 10})
+    def test_pending_buffer_is_bounded(self):
+        frame, _ = self.receive_after_burst(25)
+        self.assertEqual([item['id'] for item in frame['notifications']], list(range(15, 25)))
+        self.assertEqual(frame['dropped'], 15)
+
+    def receive_spaced_events(self, count, ack):
+        """
+        `count` eventos en frames separados. Si el cliente confirma cada frame
+        devuelve si no llegó nada más; si deja de leer, los mensajes hasta el cierre
+        """
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+        from accounts.middleware import JWTAuthMiddleware
+        from project_management.routing import websocket_urlpatterns
+
+        async def run():
+            communicator = WebsocketCommunicator(
+                JWTAuthMiddleware(URLRouter(websocket_urlpatterns)), self.path
+            )
+            await communicator.connect()
+            channel_layer = get_channel_layer()
+            for index in range(count):
+                await channel_layer.group_send(f'notifications_{self.user.id}', {
+                    'type': 'notification_message', 'notification': {'id': index},
+                })
+                await asyncio.sleep(0.05)
+                if ack:
+                    frame = await communicator.receive_json_from(timeout=2)
+                    await communicator.send_json_to({'type': 'ack', 'seq': frame['seq']})
+            if ack:
+                nothing_else = await communicator.receive_nothing(timeout=0.5)
+                await communicator.disconnect()
+                return nothing_else
+            messages = [await communicator.receive_output(timeout=2)]
+            while messages[-1]['type'] != 'websocket.close':
+                messages.append(await communicator.receive_output(timeout=2))
+            await communicator.wait()
+            return messages
+
+        return async_to_sync(run)()
+
+    @override_settings(WEBSOCKET_DELIVERY={'BATCH_WINDOW': 0.01, 'MAX_UNACKED': 2, 'ACK_TIMEOUT': 0.3})
+    def test_client_that_stops_reading_is_disconnected(self):
+        from .consumers import SLOW_CONSUMER_CLOSE_CODE
+        messages = self.receive_spaced_events(5, ack=False)
+
+        frames = [json.loads(message['text']) for message in messages if message['type'] == 'websocket.send']
+        self.assertEqual([frame['seq'] for frame in frames], [1, 2])
+        self.assertEqual(messages[-1], {'type': 'websocket.close', 'code': SLOW_CONSUMER_CLOSE_CODE})
+
+    @override_settings(WEBSOCKET_DELIVERY={'BATCH_WINDOW': 0.01, 'MAX_UNACKED': 2, 'ACK_TIMEOUT': 0.3})
+    def test_acknowledging_client_keeps_receiving(self):
+        self.assertTrue(self.receive_spaced_events(5, ack=True))
+
+
+@override_settings(LIVE_UPDATES={'BACKEND': 'projects.live.InlineBroadcastBackend'})
+class ProjectLiveUpdatesTests(TransactionTestCase):
+    """Canal ws/projects/<id>/: suscripción según visibilidad y deltas de escritura"""
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        self.member = User.objects.create_user('member', 'member@example.com', 'pass', role='viewer')
+        self.outsider = User.objects.create_user('outsider', 'outsider@example.com', 'pass', role='viewer')
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        self.project = Project.objects.create(name='Vivo', owner=self.owner, start_date=date.today())
+        self.membership = ProjectMember.objects.create(project=self.project, user=self.member)
+        self.task = Task.objects.create(
+            title='Inicial', project=self.project, assigned_to=self.member, created_by=self.owner
+        )
+
+    def communicator(self, user, project_id=None):
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+        from accounts.middleware import JWTAuthMiddleware
+        from accounts.tokens import UserRefreshToken
+        from project_management.routing import websocket_urlpatterns
+        token = UserRefreshToken.for_user(user).access_token
+        return WebsocketCommunicator(
+            JWTAuthMiddleware(URLRouter(websocket_urlpatterns)),
+            f'/ws/projects/{project_id or self.project.pk}/?token={token}',
+        )
+
+    async def receive_deltas(self, communicator):
+        deltas = []
+        while not await communicator.receive_nothing(timeout=0.3):
+            frame = await communicator.receive_json_from()
+            deltas.extend(frame['deltas'] if frame['type'] == 'deltas' else [frame['delta']])
+        return deltas
+
+    def test_subscription_follows_project_visibility(self):
+        async def connects(user, project_id=None):
+            communicator = self.communicator(user, project_id)
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+
+        async def run():
+            return [
+                await connects(self.owner), await connects(self.member), await connects(self.admin),
+                await connects(self.outsider), await connects(self.admin, project_id=999999),
+            ]
+
+        self.assertEqual(async_to_sync(run)(), [True, True, True, False, False])
+
+    @override_settings(WEBSOCKET_AUTH={'USER_CACHE_TTL': 0})
+    def test_subscription_checks_role_and_membership_in_database(self):
+        # Tokens emitidos antes de los cambios: sus claims ya no son válidos
+        admin = self.communicator(self.admin)
+        member = self.communicator(self.member)
+        owner = self.communicator(self.owner)
+        self.admin.role = 'viewer'
+        self.admin.save()
+        self.membership.delete()
+        self.owner.is_active = False
+        self.owner.save()
+
+        async def run():
+            results = []
+            for communicator in (admin, member, owner):
+                connected, _ = await communicator.connect()
+                await communicator.disconnect()
+                results.append(connected)
+            return results
+
+        self.assertEqual(async_to_sync(run)(), [False, False, False])
+
+    def test_writes_publish_compact_deltas(self):
+        from channels.db import database_sync_to_async
+
+        def write():
+            task = Task.objects.create(
+                title='Nueva', project=self.project, assigned_to=self.member, created_by=self.owner
+            )
+            comment = TaskComment.objects.create(task=self.task, author=self.member, content='Hola')
+            client = APIClient()
+            client.force_authenticate(self.owner)
+            response = client.post(reverse('projects:bulk_tasks'), {
+                'action': 'update_status', 'ids': [self.task.pk, task.pk], 'status': 'completed',
+            }, format='json')
+            self.assertEqual(response.status_code, 200)
+            ids = task.pk, comment.pk
+            comment.delete()
+            task.delete()
+            return ids
+
+        async def run():
+            communicator = self.communicator(self.member)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            task_id, comment_id = await database_sync_to_async(write)()
+            deltas = await self.receive_deltas(communicator)
+            await communicator.disconnect()
+            return task_id, comment_id, deltas
+
+        task_id, comment_id, deltas = async_to_sync(run)()
+        summary = [(delta['kind'], delta['action'], delta['id']) for delta in deltas]
+        self.assertEqual(summary[:2], [('task', 'created', task_id), ('comment', 'created', comment_id)])
+        self.assertCountEqual(summary[2:4], [('task', 'updated', self.task.pk), ('task', 'updated', task_id)])
+        self.assertEqual(summary[4:], [('comment', 'deleted', comment_id), ('task', 'deleted', task_id)])
+        self.assertEqual({delta['status'] for delta in deltas[2:4]}, {'completed'})
+        self.assertEqual(deltas[1]['task'], self.task.pk)
+
+    def test_removed_member_is_disconnected(self):
+        from channels.db import database_sync_to_async
+
+        async def run():
+            communicator = self.communicator(self.member)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await database_sync_to_async(self.membership.delete)()
+            return await communicator.receive_output(timeout=2)
+
+        self.assertEqual(async_to_sync(run)()['type'], 'websocket.close')
+
+
+@override_settings(NOTIFICATIONS=INLINE_NOTIFICATIONS)
+class UnreadCounterTests(TransactionTestCase):
+    """Contador de no leídas: ajustes, envío por WebSocket y reconciliación"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('reader', 'reader@example.com', 'pass', role='viewer')
+
+    def test_counter_follows_delivery_and_reads(self):
+        from .notification_views import send_notification
+        from .unread import get_unread_count
+
+        self.assertEqual(get_unread_count(self.user.id), 0)
+        for index in range(3):
+            send_notification(self.user, 'task_assigned', f'N{index}', '-')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_unread_count(self.user.id), 3)
+
+        notification = Notification.objects.filter(user=self.user).first()
+        notification.mark_as_read()
+        notification.mark_as_read()
+        self.assertEqual(get_unread_count(self.user.id), 2)
+
+    def test_consumer_pushes_counter_changes(self):
+        from channels.db import database_sync_to_async
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+        from accounts.middleware import JWTAuthMiddleware
+        from accounts.tokens import UserRefreshToken
+        from project_management.routing import websocket_urlpatterns
+        from .notification_views import send_notification
+
+        path = f'/ws/notifications/?token={UserRefreshToken.for_user(self.user).access_token}'
+
+        async def run():
+            communicator = WebsocketCommunicator(JWTAuthMiddleware(URLRouter(websocket_urlpatterns)), path)
+            await communicator.connect()
+            notification = await database_sync_to_async(
+                lambda: Notification.objects.create(user=self.user, type='task_assigned', title='A', message='-')
+            )()
+            await database_sync_to_async(send_notification)(self.user, 'task_assigned', 'B', '-')
+            first = await communicator.receive_json_from(timeout=2)
+            await communicator.send_json_to({'type': 'mark_as_read', 'notification_id': notification.id})
+            second = await communicator.receive_json_from(timeout=2)
+            await communicator.disconnect()
+            return first, second
+
+        from .unread import get_unread_count
+        # Contador conocido antes de conectar; la notificación A se crea sin ajustarlo
+        Notification.objects.create(user=self.user, type='task_assigned', title='Z', message='-')
+        self.assertEqual(get_unread_count(self.user.id), 1)
+        first, second = async_to_sync(run)()
+        self.assertEqual(first['type'], 'notification')
+        self.assertEqual(first['unread_count'], 2)
+        self.assertEqual(second, {'type': 'unread_count', 'unread_count': 1, 'seq': 2})
+
+    def test_reconcile_fixes_drift(self):
+        from .unread import get_unread_count
+        Notification.objects.create(user=self.user, type='task_assigned', title='A', message='-')
+        self.assertEqual(get_unread_count(self.user.id), 1)
+        # Un borrado directo no ajusta el contador
+        Notification.objects.filter(user=self.user).delete()
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+        out = StringIO()
+        call_command('reconcile_notification_counters', '--dry-run', stdout=out)
+        self.assertIn(f'Usuario {self.user.id}: 1 -> 0', out.getvalue())
+        self.assertEqual(get_unread_count(self.user.id), 1)
+
+        call_command('reconcile_notification_counters', stdout=StringIO())
+        self.assertEqual(get_unread_count(self.user.id), 0)
+
+
+class SearchTests(APITestCase):
+    """Búsqueda de texto: ranking, prefijos, visibilidad e índice al día"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        cls.member = User.objects.create_user('member', 'member@example.com', 'pass', role='viewer')
+        cls.outsider = User.objects.create_user('outsider', 'outsider@example.com', 'pass', role='viewer')
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', role='admin')
+        cls.project = Project.objects.create(
+            name='Migración de facturación', description='Mover cobros al sistema nuevo',
+            owner=cls.owner, start_date=date.today(),
+        )
+        ProjectMember.objects.create(project=cls.project, user=cls.member)
+        cls.assigned = Task.objects.create(
+            title='Revisar facturación', description='Comprobar importes', project=cls.project,
+            assigned_to=cls.member, created_by=cls.owner,
+        )
+        cls.other = Task.objects.create(
+            title='Diseño', description='La facturación se revisa aparte', project=cls.project,
+            assigned_to=cls.owner, created_by=cls.owner,
+        )
+        cls.comment = TaskComment.objects.create(
+            task=cls.other, author=cls.owner, content='Pendiente de la auditoría',
+        )
+
+    def search(self, user, **params):
+        self.client.force_authenticate(user)
+        return self.client.get(reverse('projects:search'), params)
+
+    def hits(self, user, **params):
+        response = self.search(user, **params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(hit['type'], hit['id']) for hit in response.data['results']]
+
+    def test_ranks_title_matches_first_across_kinds(self):
+        hits = self.hits(self.admin, q='facturacion')
+        self.assertEqual(set(hits), {
+            ('project', self.project.pk), ('task', self.assigned.pk), ('task', self.other.pk),
+        })
+        self.assertEqual(hits[-1], ('task', self.other.pk))
+
+    def test_prefix_and_filters(self):
+        self.assertEqual(self.hits(self.admin, q='audit'), [('comment', self.comment.pk)])
+        self.assertEqual(
+            self.hits(self.admin, q='facturación', type='task', project=self.project.pk),
+            [('task', self.assigned.pk), ('task', self.other.pk)],
+        )
+        response = self.search(self.admin, q='auditoría')
+        self.assertEqual(response.data['results'][0]['title'], 'Diseño')
+        self.assertIsNone(response.data['next'])
+
+    def test_visibility_matches_listings(self):
+        self.assertEqual(self.hits(self.outsider, q='facturación'), [])
+        self.assertEqual(
+            set(self.hits(self.member, q='facturación')),
+            {('project', self.project.pk), ('task', self.assigned.pk)},
+        )
+        # Los comentarios siguen task_comments: visibles para los miembros del proyecto
+        self.assertEqual(self.hits(self.member, q='auditoría'), [('comment', self.comment.pk)])
+        self.assertEqual(self.hits(self.outsider, q='auditoría'), [])
+
+    def test_index_follows_writes(self):
+        self.comment.content = 'Aprobado por legal'
+        self.comment.save()
+        self.assertEqual(self.hits(self.admin, q='auditoría'), [])
+        self.assertEqual(self.hits(self.admin, q='legal'), [('comment', self.comment.pk)])
+
+        other_project = Project.objects.create(name='Otro', owner=self.admin, start_date=date.today())
+        self.other.project = other_project
+        self.other.save()
+        response = self.search(self.admin, q='legal')
+        self.assertEqual(response.data['results'][0]['project'], other_project.pk)
+
+        self.other.delete()
+        self.assertEqual(self.hits(self.admin, q='legal'), [])
+
+    def test_bulk_created_tasks_are_indexed(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(reverse('projects:bulk_tasks'), {'action': 'create', 'tasks': [
+            {'title': 'Inventario anual', 'project': self.project.pk, 'assigned_to': self.owner.pk},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([hit[0] for hit in self.hits(self.admin, q='inventario')], ['task'])
+
+    def test_rejects_invalid_parameters(self):
+        self.assertEqual(self.search(self.admin).status_code, 400)
+        self.assertEqual(self.search(self.admin, q='x', type='task,user').status_code, 400)
+        self.assertEqual(self.search(self.admin, q='x', project='uno').status_code, 400)
+
+    def test_rebuild_command(self):
+        from .models import SearchDocument
+        SearchDocument.objects.all().delete()
+        self.assertEqual(self.hits(self.admin, q='auditoría'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.hits(self.admin, q='auditoría'), [('comment', self.comment.pk)])
+
+
+@override_settings(NOTIFICATIONS=INLINE_NOTIFICATIONS)
+class ReminderSchedulerTests(TestCase):
+    """Avisos de 'vence pronto' y 'vencida' desde el montículo de plazos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        cls.worker = User.objects.create_user('worker', 'worker@example.com', 'pass', role='viewer')
+        cls.project = Project.objects.create(name='Plazos', owner=cls.owner, start_date=date.today())
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def task(self, title, due_in, status='pending', assigned_to=None):
+        return Task.objects.create(
+            title=title, project=self.project, status=status, created_by=self.owner,
+            assigned_to=assigned_to or self.worker, due_date=self.now + due_in,
+        )
+
+    def scheduler(self):
+        from .reminders import ReminderScheduler
+        return ReminderScheduler(due_soon=24 * 3600, horizon=3600, catch_up=24 * 3600)
+
+    def tick(self, scheduler, now=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return scheduler.tick(now or self.now)
+
+    def notifications(self):
+        return list(Notification.objects.order_by('id').values_list('user__username', 'type', 'message'))
+
+    def test_fires_each_reminder_once(self):
+        soon = self.task('Informe', timedelta(hours=2))
+        late = self.task('Factura', -timedelta(hours=1))
+        self.task('Lejana', timedelta(days=3))
+        self.task('Hecha', -timedelta(hours=1), status='completed')
+        self.task('Antigua', -timedelta(days=3))
+
+        self.assertEqual(self.tick(self.scheduler()), 2)
+        self.assertCountEqual([(kind, message.split('"')[1]) for _, kind, message in self.notifications()], [
+            ('task_due_soon', 'Informe'), ('task_overdue', 'Factura'),
+        ])
+        soon.refresh_from_db()
+        self.assertEqual(soon.due_soon_notified_for, soon.due_date)
+        self.assertIsNone(soon.overdue_notified_for)
+
+        # Otro proceso (reinicio) no repite avisos; al vencer, solo el de vencida
+        self.assertEqual(self.tick(self.scheduler()), 0)
+        self.assertEqual(self.tick(self.scheduler(), self.now + timedelta(hours=2, seconds=1)), 1)
+        self.assertEqual(self.notifications()[-1][1], 'task_overdue')
+        self.assertEqual(Notification.objects.filter(task=late).count(), 1)
+
+    def test_batches_reminders_per_assignee(self):
+        self.task('Uno', timedelta(hours=1))
+        self.task('Dos', timedelta(hours=5))
+        self.task('Tres', timedelta(hours=3), assigned_to=self.owner)
+
+        self.assertEqual(self.tick(self.scheduler()), 3)
+        notifications = {username: message for username, _, message in self.notifications()}
+        self.assertEqual(notifications['worker'], 'Tienes 2 tareas próximas a vencer')
+        self.assertIn('"Tres"', notifications['owner'])
+
+    def test_notifications_are_written_with_the_claim(self):
+        task = self.task('Informe', timedelta(hours=2))
+        receive = receive_from_group(f'notifications_{self.worker.id}')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(self.scheduler().tick(self.now), 1)
+            # Fila y marca en la misma transacción; solo el envío espera al commit
+            self.assertEqual(self.notifications()[0][1], 'task_due_soon')
+            task.refresh_from_db()
+            self.assertEqual(task.due_soon_notified_for, task.due_date)
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertEqual(receive()['notification']['task'], {'id': task.pk, 'title': 'Informe'})
+
+    def test_new_due_date_rearms_reminders(self):
+        task = self.task('Informe', timedelta(hours=2))
+        self.assertEqual(self.tick(self.scheduler()), 1)
+
+        task.due_date = self.now + timedelta(hours=4)
+        task.save()
+        self.assertEqual(self.tick(self.scheduler()), 1)
+        self.assertEqual(Notification.objects.filter(task=task, type='task_due_soon').count(), 2)
+
+    def test_deltas_update_the_heap(self):
+        from .live import task_delta
+        scheduler = self.scheduler()
+        self.tick(scheduler)
+        self.assertIsNone(scheduler.next_time())
+
+        task = self.task('Nueva', timedelta(minutes=30))
+        scheduler.apply_deltas([task_delta(task, 'created')], self.now)
+        self.assertEqual(scheduler.next_time(), task.due_date - timedelta(days=1))
+
+        # La fecha nueva deja obsoletas las entradas anteriores
+        task.due_date = self.now + timedelta(days=2)
+        task.save()
+        scheduler.apply_deltas([task_delta(task, 'updated')], self.now)
+        self.assertIsNone(scheduler.next_time())
+
+        task.due_date = self.now + timedelta(minutes=10)
+        task.status = 'completed'
+        task.save()
+        scheduler.apply_deltas([task_delta(task, 'updated')], self.now)
+        self.assertIsNone(scheduler.next_time())
+        self.assertEqual(self.tick(scheduler, self.now + timedelta(minutes=11)), 0)
+
+    def test_ticks_read_only_the_due_date_window(self):
+        for hours in range(-2, 3):
+            self.task(f'Tarea {hours}', timedelta(hours=hours, minutes=30))
+        scheduler = self.scheduler()
+        with CaptureQueriesContext(connection) as queries:
+            self.tick(scheduler)
+        load = [query['sql'] for query in queries if 'due_soon_notified_for' in query['sql']][0]
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {load}')
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('USING INDEX', plan)
+        self.assertNotIn('SCAN tasks', plan)
+
+        # Sin avisos pendientes ni ventana por ampliar no hay consultas
+        with self.assertNumQueries(0):
+            self.tick(scheduler, self.now + timedelta(minutes=5))
+        self.assertGreater(scheduler.timeout(self.now + timedelta(minutes=5)), 0)
+
+    def test_once_command(self):
+        self.task('Informe', timedelta(hours=2))
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('run_reminders', '--once', stdout=out)
+        self.assertIn('1 aviso(s)', out.getvalue())
+
+    def test_long_running_command_requires_a_shared_channel_layer(self):
+        from django.core.management.base import CommandError
+
+        with self.assertRaisesMessage(CommandError, 'channel layer compartido'):
+            call_command('run_reminders', stdout=StringIO())
+
+
+@override_settings(
+    NOTIFICATIONS=INLINE_NOTIFICATIONS,
+    LIVE_UPDATES={'BACKEND': 'projects.live.InlineBroadcastBackend'},
+)
+class ReminderProcessTests(TransactionTestCase):
+    """El proceso recibe las escrituras por el channel layer y avisa al vencer"""
+
+    def test_schedules_written_tasks(self):
+        from channels.db import database_sync_to_async
+        from .reminders import ReminderScheduler
+
+        owner = User.objects.create_user('owner', 'owner@example.com', 'pass', role='collaborator')
+        project = Project.objects.create(name='Plazos', owner=owner, start_date=date.today())
+
+        def write():
+            return Task.objects.create(
+                title='Urgente', project=project, assigned_to=owner, created_by=owner,
+                due_date=timezone.now() + timedelta(seconds=1),
+            )
+
+        def kinds():
+            return list(Notification.objects.order_by('id').values_list('type', flat=True))
+
+        async def run():
+            scheduler = asyncio.ensure_future(ReminderScheduler(due_soon=3600).run())
+            await asyncio.sleep(0.2)
+            await database_sync_to_async(write)()
+            for _ in range(40):
+                await asyncio.sleep(0.1)
+                if len(await database_sync_to_async(kinds)()) == 2:
+                    break
+            scheduler.cancel()
+            return await database_sync_to_async(kinds)()
+
+        self.assertEqual(async_to_sync(run)(), ['task_due_soon', 'task_overdue'])
@@ -0,0 +1,89 @@
+"""
+Contador de notificaciones no leídas por usuario
+
+Vive en la caché (`notifications:unread:<usuario>`) y se ajusta con incr
+atómicos: +n al entregar notificaciones, -n al marcarlas como leídas. Si la
+clave no existe el valor se desconoce y se recalcula con COUNT en la
+siguiente lectura, de modo que perder la entrada (caducidad, desalojo,
+reinicio) solo cuesta una consulta. Los borrados en cascada no ajustan el
+contador; reconcile_notification_counters corrige esas desviaciones.
+
+Cada cambio se envía también por WebSocket al grupo del usuario.
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+
+
+logger = logging.getLogger(__name__)
+
+UNREAD_COUNT_TTL = 24 * 60 * 60
+
+
+def unread_count_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def count_unread(user_ids):
+    """No leídas reales por usuario, con una consulta agrupada"""
+    from .models import Notification
+    counts = dict(
+        Notification.objects.filter(user_id__in=user_ids, is_read=False)
+        .order_by().values('user').annotate(total=Count('pk')).values_list('user', 'total')
+    )
+    return {user_id: counts.get(user_id, 0) for user_id in user_ids}
+
+
+def get_unread_count(user_id):
+    """Contador del usuario: una lectura de caché, o COUNT si no se conoce"""
+    value = cache.get(unread_count_key(user_id))
+    if value is None:
+        value = count_unread([user_id])[user_id]
+        cache.add(unread_count_key(user_id), value, UNREAD_COUNT_TTL)
+    return max(value, 0)
+
+
+def adjust_unread_counts(deltas):
+    """
+    Suma a cada contador conocido su delta (usuario -> incremento) y
+    devuelve los valores nuevos; los desconocidos se quedan sin clave
+    """
+    counts = {}
+    for user_id, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            counts[user_id] = max(cache.incr(unread_count_key(user_id), delta), 0)
+        except ValueError:
+            pass
+    return counts
+
+
+def unread_count_messages(counts):
+    """Mensajes para NotificationConsumer.unread_count"""
+    return [
+        (f'notifications_{user_id}', {'type': 'unread_count', 'count': count})
+        for user_id, count in counts.items()
+    ]
+
+
+def push_unread_counts(counts):
+    from .notifications import _group_send_all
+    channel_layer = get_channel_layer()
+    if channel_layer is None or not counts:
+        return
+    try:
+        async_to_sync(_group_send_all)(channel_layer, unread_count_messages(counts))
+    except Exception:
+        logger.exception("Falló el envío del contador de no leídas a %s usuarios", len(counts))
+
+
+def update_unread_counts(deltas):
+    """Ajusta los contadores y envía los valores nuevos tras el commit"""
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: push_unread_counts(adjust_unread_counts(deltas)))
@@ -6,12 +6,18 @@ app_name = 'projects'
 urlpatterns = [
     # Proyectos
     path('', views.ProjectListView.as_view(), name='project_list'),
+    path('stats/', views.portfolio_stats, name='portfolio_stats'),
     path('<int:pk>/', views.ProjectDetailView.as_view(), name='project_detail'),
     path('<int:project_id>/stats/', views.project_stats, name='project_stats'),
+    path('search/', views.search, name='search'),
+    path('export/', views.export_user_data, name='export'),
+    path('<int:project_id>/export/', views.export_project, name='export_project'),
     
     # Tareas
     path('tasks/', views.TaskListView.as_view(), name='task_list'),
     path('tasks/<int:pk>/', views.TaskDetailView.as_view(), name='task_detail'),
+    path('tasks/bulk/', views.bulk_tasks, name='bulk_tasks'),
+    path('tasks/import/', views.import_tasks, name='import_tasks'),
     path('tasks/<int:task_id>/status/', views.update_task_status, name='update_task_status'),
     path('<int:project_id>/tasks/', views.TaskListView.as_view(), name='project_tasks'),
     path('my-tasks/', views.user_tasks, name='user_tasks'),
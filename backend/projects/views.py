@@ -1,33 +1,71 @@
+import logging
+
 from rest_framework import generics, status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Q, Count
+from django.db import transaction
 from django.utils import timezone
 from .models import Project, ProjectMember, Task, TaskComment
+from .access import get_access
+from .caching import PROJECT_LISTS_NAMESPACE, cached, project_namespace
+from .conditional import (
+    comment_versions, comments_validators, not_modified, project_validators, set_validators, task_validators,
+)
+from .dashboard import invalidate_dashboards, task_dashboard_users
+from .exports import FORMATS as EXPORT_FORMATS, PROJECT_COLUMNS, TASK_COLUMNS, export_response
+from .filters import PROJECT_FILTERS, TASK_FILTERS, InvalidFilter
+from .imports import (
+    IMPORT_BATCH_SIZE, InvalidImport, TaskImport, create_tasks, input_format_for, read_rows,
+    validate_task_items,
+)
+from .live import publish_tasks
+from .pagination import CountedPagePagination, OptionalKeysetPagination, UncountedPagePagination
+from .renderers import default_renderer
+from .search import search_documents
+from .streaming import buffered, streaming_response
 from accounts.models import User
 from .serializers import (
     ProjectSerializer, ProjectDetailSerializer, ProjectMemberSerializer,
     ProjectMemberCreateSerializer, TaskSerializer, TaskDetailSerializer,
     ProjectStatsSerializer, TaskCommentSerializer, TaskCommentCreateSerializer,
-    TaskStatusUpdateSerializer
+    TaskStatusUpdateSerializer, TaskBulkSerializer, TaskListFastSerializer
 )
 
 
+logger = logging.getLogger(__name__)
+
+
+PROJECT_LIST_CACHE_TTL = 300
+# Las estadísticas incluyen tareas vencidas, que cambian con la hora
+STATS_CACHE_TTL = 60
+
+
+def filter_listing(filterset, queryset, request, bound):
+    """
+    Filtros y orden de la query string (ver filters.py) sobre un listado con
+    OptionalKeysetPagination, cuyo modo cursor ya ordena por fecha de creación
+    """
+    if filterset.ordering_param in request.query_params and OptionalKeysetPagination().use_keyset(request):
+        raise InvalidFilter('El parámetro ordering no se puede combinar con la paginación por cursor.')
+    return filterset.apply(queryset, request.query_params, bound)
+
+
 class ProjectListView(generics.ListCreateAPIView):
-    """Vista para listar y crear proyectos"""
+    """
+    Vista para listar y crear proyectos
+    Filtros: status, priority, owner; orden con ordering=created_at|end_date|priority
+    """
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     
     def get_queryset(self):
         user = self.request.user
-        if user.is_admin():
-            return Project.objects.all()
-        elif user.is_collaborator():
-            return Project.objects.filter(
-                Q(owner=user) | Q(members__user=user)
-            ).distinct()
-        else:
-            return Project.objects.filter(members__user=user).distinct()
+        # Fuera de administración solo se ven proyectos propios o de los que se es miembro
+        bound = () if user.is_admin() else ['membership']
+        return filter_listing(
+            PROJECT_FILTERS, Project.objects.visible_to(user).with_counts(), self.request, bound
+        )
     
     def get_serializer_context(self):
         """Pasa el request al serializer para los permisos"""
@@ -35,6 +73,19 @@ class ProjectListView(generics.ListCreateAPIView):
         context['request'] = self.request
         return context
     
+    def list(self, request, *args, **kwargs):
+        """Lista en caché por usuario y URL (incluye filtros, página y cursor)"""
+        try:
+            data = cached(
+                PROJECT_LISTS_NAMESPACE,
+                ('project_list', request.user.id, request.build_absolute_uri()),
+                lambda: super(ProjectListView, self).list(request, *args, **kwargs).data,
+                PROJECT_LIST_CACHE_TTL,
+            )
+        except InvalidFilter as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+    
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
@@ -45,15 +96,7 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        if user.is_admin():
-            return Project.objects.all()
-        elif user.is_collaborator():
-            return Project.objects.filter(
-                Q(owner=user) | Q(members__user=user)
-            ).distinct()
-        else:
-            return Project.objects.filter(members__user=user).distinct()
+        return Project.objects.visible_to(self.request.user).with_counts()
     
     def get_serializer_context(self):
         """Pasa el request al serializer para los permisos"""
@@ -61,6 +104,16 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
         context['request'] = self.request
         return context
     
+    def retrieve(self, request, *args, **kwargs):
+        """GET condicional: 304 si el cliente ya tiene esta versión"""
+        validators = project_validators(
+            Project.objects.visible_to(request.user), kwargs['pk'], request.user
+        )
+        response = not_modified(request, validators)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, validators)
+    
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         if not instance.can_user_edit(request.user):
@@ -81,15 +134,22 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 
 class TaskListView(generics.ListCreateAPIView):
-    """Vista para listar y crear tareas"""
+    """
+    Vista para listar y crear tareas
+    Filtros: status, priority, assignee, created_by, project, due_after,
+    due_before, overdue=true; orden con ordering=due_date|priority|created_at
+    """
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalKeysetPagination
     
     def get_queryset(self):
         project_id = self.kwargs.get('project_id')
         user = self.request.user
         
         queryset = Task.objects.all()
+        # Columnas que el ámbito ya acota, para elegir el plan de filtros
+        bound = []
         
         if project_id:
             try:
@@ -97,11 +157,13 @@ class TaskListView(generics.ListCreateAPIView):
                 # Solo super admin o usuarios que son miembros del proyecto Y tienen tareas asignadas
                 if user.is_superuser or user.is_admin():
                     queryset = queryset.filter(project=project)
-                elif project.members.filter(user=user).exists():
+                    bound = ['project']
+                elif get_access(self.request).is_member(project.id):
                     queryset = queryset.filter(
                         project=project,
                         assigned_to=user
                     )
+                    bound = ['project', 'assigned_to']
                 else:
                     return Task.objects.none()
             except Project.DoesNotExist:
@@ -112,10 +174,23 @@ class TaskListView(generics.ListCreateAPIView):
             else:
                 # Usuarios solo ven tareas asignadas a ellos Y donde son miembros del proyecto
                 queryset = queryset.filter(
-                    Q(assigned_to=user) & Q(project__members__user=user)
-                ).distinct()
+                    assigned_to=user, project_id__in=get_access(self.request).member_project_ids
+                )
+                bound = ['assigned_to']
         
-        return queryset
+        return filter_listing(TASK_FILTERS, queryset, self.request, bound)
+    
+    def list(self, request, *args, **kwargs):
+        """Lista por la vía rápida: filas de .values() en lugar de instancias"""
+        try:
+            queryset = self.filter_queryset(self.get_queryset())
+        except InvalidFilter as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        rows = TaskListFastSerializer.values(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(TaskListFastSerializer(page).data)
+        return Response(TaskListFastSerializer(rows).data)
     
     def perform_create(self, serializer):
         project_id = self.kwargs.get('project_id')
@@ -152,8 +227,8 @@ class TaskListView(generics.ListCreateAPIView):
                     project=task.project,
                     task=task
                 )
-        except Exception as e:
-            print(f"❌ Error creating task: {str(e)}")
+        except Exception:
+            logger.exception("Error creando tarea (proyecto %s)", project_id)
             raise
 
 
@@ -163,15 +238,15 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        user = self.request.user
-        if user.is_admin():
-            return Task.objects.all()
-        elif user.is_collaborator():
-            return Task.objects.filter(
-                Q(project__owner=user) | Q(project__members__user=user)
-            ).distinct()
-        else:
-            return Task.objects.filter(project__members__user=user).distinct()
+        return Task.objects.visible_to(self.request.user)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """GET condicional: 304 si el cliente ya tiene esta versión"""
+        validators = task_validators(self.get_queryset(), kwargs['pk'], request.user)
+        response = not_modified(request, validators)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+        return set_validators(response, validators)
     
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -215,55 +290,159 @@ class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().destroy(request, *args, **kwargs)
 
 
+# Máximo de proyectos por petición en las estadísticas de portafolio
+MAX_STATS_PROJECTS = 200
+
+EMPTY_TASK_STATS = {
+    'total_tasks': 0,
+    'completed_tasks': 0,
+    'in_progress_tasks': 0,
+    'pending_tasks': 0,
+    'overdue_tasks': 0,
+}
+
+
+def _build_stats(task_stats, member_stats):
+    """Combina las estadísticas de tareas y miembros de un proyecto"""
+    total_tasks = task_stats['total_tasks']
+    progress_percentage = (
+        round((task_stats['completed_tasks'] / total_tasks * 100), 2) if total_tasks > 0 else 0
+    )
+    return {
+        **task_stats,
+        'progress_percentage': progress_percentage,
+        'total_members': member_stats['total_members'],
+        'active_members': member_stats['active_members'],
+    }
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def project_stats(request, project_id):
     """Vista para estadísticas de proyecto"""
     try:
-        project = Project.objects.get(id=project_id)
+        project = Project.objects.select_related('owner').get(id=project_id)
     except Project.DoesNotExist:
         return Response(
             {'error': 'Proyecto no encontrado.'},
             status=status.HTTP_404_NOT_FOUND
         )
     
-    user = request.user
-    if not (project.owner == user or 
-            project.members.filter(user=user).exists() or 
-            user.is_admin()):
+    if not get_access(request).can_view_project(project):
         return Response(
             {'error': 'No tienes permisos para ver este proyecto.'},
             status=status.HTTP_403_FORBIDDEN
         )
     
-    tasks = project.tasks.all()
-    total_tasks = tasks.count()
-    completed_tasks = tasks.filter(status='completed').count()
-    in_progress_tasks = tasks.filter(status='in_progress').count()
-    pending_tasks = tasks.exclude(status__in=['completed', 'cancelled']).count()
-    overdue_tasks = tasks.filter(
-        due_date__lt=timezone.now(),
-        status__in=['todo', 'in_progress', 'review']
-    ).count()
-    
-    progress_percentage = round((completed_tasks / total_tasks * 100), 2) if total_tasks > 0 else 0
-    
-    stats = {
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'in_progress_tasks': in_progress_tasks,
-        'pending_tasks': pending_tasks,
-        'overdue_tasks': overdue_tasks,
-        'progress_percentage': progress_percentage,
-        'total_members': project.members.count(),
-        'active_members': project.members.filter(user__is_active=True).count()
-    }
+    def compute():
+        member_stats = ProjectMember.objects.filter(project=project).stats()
+        stats = _build_stats(project.tasks.stats(), member_stats)
+        project.members_count = stats['total_members']
+        return {
+            'project': ProjectSerializer(project).data,
+            'stats': ProjectStatsSerializer(stats).data
+        }
+    
+    return Response(cached(project_namespace(project.id), ('project_stats',), compute, STATS_CACHE_TTL))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def portfolio_stats(request):
+    """
+    Vista para estadísticas de varios proyectos (?ids=1,2,3)
+    Resuelve todos los proyectos con dos consultas agrupadas
+    """
+    try:
+        project_ids = [
+            int(value) for value in request.query_params.get('ids', '').split(',') if value.strip()
+        ]
+    except ValueError:
+        return Response(
+            {'error': 'El parámetro ids debe ser una lista de enteros separados por comas.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    if not project_ids:
+        return Response(
+            {'error': 'Debes indicar al menos un proyecto en el parámetro ids.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(project_ids) > MAX_STATS_PROJECTS:
+        return Response(
+            {'error': f'Solo se pueden consultar {MAX_STATS_PROJECTS} proyectos por petición.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    def compute():
+        # Los proyectos que el usuario no puede ver simplemente no aparecen
+        member_stats = Project.objects.visible_to(request.user).filter(pk__in=project_ids).member_stats()
+        task_stats = Task.objects.filter(project_id__in=list(member_stats)).stats_by_project()
+        
+        results = [
+            {
+                'project_id': project_id,
+                **ProjectStatsSerializer(_build_stats(
+                    task_stats.get(project_id, EMPTY_TASK_STATS), member_stats[project_id]
+                )).data,
+            }
+            for project_id in dict.fromkeys(project_ids)
+            if project_id in member_stats
+        ]
+        return {'results': results, 'count': len(results)}
+    
+    # La visibilidad depende de las membresías, que invalidan las listas de proyectos
+    namespaces = [PROJECT_LISTS_NAMESPACE, *map(project_namespace, project_ids)]
+    return Response(cached(
+        namespaces, ('portfolio_stats', request.user.id, project_ids), compute, STATS_CACHE_TTL
+    ))
+
+
+SEARCH_TYPES = {'project', 'task', 'comment'}
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def search(request):
+    """
+    Búsqueda de texto en proyectos, tareas y comentarios (?q=...)
+    Filtros opcionales: type=task,comment y project=<id>. Resultados por
+    relevancia, paginados con page/page_size y con la visibilidad de los listados
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response(
+            {'error': 'Debes indicar el texto a buscar en el parámetro q.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    kinds = {value.strip() for value in request.query_params.get('type', '').split(',') if value.strip()}
+    if kinds - SEARCH_TYPES:
+        return Response(
+            {'error': f"Tipos no válidos: {', '.join(sorted(kinds - SEARCH_TYPES))}."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    serializer = ProjectStatsSerializer(stats)
-    return Response({
-        'project': ProjectSerializer(project).data,
-        'stats': serializer.data
-    })
+    project_id = request.query_params.get('project')
+    if project_id is not None:
+        try:
+            project_id = int(project_id)
+        except ValueError:
+            return Response(
+                {'error': 'El parámetro project debe ser un entero.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+    
+    access = get_access(request)
+    paginator = UncountedPagePagination()
+    hits = paginator.paginate_fetch(
+        lambda limit, offset: search_documents(
+            request.user, access.member_project_ids, query,
+            kinds=sorted(kinds), project_id=project_id, limit=limit, offset=offset,
+        ),
+        request,
+    )
+    return paginator.get_paginated_response(hits)
 
 
 @api_view(['POST'])
@@ -405,20 +584,14 @@ def project_members(request, project_id):
         )
     
     # Verificar permisos para ver el proyecto
-    if not (project.owner == request.user or 
-            project.members.filter(user=request.user).exists() or 
-            request.user.is_admin()):
+    if not get_access(request).can_view_project(project):
         return Response(
             {'error': 'No tienes permisos para ver este proyecto.'},
             status=status.HTTP_403_FORBIDDEN
         )
     
-    members = ProjectMember.objects.filter(project=project)
-    print(f"Miembros encontrados para proyecto {project_id}: {members.count()}")
-    for member in members:
-        print(f"  - Usuario: {member.user.id} ({member.user.full_name}), Rol: {member.role}")
+    members = ProjectMember.objects.filter(project=project).select_related('user')
     serializer = ProjectMemberSerializer(members, many=True)
-    print(f"Datos serializados: {serializer.data}")
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -429,7 +602,7 @@ def task_comments(request, task_id):
     Vista para listar comentarios de una tarea
     """
     try:
-        task = Task.objects.get(id=task_id)
+        task = Task.objects.select_related('project').annotate(**comment_versions()).get(id=task_id)
     except Task.DoesNotExist:
         return Response(
             {'error': 'Tarea no encontrada.'},
@@ -437,19 +610,20 @@ def task_comments(request, task_id):
         )
     
     # Verificar permisos para ver la tarea
-    if not (task.assigned_to == request.user or 
-            task.created_by == request.user or 
-            task.project.owner == request.user or 
-            task.project.members.filter(user=request.user).exists() or 
-            request.user.is_admin()):
+    if not get_access(request).can_view_task(task):
         return Response(
             {'error': 'No tienes permisos para ver esta tarea.'},
             status=status.HTTP_403_FORBIDDEN
         )
     
-    comments = TaskComment.objects.filter(task=task)
+    validators = comments_validators(task, request.user)
+    response = not_modified(request, validators)
+    if response is not None:
+        return response
+    
+    comments = TaskComment.objects.filter(task=task).select_related('author')
     serializer = TaskCommentSerializer(comments, many=True, context={'request': request})
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return set_validators(Response(serializer.data, status=status.HTTP_200_OK), validators)
 
 
 @api_view(['POST'])
@@ -460,7 +634,7 @@ def create_task_comment(request, task_id):
     Solo usuarios asignados a la tarea pueden comentar
     """
     try:
-        task = Task.objects.get(id=task_id)
+        task = Task.objects.select_related('project').get(id=task_id)
     except Task.DoesNotExist:
         return Response(
             {'error': 'Tarea no encontrada.'},
@@ -468,11 +642,7 @@ def create_task_comment(request, task_id):
         )
     
     # Solo usuarios asignados a la tarea pueden comentar
-    if not (task.assigned_to == request.user or 
-            task.created_by == request.user or 
-            task.project.owner == request.user or 
-            task.project.members.filter(user=request.user).exists() or 
-            request.user.is_admin()):
+    if not get_access(request).can_view_task(task):
         return Response(
             {'error': 'Solo los usuarios asignados a la tarea pueden agregar comentarios.'},
             status=status.HTTP_403_FORBIDDEN
@@ -495,7 +665,7 @@ def update_task_comment(request, comment_id):
     Solo el autor puede editar su comentario
     """
     try:
-        comment = TaskComment.objects.get(id=comment_id)
+        comment = TaskComment.objects.select_related('task').get(id=comment_id)
     except TaskComment.DoesNotExist:
         return Response(
             {'error': 'Comentario no encontrado.'},
@@ -526,7 +696,7 @@ def delete_task_comment(request, comment_id):
     El autor, propietario del proyecto o admin pueden eliminar
     """
     try:
-        comment = TaskComment.objects.get(id=comment_id)
+        comment = TaskComment.objects.select_related('task').get(id=comment_id)
     except TaskComment.DoesNotExist:
         return Response(
             {'error': 'Comentario no encontrado.'},
@@ -547,44 +717,169 @@ def delete_task_comment(request, comment_id):
     )
 
 
+USER_TASKS_PAGE_PARAMS = {'page', 'page_size'}
+USER_TASKS_CHUNK_SIZE = 500
+USER_TASKS_DEFAULT_ORDERINGS = ('due_date', '-created_at')
+
+
+def _stream_tasks_document(queryset, totals):
+    """
+    Genera `{"tasks": [...], "count": n, "overdue_count": m}` tarea a tarea,
+    recorriendo las filas con iterator() para no cargarlas enteras en memoria
+    """
+    renderer = default_renderer()
+    rows = TaskListFastSerializer.values(queryset).iterator(chunk_size=USER_TASKS_CHUNK_SIZE)
+    yield b'{"tasks":['
+    for index, task in enumerate(TaskListFastSerializer(rows)):
+        if index:
+            yield b','
+        yield renderer.render(task)
+    yield b'],' + renderer.render(totals)[1:]
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_tasks(request):
-    """Vista para tareas del usuario (solo super admin ve todas, otros solo las asignadas)"""
+    """
+    Vista para tareas del usuario (solo super admin ve todas, otros solo las asignadas)
+    Admite los filtros y el orden de TaskListView (status, priority, due_after, ordering...)
+    Con `?page=`/`?page_size=` responde por páginas; si no, transmite la lista completa
+    """
     user = request.user
-    status_filter = request.query_params.get('status')
     
-    print(f"Usuario: {user.username}, Rol: {user.role}, Superuser: {user.is_superuser}, Filtro: {status_filter}")
+    logger.debug(
+        "my-tasks: usuario=%s rol=%s superuser=%s filtros=%s",
+        user.username, user.role, user.is_superuser, dict(request.query_params)
+    )
     
     # Solo super administradores ven todas las tareas
     if user.is_superuser or user.is_admin():
         queryset = Task.objects.all()
-        print(f"Super Admin - Total tareas antes del filtro: {queryset.count()}")
+        bound = []
     else:
         # Usuarios solo ven tareas asignadas a ellos Y donde son miembros del proyecto
-        from django.db.models import Q
-        
         queryset = Task.objects.filter(
-            Q(assigned_to=user) & Q(project__members__user=user)
-        ).distinct()
-        print(f"Usuario - Total tareas (asignadas Y miembro del proyecto): {queryset.count()}")
+            assigned_to=user, project_id__in=get_access(request).member_project_ids
+        )
+        bound = ['assigned_to']
     
-    if status_filter:
-        queryset = queryset.filter(status=status_filter)
-        print(f"Después del filtro '{status_filter}': {queryset.count()}")
+    try:
+        # Por vencimiento si algún índice lo resuelve; si no, las más recientes primero
+        queryset = TASK_FILTERS.apply(
+            queryset, request.query_params, bound, defaults=USER_TASKS_DEFAULT_ORDERINGS
+        )
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
-    queryset = queryset.order_by('due_date', '-created_at')
+    # Totales en un solo aggregate condicional
+    stats = queryset.stats(timezone.now())
+    totals = {'count': stats['total_tasks'], 'overdue_count': stats['overdue_tasks']}
     
-    serializer = TaskSerializer(queryset, many=True)
+    if USER_TASKS_PAGE_PARAMS & request.query_params.keys():
+        paginator = CountedPagePagination()
+        # Filas de .values() con las tres relaciones en la misma consulta
+        page = paginator.paginate_counted(TaskListFastSerializer.values(queryset), request, totals['count'])
+        return Response({
+            'tasks': TaskListFastSerializer(page).data,
+            **totals,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+        })
     
-    return Response({
-        'tasks': serializer.data,
-        'count': queryset.count(),
-        'overdue_count': queryset.filter(
-            due_date__lt=timezone.now(),
-            status__in=['pending', 'in_progress']
-        ).count()
-    })
+    # Sin paginar: el mismo documento JSON, generado por bloques
+    return streaming_response(
+        request, buffered(_stream_tasks_document(queryset, totals)), content_type='application/json'
+    )
+
+
+def _export_output(request):
+    """Formato pedido con ?output= (csv por defecto), o None si no es válido"""
+    output = request.query_params.get('output', 'csv')
+    return output if output in EXPORT_FORMATS else None
+
+
+def _invalid_export_output():
+    return Response(
+        {'error': f"Formato no válido. Opciones: {', '.join(EXPORT_FORMATS)}."},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_project(request, project_id):
+    """
+    Exporta las tareas de un proyecto en CSV o NDJSON (?output=csv|ndjson),
+    transmitidas por bloques. Admite los filtros de TaskListView.
+    """
+    output = _export_output(request)
+    if output is None:
+        return _invalid_export_output()
+    
+    try:
+        project = Project.objects.get(id=project_id)
+    except Project.DoesNotExist:
+        return Response(
+            {'error': 'Proyecto no encontrado.'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    if not get_access(request).can_view_project(project):
+        return Response(
+            {'error': 'No tienes permisos para ver este proyecto.'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    # Misma visibilidad que el listado de tareas del proyecto
+    queryset = Task.objects.filter(project=project).order_by('id')
+    bound = ['project']
+    if not (request.user.is_superuser or request.user.is_admin()):
+        queryset = queryset.filter(assigned_to=request.user)
+        bound.append('assigned_to')
+    try:
+        queryset = TASK_FILTERS.apply(queryset, request.query_params, bound)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return export_response(request, queryset, TASK_COLUMNS, output, f'project-{project.pk}-tasks')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_user_data(request):
+    """
+    Exporta las tareas del usuario (las de my-tasks) o, con ?resource=projects,
+    sus proyectos visibles, en CSV o NDJSON y con los filtros de cada listado
+    """
+    output = _export_output(request)
+    if output is None:
+        return _invalid_export_output()
+    
+    user = request.user
+    is_admin = user.is_superuser or user.is_admin()
+    resource = request.query_params.get('resource', 'tasks')
+    if resource == 'tasks':
+        queryset = Task.objects.all()
+        if not is_admin:
+            queryset = queryset.filter(
+                assigned_to=user, project_id__in=get_access(request).member_project_ids
+            )
+        filterset, columns, bound = TASK_FILTERS, TASK_COLUMNS, [] if is_admin else ['assigned_to']
+    elif resource == 'projects':
+        queryset = Project.objects.visible_to(user)
+        filterset, columns, bound = PROJECT_FILTERS, PROJECT_COLUMNS, [] if is_admin else ['membership']
+    else:
+        return Response(
+            {'error': 'Recurso no válido. Opciones: tasks, projects.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        queryset = filterset.apply(queryset.order_by('id'), request.query_params, bound)
+    except InvalidFilter as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return export_response(request, queryset, columns, output, f'{user.username}-{resource}')
 
 
 @api_view(['PATCH'])
@@ -623,4 +918,194 @@ def update_task_status(request, task_id):
         
         return Response(serializer.data, status=status.HTTP_200_OK)
     
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _notify_task_batch(tasks, notification_type, single_title, single_message, many_title, many_message):
+    """
+    Envía una sola notificación por usuario asignado para un lote de tareas.
+    Con una única tarea se conserva el mensaje individual de siempre.
+    """
+    from .notification_views import send_notification
+    
+    tasks_by_user = {}
+    for task in tasks:
+        tasks_by_user.setdefault(task.assigned_to_id, []).append(task)
+    
+    for user_tasks_batch in tasks_by_user.values():
+        first = user_tasks_batch[0]
+        if len(user_tasks_batch) == 1:
+            send_notification(
+                user=first.assigned_to,
+                notification_type=notification_type,
+                title=single_title,
+                message=single_message.format(title=first.title),
+                project=first.project,
+                task=first
+            )
+        else:
+            projects = {task.project_id for task in user_tasks_batch}
+            send_notification(
+                user=first.assigned_to,
+                notification_type=notification_type,
+                title=many_title,
+                message=many_message.format(count=len(user_tasks_batch)),
+                project=first.project if len(projects) == 1 else None
+            )
+
+
+def _bulk_create_tasks(user, items):
+    """Crea tareas en bloque validando proyectos y usuarios con una consulta cada uno"""
+    projects, assignees, errors = validate_task_items(user, items)
+    if errors:
+        return None, errors
+    
+    created = create_tasks(user, items, projects, assignees)
+    _notify_task_batch(
+        created, 'task_assigned',
+        'Nueva tarea asignada', 'Se te ha asignado la tarea "{title}"',
+        'Nuevas tareas asignadas', 'Se te han asignado {count} tareas'
+    )
+    return created, None
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def import_tasks(request):
+    """
+    Importa tareas desde un fichero CSV, NDJSON o JSON (campo `file`, con el
+    formato de la exportación). Campos opcionales: `input` (si la extensión no
+    lo indica), `project` (para las filas sin project_id) y `dry_run`.
+    Las filas con errores se informan sin abortar las demás.
+    """
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response(
+            {'error': 'Debes adjuntar el fichero en el campo file.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        input_format = input_format_for(upload.name, request.data.get('input'))
+    except InvalidImport as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    importer = TaskImport(
+        request.user,
+        default_project=request.data.get('project') or None,
+        batch_size=IMPORT_BATCH_SIZE,
+        dry_run=str(request.data.get('dry_run', '')).lower() in ('true', '1'),
+    )
+    try:
+        summary = importer.run(read_rows(upload.file, input_format))
+    except InvalidImport as exc:
+        # Los lotes anteriores al error ya se importaron
+        return Response({'error': str(exc), **importer.summary()}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(summary, status=status.HTTP_200_OK)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def bulk_tasks(request):
+    """
+    Operaciones masivas sobre tareas (crear, cambiar estado, reasignar, eliminar)
+    Todo o nada: los permisos se comprueban en una pasada antes de escribir
+    """
+    serializer = TaskBulkSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    data = serializer.validated_data
+    action = data['action']
+    user = request.user
+    
+    with transaction.atomic():
+        if action == 'create':
+            created, errors = _bulk_create_tasks(user, data['tasks'])
+            if errors:
+                return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+            created = Task.objects.filter(
+                pk__in=[task.pk for task in created]
+            ).select_related('project', 'assigned_to', 'created_by')
+            return Response(
+                {'created': TaskSerializer(created, many=True).data},
+                status=status.HTTP_201_CREATED
+            )
+        
+        tasks = list(
+            Task.objects.visible_to(user)
+            .filter(pk__in=data['ids'])
+            .select_related('project', 'assigned_to')
+            .select_for_update(of=('self',))
+        )
+        missing = set(data['ids']) - {task.pk for task in tasks}
+        if missing:
+            return Response(
+                {'error': 'Tareas no encontradas.', 'ids': sorted(missing)},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if action == 'delete':
+            if not user.can_edit_projects():
+                return Response(
+                    {'error': 'No tienes permisos para eliminar estas tareas.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            Task.objects.filter(pk__in=data['ids']).delete()
+            return Response({'deleted': len(tasks)})
+        
+        if action == 'reassign':
+            # Solo administradores pueden cambiar la asignación
+            if not user.is_admin():
+                return Response(
+                    {'error': 'Solo los administradores pueden reasignar tareas.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            try:
+                assignee = User.objects.get(pk=data['assigned_to'])
+            except User.DoesNotExist:
+                return Response(
+                    {'error': 'No existe un usuario con este ID.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            changed = [task for task in tasks if task.assigned_to_id != assignee.id]
+            now = timezone.now()
+            for task in changed:
+                task.assigned_to = assignee
+                task.updated_at = now
+            Task.objects.bulk_update(changed, ['assigned_to', 'updated_at'])
+            invalidate_dashboards(task_dashboard_users(changed))
+            publish_tasks(changed, 'updated')
+            _notify_task_batch(
+                changed, 'task_assigned',
+                'Tarea asignada', 'Se te ha asignado la tarea: {title}',
+                'Tareas asignadas', 'Se te han asignado {count} tareas'
+            )
+            return Response({'updated': len(changed)})
+        
+        # update_status: misma regla que update_task_status, para todas las tareas
+        forbidden = [task.pk for task in tasks if not task.can_user_edit(user)]
+        if forbidden:
+            return Response(
+                {'error': 'No tienes permisos para actualizar estas tareas.', 'ids': forbidden},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        now = timezone.now()
+        changed = [task for task in tasks if task.status != data['status']]
+        completed = []
+        for task in changed:
+            if task.status != 'completed' and data['status'] == 'completed':
+                completed.append(task)
+            task.status = data['status']
+            task.sync_completed_at(now)
+            task.updated_at = now
+        Task.objects.bulk_update(changed, ['status', 'completed_at', 'updated_at'])
+        invalidate_dashboards(task_dashboard_users(changed))
+        publish_tasks(changed, 'updated')
+        _notify_task_batch(
+            completed, 'task_completed',
+            'Tarea completada', 'Has completado la tarea "{title}"',
+            'Tareas completadas', 'Has completado {count} tareas'
+        )
+        return Response({'updated': len(changed)})
@@ -176,13 +176,34 @@ export const NotificationProvider: React.FC<NotificationProviderProps> = ({ chil
         try {
           const data = JSON.parse(event.data);
           console.log('📨 WebSocket message received:', data);
-          
+
+          // Confirmar el frame: el servidor deja de enviar si no se confirman
+          if (typeof data.seq === 'number') {
+            websocket.send(JSON.stringify({ type: 'ack', seq: data.seq }));
+          }
+
           if (data.type === 'notification' && data.notification) {
             console.log('🔔 Adding new notification:', data.notification);
             addNotification(data.notification);
-          } else {
+          } else if (data.type === 'notifications' && Array.isArray(data.notifications)) {
+            // Varias notificaciones agrupadas en un solo frame
+            console.log('🔔 Adding batched notifications:', data.notifications.length);
+            data.notifications.forEach((notification: Notification) => addNotification(notification));
+          } else if (data.type !== 'unread_count') {
             console.log('⚠️ Unknown message type:', data.type);
           }
+
+          // El contador puede llegar solo o junto a las notificaciones: manda el del servidor
+          if (typeof data.unread_count === 'number') {
+            setUnreadCount(data.unread_count);
+          }
+
+          // El servidor descartó eventos (cliente lento): resincronizar por la API
+          if (data.dropped) {
+            console.log('⚠️ Dropped notifications:', data.dropped);
+            fetchNotifications();
+            fetchUnreadCount();
+          }
         } catch (error) {
           console.error('❌ Error parsing WebSocket message:', error);
         }